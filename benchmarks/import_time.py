@@ -0,0 +1,76 @@
+"""
+冷啟動壓測：在全新的 Python 行程中量測匯入時間，以及預先建立模型與向量資料庫（warm_up）的時間
+
+每個模組各以 N 個新行程匯入，回報中位數與最大值，並列出匯入後已載入的重量級套件
+（chromadb、langchain_openai、openai、grandalf），確認它們沒有在匯入階段被載入。
+warm_up 只建立客戶端與開啟向量資料庫，不呼叫任何 API。
+
+使用方法:
+uv run python -m benchmarks.import_time [--rounds 5]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = [
+    "legal_consult_agent.utils.data_loader",
+    "legal_consult_agent.agent",
+    "start_server",
+]
+HEAVY_PACKAGES = ["chromadb", "langchain_openai", "openai", "grandalf"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+warm_up = None
+if {warm_up!r}:
+    from legal_consult_agent.utils import models, tools
+    start = time.perf_counter()
+    models.warm_up()
+    tools.warm_up()
+    warm_up = time.perf_counter() - start
+print(json.dumps({{"import": elapsed, "heavy": heavy, "warm_up": warm_up}}))
+"""
+
+
+def probe(module: str, warm_up: bool = False) -> dict:
+    code = PROBE.format(module=module, heavy=HEAVY_PACKAGES, warm_up=warm_up)
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PRINT_GRAPH": "false"},
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    rounds = 5
+    if "--rounds" in sys.argv:
+        rounds = int(sys.argv[sys.argv.index("--rounds") + 1])
+
+    print(f"每個模組 {rounds} 個新行程")
+    print(f"{'模組':40} | {'中位數(ms)':>10} | {'最大(ms)':>9} | 已載入的重量級套件")
+    print("-" * 96)
+    for module in MODULES:
+        results = [probe(module) for _ in range(rounds)]
+        samples = [result["import"] for result in results]
+        heavy = ", ".join(results[-1]["heavy"]) or "無"
+        print(
+            f"{module:40} | {statistics.median(samples) * 1000:10.1f} | {max(samples) * 1000:9.1f} | {heavy}"
+        )
+    print("-" * 96)
+
+    result = probe("legal_consult_agent.agent", warm_up=True)
+    print(f"warm_up（建立 OpenAI 客戶端、開啟向量資料庫與載入索引）: {result['warm_up'] * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
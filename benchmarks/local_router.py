@@ -0,0 +1,109 @@
+"""
+本地路由器評估：準確率、改用LLM的比例與每次判斷的延遲
+
+以留一法（leave-one-out）評估 ROUTING_EXAMPLES_PATH 中的範例問題：每個問題都由不包含它本身的
+範例（加上各領域的 tags）所建立的分類器判斷，並假設信心不足而改用LLM的問題由LLM判斷正確。
+對不同的信心門檻列出本地判斷的準確率、改用LLM的比例、整體準確率（Retrieve 與 LegalTopic 的乘積）
+以及省下的LLM路由呼叫比例。
+
+範例皆為第一輪問題：本地路由只用於沒有對話歷史的第一輪，追問一律交給LLM，
+實際省下的LLM呼叫比例需再乘上第一輪佔所有輪次的比例。
+範例與 tags 會嵌入一次（經過嵌入快取，重複執行不再呼叫API）。
+
+使用方法:
+uv run python -m benchmarks.local_router [--method knn|centroid] [--k 3] [--margins 0,0.02,0.05,0.1]
+"""
+
+import statistics
+import sys
+import time
+import numpy as np
+from legal_consult_agent.utils.embeddings import get_embeddings
+from legal_consult_agent.utils.local_router import (
+    LOCAL_ROUTER_K,
+    LOCAL_ROUTER_METHOD,
+    LocalRouter,
+    build_classifiers,
+    load_routing_examples,
+    load_topic_tags,
+)
+
+
+def evaluate(predictions: list[tuple[str, float]], expected: list[str], margin: float) -> dict:
+    local = [(label, truth) for (label, gap), truth in zip(predictions, expected) if gap >= margin]
+    correct = sum(label == truth for label, truth in local)
+    return {
+        "local_accuracy": f"{correct / len(local):.1%}" if local else "-",
+        "fallback_rate": 1 - len(local) / len(expected),
+        # Fallbacks are counted as correct: the LLM decides them as it does today.
+        "overall_accuracy": (correct + len(expected) - len(local)) / len(expected),
+    }
+
+
+def main():
+    method = LOCAL_ROUTER_METHOD
+    k = LOCAL_ROUTER_K
+    margins = [0.0, 0.02, 0.05, 0.1]
+    if "--method" in sys.argv:
+        method = sys.argv[sys.argv.index("--method") + 1]
+    if "--k" in sys.argv:
+        k = int(sys.argv[sys.argv.index("--k") + 1])
+    if "--margins" in sys.argv:
+        margins = [float(m) for m in sys.argv[sys.argv.index("--margins") + 1].split(",")]
+
+    embeddings = get_embeddings()
+    examples = load_routing_examples()
+    tags = load_topic_tags()
+    start = time.perf_counter()
+    example_vectors = np.asarray(embeddings.embed_documents([e["question"] for e in examples]), dtype=np.float32)
+    tag_vectors = np.asarray(embeddings.embed_documents([tag for tag, _ in tags]), dtype=np.float32) if tags else None
+    print(f"範例 {len(examples)} 筆、tags {len(tags)} 個，嵌入耗時 {(time.perf_counter() - start) * 1000:.1f}ms")
+    print(f"分類方式: {method}，k={k}")
+
+    retrieve_predictions, retrieve_expected = [], []
+    topic_predictions, topic_expected = [], []
+    for i, example in enumerate(examples):
+        rest = [j for j in range(len(examples)) if j != i]
+        retrieve_classifier, topic_classifier = build_classifiers(
+            [examples[j] for j in rest], example_vectors[rest], tags, tag_vectors, method, k
+        )
+        router = LocalRouter(embeddings, retrieve_classifier, topic_classifier)
+        decision = router.decide(example_vectors[i].tolist(), margin=0.0)
+        retrieve_predictions.append((decision.Retrieve, decision.retrieve_margin))
+        retrieve_expected.append(example["Retrieve"])
+        if example["Retrieve"] == "Yes":
+            topic_predictions.append((decision.LegalTopic, decision.topic_margin))
+            topic_expected.append(example["LegalTopic"])
+
+    print("-" * 112)
+    print(
+        f"{'門檻':>6} | {'Retrieve 本地準確率':>18} | {'改用LLM':>8} | {'LegalTopic 本地準確率':>20} | "
+        f"{'改用LLM':>8} | {'整體準確率':>8} | 省下的LLM呼叫"
+    )
+    print("-" * 112)
+    for margin in margins:
+        retrieve = evaluate(retrieve_predictions, retrieve_expected, margin)
+        topic = evaluate(topic_predictions, topic_expected, margin)
+        # Two-step routing makes one Retrieve call per turn and one topic call per retrieval turn.
+        calls = len(retrieve_expected) + len(topic_expected)
+        saved = (1 - retrieve["fallback_rate"]) * len(retrieve_expected) + (1 - topic["fallback_rate"]) * len(topic_expected)
+        print(
+            f"{margin:6.2f} | {retrieve['local_accuracy']:>18} | {retrieve['fallback_rate']:8.1%} | "
+            f"{topic['local_accuracy']:>20} | {topic['fallback_rate']:8.1%} | "
+            f"{retrieve['overall_accuracy'] * topic['overall_accuracy']:10.1%} | {saved / calls:.1%}"
+        )
+    print("-" * 112)
+
+    retrieve_classifier, topic_classifier = build_classifiers(examples, example_vectors, tags, tag_vectors, method, k)
+    router = LocalRouter(embeddings, retrieve_classifier, topic_classifier)
+    samples = []
+    for i in range(1000):
+        vector = example_vectors[i % len(examples)].tolist()
+        start = time.perf_counter()
+        router.decide(vector)
+        samples.append(time.perf_counter() - start)
+    print(f"每次判斷（不含嵌入呼叫）: 平均 {statistics.mean(samples) * 1e6:.1f}µs | 中位數 {statistics.median(samples) * 1e6:.1f}µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+檢索節點事件迴圈延遲壓測
+
+同時執行 N 個 retriever 節點，並以心跳任務量測事件迴圈延遲（預期喚醒時間與實際喚醒時間的差距）。
+比較舊的同步 invoke（在事件迴圈上阻塞）與目前的執行緒池路徑。
+
+預設以模擬的阻塞檢索器（time.sleep）取代 Chroma 與嵌入 API，無需網路；
+加上 --real 則使用實際的向量資料庫與 OpenAI 嵌入模型（需要 .env 設定）。
+
+使用方法:
+uv run python -m benchmarks.retriever_event_loop_lag [--real] [--latency 0.05]
+"""
+
+import asyncio
+import importlib
+import sys
+import time
+from langchain_core.documents import Document
+
+# nodes/__init__.py 以同名函數遮蔽了模組，因此透過 importlib 取得模組本身
+retriever_module = importlib.import_module("legal_consult_agent.nodes.retriever")
+
+CONCURRENCY_LEVELS = [1, 4, 16, 64]
+HEARTBEAT_INTERVAL = 0.005
+
+
+class BlockingRetriever:
+    """模擬一次阻塞的嵌入HTTP呼叫加上Chroma查詢"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def invoke(self, query: str) -> list[Document]:
+        time.sleep(self.latency)
+        return [Document(page_content=query)]
+
+
+class FakeTopicLLM:
+    async def ainvoke(self, prompt: str):
+        await asyncio.sleep(0.01)
+        return retriever_module.Response(LegalTopic="Criminal", Query="竊盜罪的刑責是什麼？")
+
+
+async def blocking_retriever(state):
+    """舊版行為：在事件迴圈上直接呼叫同步 invoke"""
+    res = await retriever_module.topic_llm.ainvoke(state["question"])
+    documents = retriever_module.get_retriever(res.LegalTopic).invoke(res.Query)
+    return {"documents": documents, "LegalTopic": res.LegalTopic}
+
+
+async def heartbeat(stop: asyncio.Event, lags: list[float]):
+    while not stop.is_set():
+        expected = time.perf_counter() + HEARTBEAT_INTERVAL
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def measure(node, concurrency: int) -> tuple[float, float, float]:
+    state = {"question": "竊盜罪的刑責是什麼？", "messages": [], "chat_history": "(none)"}
+    stop = asyncio.Event()
+    lags: list[float] = []
+    monitor = asyncio.create_task(heartbeat(stop, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*[node(state) for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor
+    lags.sort()
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    return elapsed, p99, lags[-1] if lags else 0.0
+
+
+async def main():
+    real = "--real" in sys.argv
+    latency = 0.05
+    if "--latency" in sys.argv:
+        latency = float(sys.argv[sys.argv.index("--latency") + 1])
+
+    if not real:
+        retriever_module.topic_llm = FakeTopicLLM()
+        blocking = BlockingRetriever(latency)
+        retriever_module.get_retriever = lambda topic, k=None: blocking
+
+    print(f"模式: {'實際向量資料庫' if real else f'模擬阻塞檢索 ({latency * 1000:.0f}ms)'}")
+    print(f"{'路徑':10} | {'並行數':>6} | {'總時間(s)':>9} | {'p99延遲(ms)':>11} | {'最大延遲(ms)':>12}")
+    print("-" * 62)
+    for name, node in (("blocking", blocking_retriever), ("threadpool", retriever_module.retriever)):
+        for concurrency in CONCURRENCY_LEVELS:
+            elapsed, p99, worst = await measure(node, concurrency)
+            print(f"{name:10} | {concurrency:6} | {elapsed:9.3f} | {p99 * 1000:11.1f} | {worst * 1000:12.1f}")
+        print("-" * 62)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
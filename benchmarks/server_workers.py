@@ -0,0 +1,194 @@
+"""
+多 worker 服務器吞吐量壓測：1 個 worker vs N 個 worker
+
+分別以 uvicorn 啟動 1 個與 N 個 worker 的服務器（共用同一個 SQLite 檢查點），
+以固定並行數發送兩輪對話（第二輪沿用同一個 thread_id，可能落在不同 worker 上），
+量測每秒完成的請求數與延遲分佈。
+
+LLM 與嵌入模型以固定回應的模擬物件取代（可用 --llm-latency 模擬網路延遲），
+因此量測的是 JSON、pydantic、prompt 組裝、Chroma 查詢與檢查點序列化等非 LLM 的 CPU 工作。
+
+使用方法:
+uv run python -m benchmarks.server_workers [--workers 4] [--requests 200] [--concurrency 32] [--llm-latency 0.0]
+"""
+
+import asyncio
+import importlib
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import aiohttp
+from langchain_core.messages import AIMessage
+
+
+class FakeLLM:
+    """固定回應的模擬 LLM，介面涵蓋節點使用的 ainvoke 與 abatch"""
+
+    def __init__(self, result, latency: float):
+        self.result = result
+        self.latency = latency
+
+    async def ainvoke(self, prompt, config=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.result
+
+    async def abatch(self, prompts, config=None):
+        return await asyncio.gather(*[self.ainvoke(prompt) for prompt in prompts])
+
+
+def create_app():
+    """uvicorn 的 app factory：在 worker 行程內載入服務器並替換 LLM 與嵌入模型"""
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    import start_server
+    from legal_consult_agent.utils import tools
+
+    latency = float(os.getenv("BENCHMARK_LLM_LATENCY", "0"))
+    nodes = {
+        name: importlib.import_module(f"legal_consult_agent.nodes.{name}")
+        for name in ("semantic_router", "retriever", "generator", "critic")
+    }
+    nodes["semantic_router"].router_llm = FakeLLM(nodes["semantic_router"].Response(Retrieve="Yes"), latency)
+    nodes["retriever"].topic_llm = FakeLLM(
+        nodes["retriever"].Response(LegalTopic="Criminal", Query="竊盜罪的刑責是什麼？"), latency
+    )
+    nodes["generator"].relevance_llm = FakeLLM(nodes["generator"].Response(IsRelevant="Yes"), latency)
+    nodes["generator"].reasoning_model = FakeLLM(AIMessage(content="依刑法第320條，竊盜罪處五年以下有期徒刑。"), latency)
+    nodes["critic"].critic_llm = FakeLLM(nodes["critic"].Response(IsSupport="Fully", IsUseful="5"), latency)
+
+    # 嵌入向量維度需與 collection 一致
+    sample = tools.criminal_vector_store.get(limit=1, include=["embeddings"])["embeddings"]
+    fake_embeddings = DeterministicFakeEmbedding(size=len(sample[0]) if len(sample) else 1536)
+    for vector_store in tools.topic_vector_stores.values():
+        vector_store._embedding_function = fake_embeddings
+    tools.get_embeddings.override(fake_embeddings)
+    return start_server.app
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+async def wait_until_ready(base_url: str, process: subprocess.Popen, timeout: float = 180):
+    deadline = time.perf_counter() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError("服務器啟動失敗")
+            try:
+                async with session.get(f"{base_url}/health") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.5)
+    raise TimeoutError("等待服務器啟動逾時")
+
+
+async def run_load(base_url: str, conversations: int, concurrency: int) -> tuple[float, list[float], int, set[int]]:
+    """
+    發送兩輪對話並量測
+
+    Returns:
+        tuple: (總時間, 每個請求的延遲, 失敗數, 回應請求的 worker pid)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    failures = 0
+
+    async def post(session: aiohttp.ClientSession, payload: dict):
+        nonlocal failures
+        start = time.perf_counter()
+        async with session.post(f"{base_url}/chat", json=payload) as response:
+            await response.read()
+            if response.status != 200:
+                failures += 1
+        latencies.append(time.perf_counter() - start)
+
+    async def conversation(session: aiohttp.ClientSession):
+        async with semaphore:
+            thread_id = str(uuid.uuid4())
+            await post(session, {"question": "偷東西會被判多久？", "thread_id": thread_id})
+            await post(session, {"question": "如果是初犯呢？", "thread_id": thread_id})
+
+    connector = aiohttp.TCPConnector(limit=concurrency, force_close=True)
+    timeout = aiohttp.ClientTimeout(total=600)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*[conversation(session) for _ in range(conversations)])
+        elapsed = time.perf_counter() - start
+
+        # force_close 讓每次請求重新連線，由作業系統分配到不同 worker
+        pids = set()
+        for _ in range(32):
+            async with session.get(f"{base_url}/info") as response:
+                pids.add((await response.json())["pid"])
+    return elapsed, latencies, failures, pids
+
+
+def start_workers(workers: int, port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "benchmarks.server_workers:create_app", "--factory",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+            "--timeout-graceful-shutdown", "10", "--log-level", "warning",
+        ],
+        env=env,
+        # 節點的除錯輸出會淹沒結果表格
+        stdout=subprocess.DEVNULL,
+    )
+
+
+async def main():
+    workers = os.cpu_count() or 1
+    requests = 200
+    concurrency = 32
+    latency = 0.0
+    port = 8765
+    if "--workers" in sys.argv:
+        workers = int(sys.argv[sys.argv.index("--workers") + 1])
+    if "--requests" in sys.argv:
+        requests = int(sys.argv[sys.argv.index("--requests") + 1])
+    if "--concurrency" in sys.argv:
+        concurrency = int(sys.argv[sys.argv.index("--concurrency") + 1])
+    if "--llm-latency" in sys.argv:
+        latency = float(sys.argv[sys.argv.index("--llm-latency") + 1])
+
+    conversations = max(1, requests // 2)
+    print(f"請求數: {conversations * 2}（{conversations} 組兩輪對話），並行數: {concurrency}，模擬LLM延遲: {latency * 1000:.0f}ms")
+    print(f"{'worker數':>8} | {'總時間(s)':>9} | {'請求/秒':>8} | {'p50(ms)':>8} | {'p99(ms)':>8} | {'失敗':>4} | {'回應pid數':>8}")
+    print("-" * 76)
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in sorted({1, workers}):
+            env = {
+                **os.environ,
+                "CHECKPOINTER": "sqlite",
+                "CHECKPOINT_PATH": os.path.join(tmp, f"checkpoints_{count}.sqlite3"),
+                "SEMANTIC_CACHE_ENABLED": "false",
+                "LLM_CACHE_ENABLED": "false",
+                "EMBEDDING_CACHE_ENABLED": "false",
+                "BENCHMARK_LLM_LATENCY": str(latency),
+            }
+            process = start_workers(count, port, env)
+            base_url = f"http://127.0.0.1:{port}"
+            try:
+                await wait_until_ready(base_url, process)
+                elapsed, latencies, failures, pids = await run_load(base_url, conversations, concurrency)
+            finally:
+                process.terminate()
+                process.wait()
+            print(
+                f"{count:8} | {elapsed:9.2f} | {len(latencies) / elapsed:8.1f} | "
+                f"{percentile(latencies, 0.5) * 1000:8.1f} | {percentile(latencies, 0.99) * 1000:8.1f} | "
+                f"{failures:4} | {len(pids):8}"
+            )
+    if workers == 1:
+        print("只有一個 CPU 核心或指定 --workers 1，無法比較多 worker 的效果")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""
+向量檢索後端微基準測試：Chroma (SQLite) vs 記憶體內 NumPy 索引
+
+以 collection 中已存的向量作為查詢向量（不呼叫嵌入API），
+分別量測單一領域 top-k 查詢在兩種後端的延遲，並檢查兩者的 top-k 結果是否一致。
+
+使用方法:
+uv run python -m benchmarks.vector_index [--rounds 200] [--k 4]
+"""
+
+import statistics
+import sys
+import time
+from legal_consult_agent.utils.tools import topic_vector_stores
+from legal_consult_agent.utils.vector_index import NumpyVectorIndex
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def report(name: str, samples: list[float]):
+    print(
+        f"{name:8} | 平均 {statistics.mean(samples) * 1e6:9.1f}µs | "
+        f"p50 {percentile(samples, 0.5) * 1e6:9.1f}µs | p99 {percentile(samples, 0.99) * 1e6:9.1f}µs"
+    )
+
+
+def main():
+    rounds = 200
+    k = 4
+    if "--rounds" in sys.argv:
+        rounds = int(sys.argv[sys.argv.index("--rounds") + 1])
+    if "--k" in sys.argv:
+        k = int(sys.argv[sys.argv.index("--k") + 1])
+
+    start = time.perf_counter()
+    index = NumpyVectorIndex.from_vector_stores(topic_vector_stores)
+    print(f"NumPy索引建立: {len(index.documents)} 筆向量，耗時 {(time.perf_counter() - start) * 1000:.1f}ms")
+    if not index.documents:
+        print("向量資料庫為空，請先執行 load_data.py")
+        return
+
+    queries = [
+        (doc.metadata["topic"], index.matrix[i].tolist())
+        for i, doc in enumerate(index.documents)
+    ]
+
+    chroma_samples: list[float] = []
+    numpy_samples: list[float] = []
+    mismatches = 0
+    for r in range(rounds):
+        topic, vector = queries[r % len(queries)]
+
+        start = time.perf_counter()
+        chroma_hits = topic_vector_stores[topic].similarity_search_by_vector(vector, k=k)
+        chroma_samples.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        numpy_hits = index.search(vector, k, index.mask([topic]))
+        numpy_samples.append(time.perf_counter() - start)
+
+        if [d.metadata.get("id") for d in chroma_hits] != [d.metadata.get("id") for d, _ in numpy_hits]:
+            mismatches += 1
+
+    print(f"查詢次數: {rounds}，k={k}")
+    report("chroma", chroma_samples)
+    report("numpy", numpy_samples)
+    print(f"加速倍數: {statistics.mean(chroma_samples) / statistics.mean(numpy_samples):.1f}x")
+    print(f"top-k 結果不一致次數: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,46 @@
 from langgraph.graph import END, StateGraph, START
-from langgraph.checkpoint.memory import MemorySaver
 from legal_consult_agent.nodes import (
+    chat_history,
     semantic_router,
+    query_router,
     retriever,
     generator,
     critic,
     reranker,
+    compactor,
 )
 from legal_consult_agent.utils.state import LegalConsultState as State
+from legal_consult_agent.utils.checkpointer import create_checkpointer
+from legal_consult_agent.utils.config import env_bool
+from legal_consult_agent.nodes.query_router import routing_mode
 
 builder = StateGraph(State)
+builder.add_node("chat_history", chat_history)
 builder.add_node("semantic_router", semantic_router)
+builder.add_node("query_router", query_router)
 builder.add_node("retriever", retriever)
 builder.add_node("generator", generator)
 builder.add_node("critic", critic)
 builder.add_node("reranker", reranker)
+builder.add_node("compactor", compactor)
 
-builder.add_edge(START, "semantic_router")
+builder.add_edge(START, "chat_history")
+# ROUTING_MODE / configurable "routing_mode": "two_step" (semantic_router, then the retriever's
+# topic/query call) or "combined" (query_router decides Retrieve, LegalTopic and Query at once).
 builder.add_conditional_edges(
-    source="semantic_router",
-    path=lambda state: state["Retrieve"],
-    path_map={
-        "Yes": "retriever",
-        "No": "generator",
-    }
+    source="chat_history",
+    path=lambda state, config: "query_router" if routing_mode(config) == "combined" else "semantic_router",
+    path_map=["semantic_router", "query_router"],
 )
+for router in ("semantic_router", "query_router"):
+    builder.add_conditional_edges(
+        source=router,
+        path=lambda state: state["Retrieve"],
+        path_map={
+            "Yes": "retriever",
+            "No": "generator",
+        }
+    )
 builder.add_edge("retriever", "generator")
 builder.add_edge("generator", "critic")
 builder.add_conditional_edges(
@@ -32,11 +48,15 @@ builder.add_conditional_edges(
     path=lambda state: state["Retrieve"],
     path_map={
         "Yes": "reranker",
-        "No": END,
+        "No": "compactor",
     }
 )
-builder.add_edge("reranker", END)
+builder.add_edge("reranker", "compactor")
+builder.add_edge("compactor", END)
 
-memory = MemorySaver()
+memory = create_checkpointer()
 graph = builder.compile(checkpointer=memory)
-graph.get_graph().print_ascii()
+
+# Rendering the graph pulls in grandalf; opt in with PRINT_GRAPH=true.
+if env_bool("PRINT_GRAPH", False):
+    graph.get_graph().print_ascii()
@@ -1,13 +1,19 @@
+from .chat_history import chat_history
 from .semantic_router import semantic_router
+from .query_router import query_router
 from .retriever import retriever
 from .generator import generator
 from .critic import critic
 from .reranker import reranker
+from .compactor import compactor
 
 __all__ = [
+    "chat_history",
     "semantic_router",
+    "query_router",
     "retriever",
     "generator",
     "critic",
     "reranker",
+    "compactor",
 ]
\ No newline at end of file
@@ -0,0 +1,69 @@
+'''
+Chat History
+Render the chat history y<t once per turn for semantic_router, retriever and generator:
+1. Keep the last K turns verbatim (HISTORY_WINDOW_TURNS or configurable "history_window_turns")
+2. Fold the turns that slide out of the window into a rolling summary
+
+The summary and the number of messages it covers are kept in the checkpoint, so each turn
+only summarizes the newly dropped messages. The rendered history stays within
+HISTORY_TOKEN_BUDGET (or configurable "history_token_budget").
+'''
+from langchain_core.runnables import RunnableConfig
+from legal_consult_agent.utils.state import LegalConsultState as State
+from legal_consult_agent.utils.models import get_llm
+from legal_consult_agent.utils.admission import admission, AdmittedRunnable
+from legal_consult_agent.utils.lazy import LazyRunnable
+from legal_consult_agent.utils.config import get_configurable
+from legal_consult_agent.utils.history import (
+    HISTORY_WINDOW_TURNS,
+    HISTORY_TOKEN_BUDGET,
+    HISTORY_SUMMARY_TOKENS,
+    HISTORY_SUMMARY_ENABLED,
+    clip_tokens,
+    estimate_tokens,
+    render_history,
+    render_messages,
+    window_start,
+)
+
+
+summary_llm = AdmittedRunnable(LazyRunnable(get_llm), admission)
+
+
+async def summarize(summary: str, messages, max_tokens: int) -> str:
+    prompt = f"""
+    You are summarizing a legal consultation between a user and an assistant.
+    Update the existing summary with the new messages. Keep the user's facts, questions and the
+    legal conclusions given so far, and drop greetings and repetition.
+    Answer in the language of the conversation, in at most {max_tokens} tokens.
+
+    Existing Summary: {summary or "(none)"}
+
+    New Messages:
+    {render_messages(messages)}
+
+    Updated Summary:
+    """
+    res = await summary_llm.ainvoke(prompt)
+    return clip_tokens(res.content.strip(), max_tokens)
+
+
+async def chat_history(state: State, config: RunnableConfig = None):
+    # The current question has not been added to messages yet, so this is exactly y<t.
+    messages = state.get("messages", [])
+    summary = state.get("history_summary") or ""
+    summarized = min(state.get("summarized_count") or 0, len(messages))
+    max_turns = int(get_configurable(config, "history_window_turns", HISTORY_WINDOW_TURNS))
+    budget = int(get_configurable(config, "history_token_budget", HISTORY_TOKEN_BUDGET))
+
+    start = window_start(messages, summarized, max_turns, budget - estimate_tokens(summary))
+    if start > summarized:
+        if get_configurable(config, "history_summary", HISTORY_SUMMARY_ENABLED):
+            summary = await summarize(summary, messages[summarized:start], min(HISTORY_SUMMARY_TOKENS, budget // 2))
+        summarized = start
+
+    return {
+        "chat_history": render_history(summary, messages[start:], budget),
+        "history_summary": summary,
+        "summarized_count": summarized,
+    }
@@ -0,0 +1,29 @@
+'''
+Compactor
+If checkpoint compaction is enabled then
+Clear the rendered chat history, documents, candidate answers and their grades once the turn is answered,
+so the stored checkpoint only keeps the conversation itself
+
+else
+Leave the state unchanged
+
+Compaction is enabled by CHECKPOINT_COMPACTION, or per request through
+configurable["checkpoint_compaction"].
+'''
+from langchain_core.runnables import RunnableConfig
+from legal_consult_agent.utils.checkpointer import CHECKPOINT_COMPACTION
+from legal_consult_agent.utils.config import get_configurable
+from legal_consult_agent.utils.state import LegalConsultState as State
+
+
+async def compactor(state: State, config: RunnableConfig = None):
+    if not get_configurable(config, "checkpoint_compaction", CHECKPOINT_COMPACTION):
+        return {}
+    return {
+        "chat_history": "",
+        "documents": [],
+        "ConsultationAnswers": [],
+        "IsRelevant": [],
+        "IsSupport": None,
+        "IsUseful": [],
+    }
@@ -5,12 +5,21 @@ If Retrieve == Yes then
 
 else if Retrieve == No then
 2. LLM predicts IsUseful given x, yt
+
+All candidates are scored in one abatch() pass, bounded by CRITIC_MAX_CONCURRENCY
+or the configurable "critic_max_concurrency"; abatch() keeps input order.
+
+In the generator's "fused" generation_mode there is a single yt grounded in all documents,
+so IsSupport and IsUseful are predicted once given x, yt and every d.
 '''
 from pydantic import BaseModel, Field
 from typing import Literal
 from langchain_core.messages import AIMessage
-from legal_consult_agent.utils.models import llm
+from langchain_core.runnables import RunnableConfig
+from legal_consult_agent.utils.models import structured_llm
 from legal_consult_agent.utils.state import LegalConsultState as State
+from legal_consult_agent.utils.config import env_int, get_configurable
+from legal_consult_agent.nodes.generator import generation_mode, format_passages
 
 
 class Response(BaseModel):
@@ -22,15 +31,46 @@ class Response(BaseModel):
     )
 
 
-async def critic(state: State):
+CRITIC_MAX_CONCURRENCY = env_int("CRITIC_MAX_CONCURRENCY", 8)
+critic_llm = structured_llm(Response, node="critic")
+
+
+async def critic(state: State, config: RunnableConfig = None):
     question = state["question"]
     consultation_answers = state["ConsultationAnswers"]
+    batch_config = {
+        "max_concurrency": max(1, int(get_configurable(config, "critic_max_concurrency", CRITIC_MAX_CONCURRENCY)))
+    }
     # These accumulators stay as lists to align with LegalConsultState typing.
     result_isSupport: list[str] = []
     result_isUseful: list[str] = []
 
+    if state["Retrieve"] == "Yes" and generation_mode(config) == "fused" and state["documents"]:
+        prompt = f"""
+        You are a helpful critic. You are given a question, several text passages with ids and a consultation answer citing them.
+        Determine whether the consultation answer is supported by the text passages.
+        - "Fully" means the consultation answer is fully supported by the text passages.
+        - "Partial" means the consultation answer is partially supported by the text passages.
+        - "No" means the consultation answer is not supported by the text passages.
+
+        Also, determine whether the consultation answer is an useful response to the question.
+        - "5" means the consultation answer is very useful for the question.
+        - "4" means the consultation answer is useful for the question.
+        - "3" means the consultation answer is somewhat useful for the question.
+        - "2" means the consultation answer is not very useful for the question.
+        - "1" means the consultation answer is not useful for the question.
+
+        User's Question: {question}
+        Text Passages:
+        {format_passages(state["documents"])}
+        Consultation Answer: {consultation_answers[0]}
+        """
+        res: Response = await critic_llm.ainvoke(prompt)
+        return {"IsSupport": [res.IsSupport], "IsUseful": [res.IsUseful]}
+
     if state["Retrieve"] == "Yes":
         documents = state["documents"]
+        prompts: list[str] = []
         for i in range(len(documents)):
             prompt = f"""
             You are a helpful critic. You are given a question, a text passage and a consultation answer.
@@ -50,13 +90,17 @@ async def critic(state: State):
             Text Passage: {documents[i].page_content}
             Consultation Answer: {consultation_answers[i]}
             """
-            res: Response = await llm.with_structured_output(Response).ainvoke(prompt)
+            prompts.append(prompt)
+
+        responses: list[Response] = await critic_llm.abatch(prompts, config=batch_config)
+        for res in responses:
             result_isSupport.append(res.IsSupport)
             result_isUseful.append(res.IsUseful)
 
         # Return lists to align with LegalConsultState typing.
         return {"IsSupport": result_isSupport, "IsUseful": result_isUseful}
     else:
+        prompts = []
         for yt in consultation_answers:
             prompt = f"""
             You are a helpful assistant. You are given a question and a consultation answer.
@@ -70,7 +114,10 @@ async def critic(state: State):
             User's Question: {question}
             Consultation Answer: {yt}
             """
-            res: Response = await llm.with_structured_output(Response).ainvoke(prompt)
+            prompts.append(prompt)
+
+        responses = await critic_llm.abatch(prompts, config=batch_config)
+        for res in responses:
             result_isUseful.append(res.IsUseful)
         # 只有一個 consultation answer，直接返回
         # IsSupport is omitted in this branch because no documents were retrieved to critique.
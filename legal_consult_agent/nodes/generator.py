@@ -5,12 +5,32 @@ if Retrieve == Yes then
 
 else if Retrieve == No then
 2. LLM predicts yt given x
+
+The IsRelevant and yt calls for every d are issued concurrently. The fan-out is
+bounded per request (configurable "generator_max_concurrency") and per process
+(GENERATOR_MAX_CONCURRENCY), and results keep the order of documents.
+
+With relevance gating (RELEVANCE_GATING or configurable "relevance_gating"),
+yt is only generated for d judged relevant, and documents / IsRelevant /
+ConsultationAnswers are narrowed to the surviving candidates so critic and
+reranker never see irrelevant passages.
+
+With generation_mode "fused" (GENERATION_MODE or configurable "generation_mode"), IsRelevant is
+still judged for every d, but yt is generated once from all relevant passages in a single prompt,
+citing them by id. ConsultationAnswers and IsRelevant then hold one candidate, documents holds the
+passages it was grounded in, and critic / reranker run in single-candidate mode.
 '''
+import asyncio
+import os
 from pydantic import BaseModel, Field
 from typing import Literal
+from langchain_core.documents import Document
 from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
 from legal_consult_agent.utils.state import LegalConsultState as State
-from legal_consult_agent.utils.models import llm, reasoning_model
+from legal_consult_agent.utils.topics import TOPICS
+from legal_consult_agent.utils.models import structured_llm, reasoning_model
+from legal_consult_agent.utils.config import env_bool, env_int, get_configurable
 
 
 class Response(BaseModel):
@@ -19,39 +39,153 @@ class Response(BaseModel):
     )
 
 
-async def generator(state: State):
-    messages = state["messages"]
+relevance_llm = structured_llm(Response, node="generator")
+
+TOPIC_EXPERTISE = ", ".join(topic.description for topic in TOPICS)
+
+# Process-wide cap shared by every in-flight request.
+GENERATOR_MAX_CONCURRENCY = env_int("GENERATOR_MAX_CONCURRENCY", 16)
+_process_semaphore = asyncio.Semaphore(GENERATOR_MAX_CONCURRENCY)
+RELEVANCE_GATING = env_bool("RELEVANCE_GATING", False)
+GENERATION_MODE = os.getenv("GENERATION_MODE", "per_document")
+
+
+def generation_mode(config: RunnableConfig = None) -> str:
+    '''
+    "per_document" or "fused" for this request
+    '''
+    return get_configurable(config, "generation_mode", GENERATION_MODE)
+
+
+def passage_id(d: Document, i: int) -> str:
+    return d.metadata.get("id") or f"passage_{i + 1}"
+
+
+def format_passages(documents: list[Document]) -> str:
+    '''
+    "[id] content" blocks, the ids the fused answer cites
+    '''
+    return "\n\n".join(f"[{passage_id(d, i)}] {d.page_content}" for i, d in enumerate(documents))
+
+
+async def _bounded(request_semaphore: asyncio.Semaphore, func, *args):
+    # Always acquire the request slot first so a waiting request never holds a process slot.
+    async with request_semaphore:
+        async with _process_semaphore:
+            return await func(*args)
+
+
+async def judge_relevance(question: str, d: Document) -> str:
+    judge_relevence_prompt = f"""
+    You are a helpful assistant. You are given a question and a text passage.
+    Determine whether the text passage provides useful information to solve the question.
+
+    User's Question: {question}
+    Text Passage: {d.page_content}
+    """
+    res: Response = await relevance_llm.ainvoke(judge_relevence_prompt)
+    return res.IsRelevant
+
+
+async def generate_answer(question: str, d: Document, chat_history: str) -> str:
+    predict_yt_prompt = f"""
+    You are a legal consultant. You are very knowledgeable in {TOPIC_EXPERTISE}.
+    You are given a question, a text passage and a chat history.
+    Think Deeply and Generate the answer to the question based on the text passage and chat history.
+
+    User's Question: {question}
+    Text Passage: {d.page_content}
+    Chat History:
+    {chat_history}
+    Your Answer:
+    """
+    res: AIMessage = await reasoning_model.ainvoke(predict_yt_prompt)
+    return res.content
+
+
+async def generate_fused_answer(question: str, documents: list[Document], chat_history: str) -> str:
+    predict_yt_prompt = f"""
+    You are a legal consultant. You are very knowledgeable in {TOPIC_EXPERTISE}.
+    You are given a question, several text passages with ids and a chat history.
+    Think Deeply and Generate one answer to the question grounded in the text passages and chat history.
+    Cite the passages you rely on by their id in square brackets, for example [{passage_id(documents[0], 0)}].
+    Only cite passages you actually used. If the passages do not cover part of the question, say so instead of guessing.
+
+    User's Question: {question}
+    Text Passages:
+    {format_passages(documents)}
+    Chat History:
+    {chat_history}
+    Your Answer:
+    """
+    res: AIMessage = await reasoning_model.ainvoke(predict_yt_prompt)
+    return res.content
+
+
+async def _fused_candidate(request_semaphore: asyncio.Semaphore, question: str, documents: list[Document], chat_history: str):
+    relevance = await asyncio.gather(
+        *[_bounded(request_semaphore, judge_relevance, question, d) for d in documents]
+    )
+    relevant = [d for d, rel in zip(documents, relevance) if rel == "Yes"]
+    # Nothing passed: ground the answer in every retrieved passage rather than none.
+    passages = relevant or documents
+    yt = await _bounded(request_semaphore, generate_fused_answer, question, passages, chat_history)
+    return {
+        "documents": passages,
+        "IsRelevant": ["Yes" if relevant else "No"],
+        "ConsultationAnswers": [yt],
+    }
+
+
+async def _gated_candidate(request_semaphore: asyncio.Semaphore, question: str, d: Document, chat_history: str):
+    is_relevant = await _bounded(request_semaphore, judge_relevance, question, d)
+    if is_relevant != "Yes":
+        return is_relevant, None
+    return is_relevant, await _bounded(request_semaphore, generate_answer, question, d, chat_history)
+
+
+async def generator(state: State, config: RunnableConfig = None):
+    chat_history = state["chat_history"]
     question = state["question"]
     # Collect answers and relevance judgements as lists for LegalConsultState.
     result_isRelevant: list[str] = []
     result_yt: list[str] = []
 
     if state["Retrieve"] == "Yes":
-        # Predict x, d is relevant for each d in D
-        for d in state["documents"]:
-            judge_relevence_prompt = f"""
-            You are a helpful assistant. You are given a question and a text passage.
-            Determine whether the text passage provides useful information to solve the question.
-
-            User's Question: {question}
-            Text Passage: {d.page_content}
-            """
-            res: Response = await llm.with_structured_output(Response).ainvoke(judge_relevence_prompt)
-            result_isRelevant.append(res.IsRelevant)
-
-            # Predict yt given x, d and y<t for each d in D
-            predict_yt_prompt = f"""
-            You are a legal consultant. You are very knowledgeable in the marriage, law, criminal law, and money debt law.
-            You are given a question, a text passage and a chat history.
-            Think Deeply and Generate the answer to the question based on the text passage and chat history.
-
-            User's Question: {question}
-            Text Passage: {d.page_content}
-            Chat History: {messages}
-            Your Answer:
-            """
-            res: AIMessage = await reasoning_model.ainvoke(predict_yt_prompt)
-            result_yt.append(res.content)
+        documents = state["documents"]
+        max_concurrency = get_configurable(config, "generator_max_concurrency", GENERATOR_MAX_CONCURRENCY)
+        request_semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+
+        if generation_mode(config) == "fused" and documents:
+            return await _fused_candidate(request_semaphore, question, documents, chat_history)
+
+        if get_configurable(config, "relevance_gating", RELEVANCE_GATING):
+            # Judge every d first, then spend the reasoning model only on the relevant ones.
+            candidates = await asyncio.gather(
+                *[_gated_candidate(request_semaphore, question, d, chat_history) for d in documents]
+            )
+            survivors = [(d, rel, yt) for d, (rel, yt) in zip(documents, candidates) if yt is not None]
+            if not survivors and documents:
+                # Nothing passed: keep the top-ranked d so there is still one answer to return.
+                yt = await _bounded(request_semaphore, generate_answer, question, documents[0], chat_history)
+                survivors = [(documents[0], candidates[0][0], yt)]
+
+            return {
+                "documents": [d for d, _, _ in survivors],
+                "IsRelevant": [rel for _, rel, _ in survivors],
+                "ConsultationAnswers": [yt for _, _, yt in survivors],
+            }
+
+        # Predict x, d is relevant and yt given x, d and y<t for each d in D, all at once.
+        # gather() returns results in submission order, so both lists stay aligned with documents.
+        # The two calls of the same d are queued next to each other so they overlap even under a tight cap.
+        calls = []
+        for d in documents:
+            calls.append(_bounded(request_semaphore, judge_relevance, question, d))
+            calls.append(_bounded(request_semaphore, generate_answer, question, d, chat_history))
+        results = await asyncio.gather(*calls)
+        result_isRelevant = list(results[0::2])
+        result_yt = list(results[1::2])
 
         return {"IsRelevant": result_isRelevant, "ConsultationAnswers": result_yt}
     else:
@@ -66,4 +200,3 @@ async def generator(state: State):
         result_yt.append(res.content)
 
         return {"ConsultationAnswers": result_yt}
-
@@ -0,0 +1,89 @@
+'''
+Query Router
+LLM predicts Retrieve, LegalTopic and the retrieval Query given (x, y<t) in one structured call
+
+Used when routing_mode (ROUTING_MODE or configurable "routing_mode") is "combined"; it replaces
+semantic_router and the retriever's own topic/query call, so a retrieval turn makes one routing
+round-trip and sends the chat history once. "two_step" keeps semantic_router + retriever.
+
+With router_backend "local", a confident local decision (Retrieve, and LegalTopic when retrieving)
+on the first turn is used as is with the question as Query; otherwise, and on every turn with chat
+history, the LLM decides all three.
+'''
+import os
+from typing import Literal
+from pydantic import BaseModel, Field
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
+from legal_consult_agent.utils.state import LegalConsultState as State
+from legal_consult_agent.utils.topics import LegalTopicName, describe_topics
+from legal_consult_agent.utils.models import structured_llm
+from legal_consult_agent.utils.local_router import get_local_router, local_route
+from legal_consult_agent.utils.config import get_configurable
+
+
+class Response(BaseModel):
+    Retrieve: Literal["Yes", "No"] = Field(..., description="To Determine whether to retrieve from dataset or not")
+    LegalTopic: LegalTopicName = Field(
+        ..., description=f"The most relevant legal topic of the question, one of: {describe_topics()}"
+    )
+    Query: str = Field(..., description="User's legal consultation query from the question and chat history")
+
+
+router_llm = structured_llm(Response, node="query_router")
+
+ROUTING_MODE = os.getenv("ROUTING_MODE", "two_step")
+
+
+def routing_mode(config: RunnableConfig = None) -> str:
+    '''
+    "two_step" or "combined" for this request
+    '''
+    return get_configurable(config, "routing_mode", ROUTING_MODE)
+
+
+async def query_router(state: State, config: RunnableConfig = None):
+    '''
+    To determine whether to retrieve, and from which legal topic with which query
+    '''
+    question = state["question"]
+    chat_history = state["chat_history"]
+
+    decision = await local_route(question, chat_history, config)
+    if decision is not None:
+        local_router = get_local_router()
+        local_router.record("retrieve", decision.Retrieve is not None)
+        if decision.Retrieve == "Yes":
+            local_router.record("topic", decision.LegalTopic is not None)
+        if decision.Retrieve == "No":
+            return {"messages": [HumanMessage(content=question)], "Retrieve": "No"}
+        if decision.Retrieve == "Yes" and decision.LegalTopic is not None:
+            return {
+                "messages": [HumanMessage(content=question)],
+                "Retrieve": "Yes",
+                "LegalTopic": decision.LegalTopic,
+                "Query": question,
+            }
+
+    prompt = f"""
+    You are a semantic router for a legal consultation assistant. You are given a question and chat history.
+    1. Determine whether the question needs to be retrieved from the dataset or not.
+       If user is asking legal consultation, check whether chat history has enough information to answer the question.
+       If chat history has enough information, then set Retrieve to "No".
+       If chat history has insufficient information, then set Retrieve to "Yes".
+    2. Identify the most relevant legal topic from the question and chat history.
+    3. Find out user's legal consultation query from the question and chat history.
+
+    Chat History:
+    {chat_history}
+
+    User's Question: {question}
+    """
+    res: Response = await router_llm.ainvoke(prompt)
+
+    return {
+        "messages": [HumanMessage(content=question)],
+        "Retrieve": res.Retrieve,
+        "LegalTopic": res.LegalTopic,
+        "Query": res.Query,
+    }
@@ -4,13 +4,14 @@ If Retrieve == Yes then
 Rank yt based on IsRelevant, IsSupport, and IsUseful
 Return top 1 yt as final consultation answer
 
+A single candidate (the generator's "fused" generation_mode) is returned as is; its scores are only logged.
+
 else if Retrieve == No then
 Return yt as final consultation answer directly
 '''
 from pydantic import BaseModel, Field
 from langchain_core.messages import AIMessage
 from legal_consult_agent.utils.state import LegalConsultState as State
-from legal_consult_agent.utils.models import llm
 
 
 class Response(BaseModel):
@@ -116,6 +117,12 @@ async def reranker(state: State):
     result_isRelevant = state["IsRelevant"]
     result_isSupport = state["IsSupport"]
     result_isUseful = state["IsUseful"]
+
+    # 只有一個候選答案（融合生成）時不需排序
+    if len(consultation_answers) == 1:
+        score = calculate_score(result_isRelevant[0], (result_isSupport or [None])[0], result_isUseful[0])
+        print(f"單一候選答案，評分: {score:.2f}")
+        return {"messages": [AIMessage(content=consultation_answers[0])]}
     
     # 使用Zip bundle進行篩選與排序
     ranked_answers = filter_and_rank_answers(
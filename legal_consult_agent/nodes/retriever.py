@@ -2,41 +2,128 @@
 Retriever
 if Retrieve == Yes then
 Retrieve relevant text passages D using R given (x, yt-1)
+
+retrieval_mode (RETRIEVAL_MODE or configurable "retrieval_mode"):
+- "single": LLM picks one LegalTopic and only that collection is queried
+- "fusion": every collection is queried concurrently and results are fused into a global top-k;
+  with fusion_skip_classification the topic/query LLM call is skipped and the question is used as query
+
+hybrid_search fuses BM25 hits over the same topics with the vector hits (reciprocal-rank fusion).
+Vector and BM25 hits share one depth: configurable "retriever_k", else the topic's registry retriever_k
+("single") or RETRIEVER_K ("fusion").
+lexical_fast_path returns the BM25 hits alone, with no embedding call, when they are high-confidence.
+
+With routing_mode "combined", query_router has already chosen LegalTopic and Query, so no LLM call is made here.
+With router_backend "local", a confident local topic decision on the first turn also skips the LLM call and the
+question is used as query; follow-up turns keep the history-aware rewrite.
 '''
+import os
 from pydantic import BaseModel, Field
-from typing import Literal
-from legal_consult_agent.utils.tools import criminal_retriever, money_debt_retriever, marriage_retriever
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableConfig
+from legal_consult_agent.utils.tools import (
+    get_retriever,
+    get_lexical_index,
+    aretrieve,
+    afusion_search,
+    rrf_fuse,
+)
 from legal_consult_agent.utils.state import LegalConsultState as State
-from legal_consult_agent.utils.models import llm
+from legal_consult_agent.utils.topics import LegalTopicName, describe_topics, get_topic
+from legal_consult_agent.utils.models import structured_llm
+from legal_consult_agent.utils.config import env_bool, env_float, env_int, get_configurable
+from legal_consult_agent.utils.local_router import get_local_router, local_route
+from legal_consult_agent.nodes.query_router import routing_mode
 
 
 class Response(BaseModel):
-    LegalTopic: Literal["Criminal", "Marriage", "MoneyDebt"] = Field(..., description="The most relevant legal topic of the question")
+    LegalTopic: LegalTopicName = Field(
+        ..., description=f"The most relevant legal topic of the question, one of: {describe_topics()}"
+    )
     Query: str = Field(..., description="User's legal consultation query from the question and chat history")
 
-async def retriever(state: State):
+
+topic_llm = structured_llm(Response, node="retriever")
+
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "single")
+FUSION_METHOD = os.getenv("FUSION_METHOD", "score")
+FUSION_SKIP_CLASSIFICATION = env_bool("FUSION_SKIP_CLASSIFICATION", False)
+RETRIEVER_K = env_int("RETRIEVER_K", 4)
+HYBRID_SEARCH = env_bool("HYBRID_SEARCH", False)
+LEXICAL_FAST_PATH = env_bool("LEXICAL_FAST_PATH", False)
+LEXICAL_CONFIDENCE_MARGIN = env_float("LEXICAL_CONFIDENCE_MARGIN", 2.0)
+
+async def retriever(state: State, config: RunnableConfig = None):
     '''
     To retrieve information from the vector store
     '''
     question = state["question"]
-    messages = state["messages"]
+    chat_history = state["chat_history"]
+    mode = get_configurable(config, "retrieval_mode", RETRIEVAL_MODE)
+
+    if routing_mode(config) == "combined":
+        topics = None if mode == "fusion" else [state["LegalTopic"]]
+        documents = await _search(state["Query"], topics, config)
+        return _with_topic(documents, state["LegalTopic"])
+
+    if mode == "fusion" and get_configurable(config, "fusion_skip_classification", FUSION_SKIP_CLASSIFICATION):
+        documents = await _search(question, None, config)
+        return _with_topic(documents)
+
+    decision = await local_route(question, chat_history, config)
+    if decision is not None:
+        get_local_router().record("topic", decision.LegalTopic is not None)
+        if decision.LegalTopic is not None:
+            topics = None if mode == "fusion" else [decision.LegalTopic]
+            documents = await _search(question, topics, config)
+            return _with_topic(documents, decision.LegalTopic)
 
     prompt = f"""
     You are a helpful assistant. You are given a question and chat history.
     Identify the most relevant legal topic from the question and chat history.
     Then, find out user's legal consultation query from the question and chat history
     
-    Chat History: {messages}
+    Chat History:
+    {chat_history}
     
     User's Question: {question}
     """ 
-    res: Response = await llm.with_structured_output(Response).ainvoke(prompt)
-    
-    if res.LegalTopic == "Criminal":
-        documents = criminal_retriever.invoke(res.Query)
-    elif res.LegalTopic == "Marriage":
-        documents = marriage_retriever.invoke(res.Query)
-    elif res.LegalTopic == "MoneyDebt":
-        documents = money_debt_retriever.invoke(res.Query)
-
-    return {"documents": documents}
+    res: Response = await topic_llm.ainvoke(prompt)
+
+    topics = None if mode == "fusion" else [res.LegalTopic]
+    documents = await _search(res.Query, topics, config)
+    return _with_topic(documents, res.LegalTopic)
+
+async def _search(query: str, topics: list[str], config: RunnableConfig) -> list[Document]:
+    '''
+    topics=None searches every collection (fusion); otherwise only the given topic
+    '''
+    default_k = RETRIEVER_K if topics is None else get_topic(topics[0]).retriever_k
+    k = get_configurable(config, "retriever_k", default_k)
+    hybrid = get_configurable(config, "hybrid_search", HYBRID_SEARCH)
+    fast_path = get_configurable(config, "lexical_fast_path", LEXICAL_FAST_PATH)
+
+    lexical_hits = []
+    lexical_index = get_lexical_index()
+    if lexical_index is not None and (hybrid or fast_path):
+        lexical_hits = lexical_index.search(query, k, topics)
+        if fast_path and lexical_index.is_confident(query, lexical_hits, LEXICAL_CONFIDENCE_MARGIN):
+            return [doc for doc, _ in lexical_hits]
+
+    if topics is None:
+        hits = await afusion_search(query, k=k, method=get_configurable(config, "fusion_method", FUSION_METHOD))
+        documents = [doc for doc, _ in hits]
+    else:
+        documents = await aretrieve(get_retriever(topics[0], k), query)
+
+    if hybrid and lexical_hits:
+        documents = rrf_fuse([documents, [doc for doc, _ in lexical_hits]], k)
+    return documents
+
+def _with_topic(documents: list[Document], legal_topic: str = None):
+    result = {"documents": documents}
+    # Without the LLM's choice, the collection of the best hit stands in for LegalTopic.
+    topic = legal_topic or (documents[0].metadata.get("topic") if documents else None)
+    if topic:
+        result["LegalTopic"] = topic
+    return result
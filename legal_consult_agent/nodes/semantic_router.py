@@ -1,23 +1,38 @@
 '''
 LLM predicts Retrieve given (x, y<t)
+
+With ROUTER_BACKEND (or configurable "router_backend") set to "local", the embedding-based
+local router decides first-turn questions and the LLM is only called when its margin is below the
+threshold. Once there is chat history, whether it already answers the question is left to the LLM.
 '''
 from typing import Literal
 from pydantic import BaseModel, Field
 from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
 from legal_consult_agent.utils.state import LegalConsultState as State
-from legal_consult_agent.utils.models import llm
+from legal_consult_agent.utils.models import structured_llm
+from legal_consult_agent.utils.local_router import get_local_router, local_route
 
 
 class Response(BaseModel):
     Retrieve: Literal["Yes", "No"] = Field(..., description="To Determine whether to retrieve from dataset or not")
 
 
-async def semantic_router(state: State):
+router_llm = structured_llm(Response, node="semantic_router")
+
+
+async def semantic_router(state: State, config: RunnableConfig = None):
     '''
     To determine whether user input needs to retrieve from dataset or not
     '''
     question = state["question"]
-    messages = state["messages"]
+    chat_history = state["chat_history"]
+
+    decision = await local_route(question, chat_history, config)
+    if decision is not None:
+        get_local_router().record("retrieve", decision.Retrieve is not None)
+        if decision.Retrieve is not None:
+            return {"messages": [HumanMessage(content=question)], "Retrieve": decision.Retrieve}
 
     prompt = f"""
     You are a semantic router. You are given a question and chat history. You need to determine whether the question needs to be retrieved from the dataset or not.
@@ -25,11 +40,12 @@ async def semantic_router(state: State):
     1. If chat history has enough information, then set Retrieve to "No".
     2. If chat history has insufficient information, then you need to retrieve from the dataset and set Retrieve to "Yes".
 
-    Chat History: {messages}
+    Chat History:
+    {chat_history}
     
     User's Question: {question}
     """
-    res: Response = await llm.with_structured_output(Response).ainvoke(prompt)
+    res: Response = await router_llm.ainvoke(prompt)
 
     return {"messages": [HumanMessage(content=question)], "Retrieve": res.Retrieve}
     
@@ -1,12 +1,22 @@
-from .models import llm, reasoning_model
-from .embeddings import embeddings
-from .tools import criminal_retriever, money_debt_retriever, marriage_retriever
-
-__all__ = [
-    "llm",
-    "reasoning_model",
-    "embeddings",
-    "criminal_retriever",
-    "money_debt_retriever",
-    "marriage_retriever",
-]
\ No newline at end of file
+import importlib
+from .topics import TOPICS
+
+# Exports are resolved on first access, so importing a light module such as
+# utils.data_loader does not construct the LLM clients or open the vector stores.
+_EXPORTS = {
+    "llm": ".models",
+    "reasoning_model": ".models",
+    "embeddings": ".embeddings",
+    "get_retriever": ".tools",
+    "TOPICS": ".topics",
+}
+# Per-topic retrievers (criminal_retriever, ...) follow the registry, like the tools module attributes.
+_EXPORTS.update({f"{topic.alias}_retriever": ".tools" for topic in TOPICS})
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
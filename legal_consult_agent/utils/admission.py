@@ -0,0 +1,264 @@
+"""
+准入控制 - 行程內所有 LLM 呼叫共用的並行上限、請求優先權與速率限制退避
+
+- 全域 LLM 呼叫槽位（LLM_MAX_CONCURRENCY），槽位釋放時優先交給互動請求（/chat）而非批次請求
+- 供應商返回速率限制（HTTP 429）時，所有請求共用同一個帶隨機抖動的指數退避，避免同時重試
+- 以請求數計的准入上限，超過時由服務器返回 429 與 Retry-After
+"""
+
+import asyncio
+import math
+import random
+import time
+from collections import deque
+from typing import Any, Optional
+from langchain_core.runnables import Runnable, RunnableConfig, ensure_config
+from .config import env_float, env_int
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = (INTERACTIVE, BATCH)
+
+
+class PrioritySemaphore:
+    """
+    依優先權喚醒等待者的 asyncio 號誌：釋放槽位時先喚醒互動請求，沒有互動請求等待時才喚醒批次請求
+
+    Args:
+        value: 槽位數量
+    """
+
+    def __init__(self, value: int):
+        self.value = value
+        self._waiters: dict[str, deque[asyncio.Future]] = {priority: deque() for priority in PRIORITIES}
+
+    def waiting(self, priority: Optional[str] = None) -> int:
+        """返回等待中的呼叫數"""
+        if priority is not None:
+            return len(self._waiters[priority])
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    async def acquire(self, priority: str = INTERACTIVE):
+        if self.value > 0 and not self.waiting():
+            self.value -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 已被分配槽位後才取消，交給下一個等待者
+                self.release()
+            else:
+                # release() 可能已在取消後、此處恢復前彈出這個 future
+                try:
+                    self._waiters[priority].remove(future)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self):
+        for priority in PRIORITIES:
+            waiters = self._waiters[priority]
+            while waiters:
+                future = waiters.popleft()
+                if not future.done():
+                    # 槽位直接移交，不經過 value，避免新呼叫插隊
+                    future.set_result(None)
+                    return
+        self.value += 1
+
+
+class SharedBackoff:
+    """
+    所有請求共用的指數退避（full jitter）：任一呼叫遇到速率限制時，其他呼叫也會等待到同一時間點
+
+    Args:
+        base_delay: 第一次退避的最大秒數
+        max_delay: 退避秒數上限
+    """
+
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 30.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rate_limited = 0
+        self._failures = 0
+        self._until = 0.0
+
+    def remaining(self) -> float:
+        """返回距離退避結束的秒數"""
+        return max(0.0, self._until - time.monotonic())
+
+    async def wait(self):
+        while (delay := self.remaining()) > 0:
+            await asyncio.sleep(delay)
+
+    def penalize(self) -> float:
+        """記錄一次速率限制並延長共用的退避時間，返回本次退避秒數"""
+        self.rate_limited += 1
+        self._failures += 1
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (self._failures - 1)))
+        self._until = max(self._until, time.monotonic() + delay)
+        return delay
+
+    def reset(self):
+        self._failures = 0
+
+
+# openai is imported only once an LLM call has failed, keeping it off the import path.
+def _is_rate_limited(error: Exception) -> bool:
+    import openai
+
+    return isinstance(error, openai.RateLimitError)
+
+
+def _is_transient(error: Exception) -> bool:
+    import openai
+
+    return isinstance(error, (openai.APIConnectionError, openai.InternalServerError))
+
+
+class AdmissionController:
+    """
+    LLM 呼叫槽位、共用退避與請求准入計數
+
+    Args:
+        llm_max_concurrency: 行程內同時進行的 LLM 呼叫上限
+        max_interactive: 同時處理的互動請求上限
+        max_batch: 同時排隊或處理中的批次問題上限
+        retry_after: 拒絕請求時建議的最短重試秒數
+        max_retries: LLM 呼叫遇到速率限制或暫時性錯誤時的重試次數
+        backoff: 共用的退避狀態
+    """
+
+    def __init__(
+        self,
+        llm_max_concurrency: int = 32,
+        max_interactive: int = 64,
+        max_batch: int = 200,
+        retry_after: int = 5,
+        max_retries: int = 4,
+        backoff: Optional[SharedBackoff] = None,
+    ):
+        self.slots = PrioritySemaphore(llm_max_concurrency)
+        self.limits = {INTERACTIVE: max_interactive, BATCH: max_batch}
+        self.active = {INTERACTIVE: 0, BATCH: 0}
+        self.rejected = {INTERACTIVE: 0, BATCH: 0}
+        self.retry_after = retry_after
+        self.max_retries = max_retries
+        self.backoff = backoff or SharedBackoff()
+
+    def try_admit(self, priority: str, count: int = 1) -> bool:
+        """
+        嘗試准入請求
+
+        Args:
+            priority: INTERACTIVE 或 BATCH
+            count: 請求包含的問題數
+
+        Returns:
+            bool: 是否准入，准入後需呼叫 release
+        """
+        if self.active[priority] + count > self.limits[priority]:
+            self.rejected[priority] += 1
+            return False
+        self.active[priority] += count
+        return True
+
+    def release(self, priority: str, count: int = 1):
+        self.active[priority] -= count
+
+    def retry_after_seconds(self) -> int:
+        """建議客戶端的重試秒數，供應商速率限制退避中時取較長者"""
+        return max(self.retry_after, math.ceil(self.backoff.remaining()))
+
+    async def call(self, runnable: Runnable, input: Any, config: Optional[RunnableConfig], **kwargs: Any) -> Any:
+        """
+        取得 LLM 呼叫槽位後呼叫 runnable，遇到速率限制時以共用退避重試
+
+        Args:
+            runnable: 被包裝的 LLM runnable
+            input: runnable 的輸入
+            config: RunnableConfig，configurable["priority"] 決定取得槽位的優先權
+
+        Returns:
+            Any: runnable 的輸出
+        """
+        priority = ensure_config(config).get("configurable", {}).get("priority", INTERACTIVE)
+        for attempt in range(self.max_retries + 1):
+            await self.backoff.wait()
+            await self.slots.acquire(priority)
+            try:
+                output = await runnable.ainvoke(input, config, **kwargs)
+            except Exception as e:
+                if attempt == self.max_retries or not (_is_rate_limited(e) or _is_transient(e)):
+                    raise
+                if _is_rate_limited(e):
+                    self.backoff.penalize()
+                    continue
+                # 暫時性錯誤只影響本次呼叫，不延長共用退避
+                delay = random.uniform(0, min(self.backoff.max_delay, self.backoff.base_delay * 2 ** attempt))
+            else:
+                self.backoff.reset()
+                return output
+            finally:
+                self.slots.release()
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        """
+        獲取准入控制統計
+
+        Returns:
+            dict: 處理中的請求數、拒絕次數、LLM 槽位使用與速率限制次數
+        """
+        return {
+            "active": dict(self.active),
+            "limits": dict(self.limits),
+            "rejected": dict(self.rejected),
+            "llm_slots_available": self.slots.value,
+            "llm_waiting": {priority: self.slots.waiting(priority) for priority in PRIORITIES},
+            "rate_limited": self.backoff.rate_limited,
+            "backoff_remaining": round(self.backoff.remaining(), 2),
+        }
+
+
+class AdmittedRunnable(Runnable):
+    """
+    包裝 LLM runnable，所有非同步呼叫都經過 AdmissionController 的槽位與共用退避
+
+    Args:
+        runnable: 被包裝的 runnable（結構化輸出或聊天模型）
+        controller: 共用的 AdmissionController
+    """
+
+    def __init__(self, runnable: Runnable, controller: AdmissionController):
+        self.runnable = runnable
+        self.controller = controller
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return self.runnable.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return await self.controller.call(self.runnable, input, config, **kwargs)
+
+
+def create_admission_controller() -> AdmissionController:
+    '''
+    依環境變數建立准入控制
+    '''
+    return AdmissionController(
+        llm_max_concurrency=env_int("LLM_MAX_CONCURRENCY", 32),
+        max_interactive=env_int("CHAT_MAX_INFLIGHT", 64),
+        max_batch=env_int("BATCH_MAX_PENDING", 200),
+        retry_after=env_int("ADMISSION_RETRY_AFTER", 5),
+        max_retries=env_int("LLM_MAX_RETRIES", 4),
+        backoff=SharedBackoff(
+            base_delay=env_float("LLM_BACKOFF_BASE_SECONDS", 1.0),
+            max_delay=env_float("LLM_BACKOFF_MAX_SECONDS", 30.0),
+        ),
+    )
+
+
+admission = create_admission_controller()
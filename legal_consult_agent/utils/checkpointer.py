@@ -0,0 +1,729 @@
+"""
+對話狀態檢查點 - 可選擇記憶體或本地 SQLite 後端，並限制保存的對話數量與大小
+
+兩種後端都支援：
+- 對話閒置超過 TTL 後淘汰
+- 對話數量超過上限時淘汰最久未使用的對話
+- 序列化後總大小超過上限時淘汰最久未使用的對話
+- 壓縮模式：每個對話只保留最新的檢查點（搭配 compactor 節點清除已完成輪次的文件與候選答案）
+
+通道值依版本分開儲存，未變更的通道不會在每個步驟重複寫入；
+get_channel 只反序列化單一通道（例如 messages），不需載入文件與候選答案。
+"""
+
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any, Optional
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from .config import env_bool, env_int
+
+CHECKPOINTER = os.getenv("CHECKPOINTER", "memory")
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", "./vectorDB/checkpoints.sqlite3")
+CHECKPOINT_COMPACTION = env_bool("CHECKPOINT_COMPACTION", False)
+
+
+class _ThreadBudget:
+    """
+    淘汰規則的共用設定
+
+    Args:
+        ttl_seconds: 對話閒置多久後淘汰，0 表示不限制
+        max_threads: 保存的對話數量上限，0 表示不限制
+        max_bytes: 序列化後總大小上限（位元組），0 表示不限制
+        keep_latest_only: 是否每個對話只保留最新的檢查點
+    """
+
+    def __init__(self, ttl_seconds: int = 0, max_threads: int = 0, max_bytes: int = 0, keep_latest_only: bool = False):
+        self.ttl_seconds = ttl_seconds
+        self.max_threads = max_threads
+        self.max_bytes = max_bytes
+        self.keep_latest_only = keep_latest_only
+        self.evictions = 0
+
+    def _select_victims(self, threads: list[tuple[str, float, int]], current: str) -> list[str]:
+        """
+        依 TTL、數量與大小上限選出要淘汰的對話
+
+        Args:
+            threads: (thread_id, 最後存取時間, 大小) 列表，依最後存取時間由新到舊排序
+            current: 正在寫入的對話，不會被淘汰
+
+        Returns:
+            list[str]: 要淘汰的 thread_id
+        """
+        expire_before = time.time() - self.ttl_seconds if self.ttl_seconds > 0 else None
+        victims = []
+        kept = 0
+        total = 0
+        for thread_id, last_access, size in threads:
+            if thread_id != current:
+                if (
+                    (expire_before is not None and last_access < expire_before)
+                    or (self.max_threads > 0 and kept >= self.max_threads)
+                    or (self.max_bytes > 0 and total + size > self.max_bytes)
+                ):
+                    victims.append(thread_id)
+                    continue
+            kept += 1
+            total += size
+        return victims
+
+
+class BoundedMemorySaver(_ThreadBudget, InMemorySaver):
+    """
+    有淘汰機制的記憶體檢查點，介面與 MemorySaver 相同
+
+    每個對話的大小以序列化後的檢查點、通道值與待寫入資料的位元組數計算。
+    """
+
+    def __init__(self, ttl_seconds: int = 0, max_threads: int = 0, max_bytes: int = 0, keep_latest_only: bool = False):
+        InMemorySaver.__init__(self)
+        _ThreadBudget.__init__(self, ttl_seconds, max_threads, max_bytes, keep_latest_only)
+        # thread_id -> 最後存取時間，依存取順序排列（最舊在前）
+        self._access: OrderedDict[str, float] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        # 每個對話擁有的 blob 與 writes 鍵，淘汰時不需要掃描全部資料
+        self._blob_keys: dict[str, set] = {}
+        self._write_keys: dict[str, set] = {}
+
+    def _touch(self, thread_id: str):
+        self._access[thread_id] = time.time()
+        self._access.move_to_end(thread_id)
+
+    def _writes_size(self, key: tuple) -> int:
+        return sum(len(value[2][1]) for value in self.writes.get(key, {}).values())
+
+    def _prune(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str, versions: ChannelVersions):
+        """移除同一對話中較舊的檢查點、不再被引用的通道值與待寫入資料"""
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        for old_id in [cid for cid in checkpoints if cid != checkpoint_id]:
+            checkpoint, metadata, _ = checkpoints.pop(old_id)
+            self._sizes[thread_id] -= len(checkpoint[1]) + len(metadata[1])
+        keep = {(thread_id, checkpoint_ns, k, v) for k, v in versions.items()}
+        for key in [k for k in self._blob_keys[thread_id] if k[1] == checkpoint_ns and k not in keep]:
+            self._sizes[thread_id] -= len(self.blobs.pop(key)[1])
+            self._blob_keys[thread_id].discard(key)
+        for key in [k for k in self._write_keys[thread_id] if k[1] == checkpoint_ns and k[2] != checkpoint_id]:
+            self._sizes[thread_id] -= self._writes_size(key)
+            self.writes.pop(key, None)
+            self._write_keys[thread_id].discard(key)
+
+    def _evict(self, current: str):
+        if not (self.ttl_seconds or self.max_threads or self.max_bytes):
+            return
+        threads = [(tid, self._access[tid], self._sizes.get(tid, 0)) for tid in reversed(self._access)]
+        for thread_id in self._select_victims(threads, current):
+            self.delete_thread(thread_id)
+            self.evictions += 1
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        if thread_id not in self._access:
+            return None
+        self._touch(thread_id)
+        return super().get_tuple(config)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        if config and config["configurable"]["thread_id"] not in self._access:
+            return
+        yield from super().list(config, filter=filter, before=before, limit=limit)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        blob_keys = self._blob_keys.setdefault(thread_id, set())
+        self._write_keys.setdefault(thread_id, set())
+        self._sizes.setdefault(thread_id, 0)
+
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+
+        saved_checkpoint, saved_metadata, _ = self.storage[thread_id][checkpoint_ns][checkpoint["id"]]
+        size = len(saved_checkpoint[1]) + len(saved_metadata[1])
+        for k, v in new_versions.items():
+            key = (thread_id, checkpoint_ns, k, v)
+            if key not in blob_keys:
+                blob_keys.add(key)
+                size += len(self.blobs[key][1])
+        self._sizes[thread_id] += size
+
+        if self.keep_latest_only:
+            self._prune(thread_id, checkpoint_ns, checkpoint["id"], checkpoint["channel_versions"])
+        self._touch(thread_id)
+        self._evict(thread_id)
+        return next_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        if thread_id not in self._access:
+            # 對話已被淘汰，不再保存其待寫入資料
+            return
+        key = (thread_id, config["configurable"].get("checkpoint_ns", ""), config["configurable"]["checkpoint_id"])
+        before = self._writes_size(key)
+        super().put_writes(config, writes, task_id, task_path)
+        self._write_keys[thread_id].add(key)
+        self._sizes[thread_id] += self._writes_size(key) - before
+
+    def get_channel(self, config: RunnableConfig, channel: str) -> Any:
+        """
+        只讀取最新檢查點中的單一通道值
+
+        Args:
+            config: 包含 thread_id 的設定
+            channel: 通道名稱（例如 "messages"）
+
+        Returns:
+            Any: 通道值，對話或通道不存在時返回 None
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        if thread_id not in self._access or not (checkpoints := self.storage[thread_id].get(checkpoint_ns)):
+            return None
+        self._touch(thread_id)
+        checkpoint = self.serde.loads_typed(checkpoints[max(checkpoints)][0])
+        version = checkpoint["channel_versions"].get(channel)
+        blob = self.blobs.get((thread_id, checkpoint_ns, channel, version))
+        if blob is None or blob[0] == "empty":
+            return None
+        return self.serde.loads_typed(blob)
+
+    async def aget_channel(self, config: RunnableConfig, channel: str) -> Any:
+        return self.get_channel(config, channel)
+
+    def thread_ids(self) -> Sequence[str]:
+        """返回所有保存中的 thread_id，依最後存取時間由新到舊排序"""
+        return list(reversed(self._access))
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.storage.pop(thread_id, None)
+        for key in self._blob_keys.pop(thread_id, ()):
+            self.blobs.pop(key, None)
+        for key in self._write_keys.pop(thread_id, ()):
+            self.writes.pop(key, None)
+        self._access.pop(thread_id, None)
+        self._sizes.pop(thread_id, None)
+
+    def stats(self) -> dict:
+        """
+        獲取檢查點使用統計
+
+        Returns:
+            dict: 後端名稱、對話數、總大小與淘汰次數
+        """
+        return {
+            "backend": "memory",
+            "threads": len(self._access),
+            "bytes": sum(self._sizes.values()),
+            "evictions": self.evictions,
+        }
+
+
+class SqliteCheckpointSaver(_ThreadBudget, BaseCheckpointSaver[str]):
+    """
+    以本地 SQLite 檔案保存的檢查點，重啟後仍可延續對話，多個 worker 可共用同一檔案
+
+    Args:
+        db_path: SQLite 檔案路徑
+        其餘參數同 _ThreadBudget
+
+    每個對話的大小在寫入與刪除時增量維護；讀取時的存取時間先記在記憶體，累積一批、超過一段時間
+    或下一次寫入時才寫回。
+    """
+
+    # 存取時間累積的對話數或秒數達到其一時寫回
+    TOUCH_BATCH = 256
+    TOUCH_FLUSH_SECONDS = 30.0
+
+    def __init__(
+        self,
+        db_path: str,
+        ttl_seconds: int = 0,
+        max_threads: int = 0,
+        max_bytes: int = 0,
+        keep_latest_only: bool = False,
+    ):
+        BaseCheckpointSaver.__init__(self)
+        _ThreadBudget.__init__(self, ttl_seconds, max_threads, max_bytes, keep_latest_only)
+        self._lock = threading.Lock()
+        # thread_id -> 尚未寫回的最後存取時間
+        self._touched: dict[str, float] = {}
+        self._last_flush = time.time()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        # WAL 模式讓多個 worker 行程可同時讀取
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                type TEXT,
+                checkpoint BLOB,
+                metadata_type TEXT,
+                metadata BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                type TEXT NOT NULL,
+                blob BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                type TEXT,
+                value BLOB,
+                task_path TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+            CREATE TABLE IF NOT EXISTS threads (
+                thread_id TEXT PRIMARY KEY,
+                last_access REAL NOT NULL,
+                size_bytes INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_threads_access ON threads(last_access);
+            """
+        )
+        self._conn.commit()
+
+    def _flush_touches(self):
+        """將累積的存取時間寫回（呼叫端持有鎖並負責提交）"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE threads SET last_access = MAX(last_access, ?) WHERE thread_id = ?",
+                [(access, thread_id) for thread_id, access in self._touched.items()],
+            )
+            self._touched.clear()
+        self._last_flush = time.time()
+
+    def _add_size(self, thread_id: str, delta: int):
+        """更新對話的最後存取時間並增減其大小（不存在時建立）"""
+        self._conn.execute(
+            "INSERT INTO threads (thread_id, last_access, size_bytes) VALUES (?, ?, ?) "
+            "ON CONFLICT(thread_id) DO UPDATE SET last_access = excluded.last_access, "
+            "size_bytes = size_bytes + excluded.size_bytes",
+            (thread_id, time.time(), delta),
+        )
+
+    def _delete(self, thread_id: str):
+        for table in ("checkpoints", "blobs", "writes", "threads"):
+            self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+        self._touched.pop(thread_id, None)
+
+    def _evict(self, current: str):
+        if not (self.ttl_seconds or self.max_threads or self.max_bytes):
+            return
+        # 淘汰前寫回存取時間，以免淘汰到最近才讀取的對話
+        self._flush_touches()
+        threads = self._conn.execute(
+            "SELECT thread_id, last_access, size_bytes FROM threads ORDER BY last_access DESC"
+        ).fetchall()
+        for thread_id in self._select_victims(threads, current):
+            self._delete(thread_id)
+            self.evictions += 1
+
+    def _load_blob(self, thread_id: str, checkpoint_ns: str, channel: str, version: Any) -> tuple[bool, Any]:
+        """返回 (是否有值, 通道值)"""
+        row = self._conn.execute(
+            "SELECT type, blob FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+            (thread_id, checkpoint_ns, channel, str(version)),
+        ).fetchone()
+        if row is None or row[0] == "empty":
+            return False, None
+        return True, self.serde.loads_typed((row[0], row[1]))
+
+    def _row_to_tuple(self, thread_id: str, checkpoint_ns: str, row: tuple) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint, metadata_type, metadata = row
+        checkpoint_: Checkpoint = self.serde.loads_typed((type_, checkpoint))
+        channel_values = {}
+        for channel, version in checkpoint_["channel_versions"].items():
+            found, value = self._load_blob(thread_id, checkpoint_ns, channel, version)
+            if found:
+                channel_values[channel] = value
+        writes = self._conn.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={**checkpoint_, "channel_values": channel_values},
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((value_type, value)))
+                for task_id, channel, value_type, value in writes
+            ],
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+            "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params: list[Any] = [thread_id, checkpoint_ns]
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            self._touched[thread_id] = now
+            if len(self._touched) >= self.TOUCH_BATCH or now - self._last_flush >= self.TOUCH_FLUSH_SECONDS:
+                self._flush_touches()
+                self._conn.commit()
+            return self._row_to_tuple(thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+            "FROM checkpoints"
+        )
+        clauses: list[str] = []
+        params: list[Any] = []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+            results = []
+            for thread_id, checkpoint_ns, *row in rows:
+                item = self._row_to_tuple(thread_id, checkpoint_ns, tuple(row))
+                if filter and not all(item.metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                results.append(item)
+                if limit is not None and len(results) >= limit:
+                    break
+        yield from results
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        c = checkpoint.copy()
+        values: dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+        # 只寫入本步驟有新版本的通道
+        blobs = [
+            (thread_id, checkpoint_ns, k, str(v), *(self.serde.dumps_typed(values[k]) if k in values else ("empty", None)))
+            for k, v in new_versions.items()
+        ]
+        type_, serialized_checkpoint = self.serde.dumps_typed(c)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._lock:
+            # 大小只加減本次寫入與刪除的位元組數，不重新加總整個對話
+            delta = 0
+            for blob in blobs:
+                # 同一通道版本的值不會改變，已存在時不重複寫入
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO blobs (thread_id, checkpoint_ns, channel, version, type, blob) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    blob,
+                )
+                if cursor.rowcount:
+                    delta += len(blob[5] or b"")
+            previous = self._conn.execute(
+                "SELECT COALESCE(LENGTH(checkpoint), 0) + COALESCE(LENGTH(metadata), 0) FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint["id"]),
+            ).fetchone()
+            delta += len(serialized_checkpoint) + len(serialized_metadata) - (previous[0] if previous else 0)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints "
+                "(thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    type_,
+                    serialized_checkpoint,
+                    metadata_type,
+                    serialized_metadata,
+                ),
+            )
+            if self.keep_latest_only:
+                for table, length in (
+                    ("checkpoints", "COALESCE(LENGTH(checkpoint), 0) + COALESCE(LENGTH(metadata), 0)"),
+                    ("writes", "COALESCE(LENGTH(value), 0)"),
+                ):
+                    where = f"FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id != ?"
+                    params = (thread_id, checkpoint_ns, checkpoint["id"])
+                    delta -= self._conn.execute(f"SELECT COALESCE(SUM({length}), 0) {where}", params).fetchone()[0]
+                    self._conn.execute(f"DELETE {where}", params)
+                keep = {(k, str(v)) for k, v in checkpoint["channel_versions"].items()}
+                stale = []
+                for channel, version, size in self._conn.execute(
+                    "SELECT channel, version, COALESCE(LENGTH(blob), 0) FROM blobs WHERE thread_id = ? AND checkpoint_ns = ?",
+                    (thread_id, checkpoint_ns),
+                ).fetchall():
+                    if (channel, version) not in keep:
+                        stale.append((thread_id, checkpoint_ns, channel, version))
+                        delta -= size
+                self._conn.executemany(
+                    "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?", stale
+                )
+            self._add_size(thread_id, delta)
+            self._evict(thread_id)
+            self._conn.commit()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # 特殊通道（錯誤、中斷等）以固定索引覆寫，一般通道已存在時不重複寫入
+        verb = "INSERT OR REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, serialized = self.serde.dumps_typed(value)
+            rows.append(
+                (thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx), channel, type_, serialized, task_path)
+            )
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM threads WHERE thread_id = ?", (thread_id,)).fetchone() is None:
+                # 對話已被淘汰，不再保存其待寫入資料
+                return
+            delta = 0
+            for row in rows:
+                previous = self._conn.execute(
+                    "SELECT COALESCE(LENGTH(value), 0) FROM writes "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? AND task_id = ? AND idx = ?",
+                    row[:5],
+                ).fetchone()
+                if previous is not None and verb == "INSERT OR IGNORE":
+                    continue
+                self._conn.execute(
+                    f"{verb} INTO writes "
+                    "(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value, task_path) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row,
+                )
+                delta += len(row[7] or b"") - (previous[0] if previous else 0)
+            self._conn.execute("UPDATE threads SET size_bytes = size_bytes + ? WHERE thread_id = ?", (delta, thread_id))
+            self._conn.commit()
+
+    def get_channel(self, config: RunnableConfig, channel: str) -> Any:
+        """
+        只讀取最新檢查點中的單一通道值
+
+        Args:
+            config: 包含 thread_id 的設定
+            channel: 通道名稱（例如 "messages"）
+
+        Returns:
+            Any: 通道值，對話或通道不存在時返回 None
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+            if row is None:
+                return None
+            version = self.serde.loads_typed(row)["channel_versions"].get(channel)
+            if version is None:
+                return None
+            return self._load_blob(thread_id, checkpoint_ns, channel, version)[1]
+
+    async def aget_channel(self, config: RunnableConfig, channel: str) -> Any:
+        return await asyncio.to_thread(self.get_channel, config, channel)
+
+    def thread_ids(self) -> Sequence[str]:
+        """返回所有保存中的 thread_id，依最後存取時間由新到舊排序"""
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+            return [row[0] for row in self._conn.execute("SELECT thread_id FROM threads ORDER BY last_access DESC")]
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._delete(thread_id)
+            self._conn.commit()
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def stats(self) -> dict:
+        """
+        獲取檢查點使用統計
+
+        Returns:
+            dict: 後端名稱、對話數、總大小與淘汰次數
+        """
+        with self._lock:
+            threads, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM threads").fetchone()
+        return {"backend": "sqlite", "threads": threads, "bytes": size, "evictions": self.evictions}
+
+    def close(self):
+        """關閉資料庫連線（服務器關閉時呼叫）"""
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+            self._conn.close()
+
+
+def create_checkpointer() -> BaseCheckpointSaver:
+    '''
+    依環境變數建立檢查點後端（CHECKPOINTER=memory 或 sqlite）
+    '''
+    budget = {
+        "ttl_seconds": env_int("CHECKPOINT_THREAD_TTL_SECONDS", 0),
+        "max_threads": env_int("CHECKPOINT_MAX_THREADS", 0),
+        "max_bytes": env_int("CHECKPOINT_MAX_BYTES", 0),
+        "keep_latest_only": CHECKPOINT_COMPACTION,
+    }
+    if CHECKPOINTER == "sqlite":
+        return SqliteCheckpointSaver(CHECKPOINT_PATH, **budget)
+    if CHECKPOINTER != "memory":
+        print(f"未知的檢查點後端: {CHECKPOINTER}，使用記憶體後端")
+    return BoundedMemorySaver(**budget)
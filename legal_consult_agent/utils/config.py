@@ -0,0 +1,87 @@
+"""
+執行期設定 - 統一讀取環境變數與每個請求的 configurable 參數
+"""
+
+import os
+from typing import Any, Optional
+from dotenv import load_dotenv
+from langchain_core.runnables import RunnableConfig
+
+load_dotenv()
+
+
+def env_int(name: str, default: int) -> int:
+    """
+    讀取整數型環境變數
+
+    Args:
+        name: 環境變數名稱
+        default: 未設定或格式錯誤時的預設值
+
+    Returns:
+        int: 環境變數值
+    """
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"環境變數 {name} 不是有效的整數: {value}，使用預設值 {default}")
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    """
+    讀取浮點數型環境變數
+
+    Args:
+        name: 環境變數名稱
+        default: 未設定或格式錯誤時的預設值
+
+    Returns:
+        float: 環境變數值
+    """
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        print(f"環境變數 {name} 不是有效的數字: {value}，使用預設值 {default}")
+        return default
+
+
+def env_bool(name: str, default: bool) -> bool:
+    """
+    讀取布林型環境變數（接受 1/true/yes/on）
+
+    Args:
+        name: 環境變數名稱
+        default: 未設定時的預設值
+
+    Returns:
+        bool: 環境變數值
+    """
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_configurable(config: Optional[RunnableConfig], key: str, default: Any = None) -> Any:
+    """
+    從 LangGraph 的 RunnableConfig 讀取單一請求的設定值
+
+    Args:
+        config: 節點收到的 RunnableConfig
+        key: configurable 中的鍵
+        default: 未提供時的預設值
+
+    Returns:
+        Any: 設定值
+    """
+    if not config:
+        return default
+    value = config.get("configurable", {}).get(key)
+    return default if value is None else value
@@ -2,16 +2,30 @@
 資料載入器 - 讀取JSON資料並寫入Vector Store
 """
 
+import asyncio
 import json
 import os
 import hashlib
-from typing import Any
+import sqlite3
+import time
+from typing import Any, Iterator, Optional
 from langchain_core.documents import Document
+from .config import env_int
+from .history import estimate_tokens
+from .lexical_index import build_index, save_index, load_index
+from .topics import TOPICS
+
+# 每次嵌入API呼叫的資料筆數，以及所有collection共用的同時進行中批次數
+INGEST_BATCH_SIZE = env_int("INGEST_BATCH_SIZE", 64)
+INGEST_MAX_CONCURRENCY = env_int("INGEST_MAX_CONCURRENCY", 4)
 
 # 延遲導入以避免循環依賴和環境變數問題
 def get_vector_stores():
-    from .tools import criminal_vector_store, money_debt_vector_store, marriage_vector_store
-    return criminal_vector_store, money_debt_vector_store, marriage_vector_store
+    """
+    返回 領域名稱 -> vector store（所有collection共用同一個Chroma客戶端）
+    """
+    from .tools import get_topic_vector_stores
+    return get_topic_vector_stores()
 
 def get_embeddings():
     from .embeddings import embeddings
@@ -28,9 +42,11 @@ def calculate_file_hash(file_path: str) -> str:
         str: MD5雜湊值
     """
     try:
+        md5 = hashlib.md5()
         with open(file_path, 'rb') as f:
-            content = f.read()
-        return hashlib.md5(content).hexdigest()
+            for block in iter(lambda: f.read(1 << 20), b""):
+                md5.update(block)
+        return md5.hexdigest()
     except FileNotFoundError:
         return ""
 
@@ -45,9 +61,8 @@ def get_collection_count(vector_store) -> int:
         int: 文件數量
     """
     try:
-        # 嘗試獲取collection中的所有文件
-        results = vector_store.similarity_search("", k=1000)  # 使用空查詢獲取所有文件
-        return len(results)
+        # collection 原生的計數，不需要嵌入查詢也不載入文件
+        return vector_store._collection.count()
     except Exception:
         return 0
 
@@ -78,6 +93,18 @@ def save_data_hash(file_path: str, hash_value: str):
     except Exception as e:
         print(f"無法儲存雜湊值: {e}")
 
+def clear_data_hash(file_path: str):
+    """
+    刪除檔案雜湊值（載入完成的標記），載入中斷時下次執行不會誤判為已完成
+
+    Args:
+        file_path: 原始檔案路徑
+    """
+    try:
+        os.remove(file_path + ".hash")
+    except FileNotFoundError:
+        pass
+
 def load_data_hash(file_path: str) -> str:
     """
     從本地檔案載入雜湊值
@@ -98,7 +125,87 @@ def load_data_hash(file_path: str) -> str:
         print(f"無法載入雜湊值: {e}")
         return ""
 
-def should_reload_data(file_path: str, vector_store, force_reload: bool = False) -> bool:
+def calculate_record_hash(document: Document) -> str:
+    """
+    計算單筆資料寫入vector store的內容（page_content與metadata）的MD5雜湊值
+
+    Args:
+        document: Document物件
+
+    Returns:
+        str: MD5雜湊值
+    """
+    payload = json.dumps(
+        {"page_content": document.page_content, "metadata": document.metadata},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+def read_manifest(file_path: str) -> tuple[dict[str, Any], str]:
+    """
+    讀取資料清單檔案
+
+    Args:
+        file_path: 原始檔案路徑
+
+    Returns:
+        tuple[dict, str]: (清單內容, 清單檔案的MD5雜湊值)，清單不存在時返回 ({}, "")
+    """
+    manifest_file = file_path + ".manifest.json"
+    try:
+        with open(manifest_file, 'rb') as f:
+            content = f.read()
+        return json.loads(content), hashlib.md5(content).hexdigest()
+    except FileNotFoundError:
+        return {}, ""
+    except Exception as e:
+        print(f"無法載入資料清單: {e}")
+        return {}, ""
+
+def load_manifest(file_path: str) -> dict[str, str]:
+    """
+    載入上次寫入的每筆資料雜湊值清單
+
+    Args:
+        file_path: 原始檔案路徑
+
+    Returns:
+        dict[str, str]: 資料id對應雜湊值，清單不存在時返回空字典
+    """
+    return read_manifest(file_path)[0].get("records", {})
+
+def get_file_signature(file_path: str) -> dict[str, int]:
+    """
+    檔案大小與修改時間，不需讀取檔案內容即可判斷檔案是否可能已更改
+    """
+    try:
+        stat = os.stat(file_path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    except FileNotFoundError:
+        return {}
+
+def save_manifest(file_path: str, records: dict[str, str], **info: Any):
+    """
+    儲存每筆資料的雜湊值清單
+
+    Args:
+        file_path: 原始檔案路徑
+        records: 資料id對應雜湊值
+        **info: 一併保存的資訊，例如 source（同步時的檔案大小與修改時間）
+    """
+    manifest_file = file_path + ".manifest.json"
+    try:
+        # 載入過程中會在每個批次寫入後更新，先寫暫存檔再替換，中斷時不會留下損壞的清單
+        with open(manifest_file + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump({"records": records, **info}, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(manifest_file + ".tmp", manifest_file)
+    except Exception as e:
+        print(f"無法儲存資料清單: {e}")
+
+def should_reload_data(
+    file_path: str, vector_store, force_reload: bool = False, current_hash: Optional[str] = None
+) -> bool:
     """
     判斷是否需要重新載入資料
     
@@ -106,6 +213,7 @@ def should_reload_data(file_path: str, vector_store, force_reload: bool = False)
         file_path: JSON檔案路徑
         vector_store: ChromaDB vector store
         force_reload: 是否強制重新載入
+        current_hash: 已計算的檔案雜湊值，未提供時重新計算
         
     Returns:
         bool: 是否需要重新載入
@@ -118,9 +226,14 @@ def should_reload_data(file_path: str, vector_store, force_reload: bool = False)
     if is_collection_empty(vector_store):
         print(f"  Collection為空，需要載入資料")
         return True
+
+    if not load_manifest(file_path):
+        print("  尚無資料清單，需要比對每筆資料")
+        return True
     
     # 檢查檔案是否已更改
-    current_hash = calculate_file_hash(file_path)
+    if current_hash is None:
+        current_hash = calculate_file_hash(file_path)
     stored_hash = load_data_hash(file_path)
     
     if current_hash != stored_hash:
@@ -152,6 +265,47 @@ def load_json_data(file_path: str) -> list[dict[str, Any]]:
         print(f"JSON解析錯誤: {e}")
         return []
 
+def iter_json_records(file_path: str, chunk_size: int = 1 << 16) -> Iterator[dict[str, Any]]:
+    """
+    逐筆讀取頂層為陣列的JSON檔案，每次只讀入 chunk_size 個字元，不把整個檔案載入記憶體
+
+    Args:
+        file_path: JSON檔案路徑
+        chunk_size: 每次讀取的字元數
+
+    Returns:
+        Iterator[dict]: 依檔案順序產生的每筆資料
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
+            raise json.JSONDecodeError("頂層必須是JSON陣列", buffer, 0)
+        buffer = buffer[1:]
+        while True:
+            buffer = buffer.lstrip()
+            if buffer.startswith(','):
+                buffer = buffer[1:].lstrip()
+            if buffer.startswith(']'):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                # 資料跨越讀取邊界，讀入下一段後重試
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise
+                buffer += chunk
+                continue
+            yield item
+            buffer = buffer[end:]
+
+def record_id(item: dict[str, Any], content: str) -> str:
+    """
+    資料在vector store中的id：優先使用資料本身的id，沒有id時以內容雜湊值代替
+    """
+    return str(item.get('id') or hashlib.md5(content.encode("utf-8")).hexdigest())
+
 def create_documents_from_data(data: list[dict[str, Any]]) -> list[Document]:
     """
     將JSON資料轉換為LangChain Document格式
@@ -162,114 +316,356 @@ def create_documents_from_data(data: list[dict[str, Any]]) -> list[Document]:
     Returns:
         list[Document]: Document物件列表
     """
-    documents = []
-    
-    for item in data:
-        # 組合內容用於embedding
-        content = f"標題: {item.get('title', '')}\n\n內容: {item.get('content', '')}\n\n分類: {item.get('category', '')}\n\n標籤: {', '.join(item.get('tags', []))}"
-        
-        # 創建metadata (ChromaDB不支援list類型，將tags轉為字串)
-        metadata = {
-            'id': item.get('id', ''),
-            'title': item.get('title', ''),
-            'category': item.get('category', ''),
-            'tags': ', '.join(item.get('tags', [])),  # 將list轉為字串
-            'relevance_score': item.get('relevance_score', 0.0)
-        }
-        
-        # 創建Document
-        doc = Document(
-            page_content=content,
-            metadata=metadata
-        )
-        documents.append(doc)
-    
-    return documents
+    return [create_document(item) for item in data]
 
-def load_data_to_vector_store(force_reload: bool = False):
+def create_document(item: dict[str, Any]) -> Document:
     """
-    讀取所有JSON檔案並寫入對應的vector store collection
-    
+    將單筆JSON資料轉換為LangChain Document格式
+
+    Args:
+        item: JSON資料
+
+    Returns:
+        Document: Document物件
+    """
+    # 組合內容用於embedding
+    content = f"標題: {item.get('title', '')}\n\n內容: {item.get('content', '')}\n\n分類: {item.get('category', '')}\n\n標籤: {', '.join(item.get('tags', []))}"
+
+    # 創建metadata (ChromaDB不支援list類型，將tags轉為字串)
+    metadata = {
+        'id': item.get('id', ''),
+        'title': item.get('title', ''),
+        'category': item.get('category', ''),
+        'tags': ', '.join(item.get('tags', [])),  # 將list轉為字串
+        'relevance_score': item.get('relevance_score', 0.0)
+    }
+
+    # 創建Document，以資料id作為vector store中的id，重複寫入時覆蓋而不是新增
+    return Document(
+        id=record_id(item, content),
+        page_content=content,
+        metadata=metadata
+    )
+
+def reconcile_collection(vector_store, current: dict[str, str], manifest: dict[str, str]) -> tuple[set[str], int, int]:
+    """
+    比對collection中已有的資料與檔案中的資料：刪除已移除的資料，並讓舊版資料沿用既有向量
+
+    舊版以隨機id寫入、內容未更改的資料會連同既有向量改以資料id保存，不重新嵌入。
+
+    Args:
+        vector_store: ChromaDB vector store
+        current: 檔案中每筆資料的id對應雜湊值
+        manifest: 上次寫入的資料清單，沿用向量的資料會加入清單
+
+    Returns:
+        tuple[set[str], int, int]: (collection中已有的資料id, 沿用向量的資料數, 刪除的資料數)
+    """
+    # 只讀取id與metadata，不載入向量
+    stored = vector_store.get(include=["metadatas"])
+    stored_ids = set(stored["ids"])
+    stray = [cid for cid in stored["ids"] if cid not in current]
+
+    # 舊版資料：以metadata中的資料id對應，內容相同時沿用既有向量
+    adoptable = {}
+    claimed = set()
+    for cid, metadata in zip(stored["ids"], stored["metadatas"]):
+        rid = (metadata or {}).get("id")
+        if cid in current or rid not in current or rid in stored_ids or rid in claimed:
+            continue
+        adoptable[cid] = rid
+        claimed.add(rid)
+    adopted = 0
+    if adoptable:
+        legacy = vector_store.get(ids=list(adoptable), include=["documents", "metadatas", "embeddings"])
+        moves = [
+            (adoptable[cid], text, metadata, embedding)
+            for cid, text, metadata, embedding in zip(
+                legacy["ids"], legacy["documents"], legacy["metadatas"], legacy["embeddings"]
+            )
+            if calculate_record_hash(Document(page_content=text, metadata=metadata)) == current[adoptable[cid]]
+        ]
+        if moves:
+            rids, texts, metadatas, embeddings = zip(*moves)
+            vector_store._collection.upsert(
+                ids=list(rids), documents=list(texts), metadatas=list(metadatas), embeddings=list(embeddings)
+            )
+            stored_ids.update(rids)
+            manifest.update({rid: current[rid] for rid in rids})
+            adopted = len(moves)
+
+    if stray:
+        vector_store.delete(ids=stray)
+        stored_ids.difference_update(stray)
+        for cid in stray:
+            manifest.pop(cid, None)
+    return stored_ids, adopted, len(stray) - adopted
+
+async def sync_collection(
+    vector_store,
+    file_path: str,
+    slots: asyncio.Semaphore,
+    write_lock: asyncio.Lock,
+    batch_size: int = INGEST_BATCH_SIZE,
+    source: Optional[dict[str, int]] = None,
+) -> dict[str, Any]:
+    """
+    依每筆資料的雜湊值增量更新collection：只嵌入並upsert新增或內容已更改的資料，刪除已移除的資料
+
+    檔案逐筆串流讀取兩次（先計算雜湊值，再取出需要寫入的資料），記憶體只保存id與雜湊值。
+    需要寫入的資料每 batch_size 筆嵌入一次，最多同時進行 slots 個批次；每個批次寫入後立即更新
+    資料清單，中斷後重新執行會從未完成的批次繼續。
+
+    Args:
+        vector_store: ChromaDB vector store
+        file_path: JSON檔案路徑（資料清單儲存在旁邊）
+        slots: 所有collection共用的嵌入批次槽位
+        write_lock: 寫入vector store與資料清單時持有的鎖
+        batch_size: 每個嵌入批次的資料筆數
+        source: 同步開始前的檔案大小與修改時間，同步完成後記錄在資料清單中
+
+    Returns:
+        dict[str, Any]: 新增或更新、刪除、未更改、沿用向量的資料數，以及嵌入的token數與耗時
+    """
+    start = time.perf_counter()
+    current = {}
+    records = 0
+    for item in iter_json_records(file_path):
+        doc = create_document(item)
+        current[doc.id] = calculate_record_hash(doc)
+        records += 1
+    if len(current) < records:
+        print(f"  警告: {file_path} 有 {records - len(current)} 筆資料的id重複，只保留最後一筆")
+
+    manifest = load_manifest(file_path)
+    stored_ids, adopted, deleted = await asyncio.to_thread(reconcile_collection, vector_store, current, manifest)
+    pending = {rid for rid, value in current.items() if rid not in stored_ids or manifest.get(rid) != value}
+    upserted = len(pending)
+    tokens = 0
+
+    async def embed_and_write(batch: list[Document]):
+        nonlocal tokens
+        try:
+            texts = [doc.page_content for doc in batch]
+            vectors = await vector_store.embeddings.aembed_documents(texts)
+            async with write_lock:
+                await asyncio.to_thread(
+                    vector_store._collection.upsert,
+                    ids=[doc.id for doc in batch],
+                    documents=texts,
+                    metadatas=[doc.metadata for doc in batch],
+                    embeddings=vectors,
+                )
+                manifest.update({doc.id: current[doc.id] for doc in batch})
+                save_manifest(file_path, manifest)
+            tokens += sum(estimate_tokens(text) for text in texts)
+        finally:
+            slots.release()
+
+    tasks = []
+    batch: list[Document] = []
+    try:
+        if pending:
+            for item in iter_json_records(file_path):
+                doc = create_document(item)
+                if doc.id not in pending or calculate_record_hash(doc) != current[doc.id]:
+                    # 重複id只寫入最後一筆
+                    continue
+                pending.discard(doc.id)
+                batch.append(doc)
+                if len(batch) >= batch_size:
+                    # 先取得槽位再建立任務，讀取速度不會超過嵌入速度
+                    await slots.acquire()
+                    tasks.append(asyncio.create_task(embed_and_write(batch)))
+                    batch = []
+            if batch:
+                await slots.acquire()
+                tasks.append(asyncio.create_task(embed_and_write(batch)))
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    save_manifest(file_path, {rid: manifest[rid] for rid in current if rid in manifest}, source=source)
+    return {
+        "upserted": upserted,
+        "deleted": deleted,
+        "unchanged": len(current) - upserted,
+        "adopted": adopted,
+        "tokens": tokens,
+        "seconds": time.perf_counter() - start,
+    }
+
+def refresh_lexical_index(file_path: str, topic: str, current_hash: Optional[str] = None):
+    """
+    建立或更新資料檔案旁的BM25倒排索引（不需呼叫嵌入API）
+
+    Args:
+        file_path: JSON檔案路徑
+        topic: 法律領域名稱
+        current_hash: 已計算的檔案雜湊值，未提供時重新計算
+    """
+    if current_hash is None:
+        current_hash = calculate_file_hash(file_path)
+    existing = load_index(file_path)
+    if existing is not None and existing.get("source_hash") == current_hash:
+        print("  詞彙索引未更改，跳過重建")
+        return
+
+    # 逐筆讀取資料並建立索引，不把整個JSON檔案載入記憶體
+    try:
+        index = build_index((create_document(item) for item in iter_json_records(file_path)), topic, current_hash)
+    except FileNotFoundError:
+        print(f"檔案不存在: {file_path}")
+        return
+    except json.JSONDecodeError as e:
+        print(f"JSON解析錯誤: {e}")
+        return
+    if not index['documents']:
+        return
+    save_index(file_path, index)
+    print(f"  已重建詞彙索引，共 {len(index['postings'])} 個詞彙")
+
+def load_data_to_vector_store(
+    force_reload: bool = False,
+    batch_size: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+):
+    """
+    讀取所有JSON檔案並寫入對應的vector store collection（三個collection同時處理）
+
     Args:
         force_reload: 是否強制重新載入所有資料
+        batch_size: 每個嵌入批次的資料筆數，預設為 INGEST_BATCH_SIZE
+        max_concurrency: 同時進行的嵌入批次數，預設為 INGEST_MAX_CONCURRENCY
+    """
+    asyncio.run(aload_data_to_vector_store(force_reload, batch_size, max_concurrency))
+
+async def aload_data_to_vector_store(
+    force_reload: bool = False,
+    batch_size: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+):
+    """
+    load_data_to_vector_store 的非同步版本
     """
     # 獲取vector stores
-    criminal_vector_store, money_debt_vector_store, marriage_vector_store = get_vector_stores()
+    vector_stores = get_vector_stores()
     
-    # 定義檔案路徑和對應的vector store
+    # 依領域註冊表定義檔案路徑和對應的vector store
     data_configs = [
         {
-            'file_path': './vectorDB/data/criminal.json',
-            'vector_store': criminal_vector_store,
-            'collection_name': 'criminal_collection'
-        },
-        {
-            'file_path': './vectorDB/data/money_debt.json', 
-            'vector_store': money_debt_vector_store,
-            'collection_name': 'money_debt_collection'
-        },
-        {
-            'file_path': './vectorDB/data/marriage.json',
-            'vector_store': marriage_vector_store,
-            'collection_name': 'marriage_collection'
+            'file_path': topic.data_file,
+            'vector_store': vector_stores[topic.name],
+            'collection_name': topic.collection,
+            'topic': topic.name
         }
+        for topic in TOPICS
     ]
-    
-    total_loaded = 0
+
+    batch_size = max(1, batch_size or INGEST_BATCH_SIZE)
+    max_concurrency = max(1, max_concurrency or INGEST_MAX_CONCURRENCY)
+    slots = asyncio.Semaphore(max_concurrency)
+    write_lock = asyncio.Lock()
+    print(f"嵌入批次大小: {batch_size}，同時進行的批次數: {max_concurrency}")
+
+    # 先依序完成不需要嵌入的檢查，再同時同步需要載入的collection
+    pending_configs = []
     total_skipped = 0
-    
     for config in data_configs:
         print(f"\n處理 {config['collection_name']}...")
-        
+
+        # 每個檔案只計算一次雜湊值，供詞彙索引、載入判斷與完成標記共用
+        config['file_hash'] = calculate_file_hash(config['file_path'])
+
+        # 詞彙索引與向量資料分開判斷，索引不存在或檔案已更改時即重建
+        refresh_lexical_index(config['file_path'], config['topic'], config['file_hash'])
+
         # 檢查是否需要重新載入
-        if not should_reload_data(config['file_path'], config['vector_store'], force_reload):
+        if not should_reload_data(config['file_path'], config['vector_store'], force_reload, config['file_hash']):
             total_skipped += 1
             continue
-        
-        # 讀取JSON資料
-        json_data = load_json_data(config['file_path'])
-        
-        if not json_data:
-            print(f"跳過 {config['collection_name']} - 無有效資料")
-            continue
-            
-        # 轉換為Document格式
-        documents = create_documents_from_data(json_data)
-        
-        # 寫入vector store
-        try:
-            # 如果是強制重新載入，先清空collection
-            if force_reload:
-                try:
-                    # 直接重置collection
-                    config['vector_store'].reset_collection()
-                    print(f"  已重置 {config['collection_name']}")
-                except Exception as e:
-                    print(f"  重置collection時發生錯誤: {e}")
-            
-            # 添加文件到collection
-            config['vector_store'].add_documents(documents)
-            print(f"成功將 {len(documents)} 筆資料寫入 {config['collection_name']}")
-            
-            # 儲存檔案雜湊值
-            current_hash = calculate_file_hash(config['file_path'])
-            save_data_hash(config['file_path'], current_hash)
-            
-            total_loaded += 1
-            
-        except Exception as e:
-            print(f"寫入 {config['collection_name']} 時發生錯誤: {e}")
-    
-    print(f"\n載入完成！共載入 {total_loaded} 個collection，跳過 {total_skipped} 個collection")
+        pending_configs.append(config)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *[load_collection(config, force_reload, slots, write_lock, batch_size) for config in pending_configs]
+    )
+    elapsed = time.perf_counter() - start
+
+    loaded = [result for result in results if result is not None]
+    total_docs = sum(result['upserted'] for result in loaded)
+    total_tokens = sum(result['tokens'] for result in loaded)
+    print(f"\n載入完成！共載入 {len(loaded)} 個collection，跳過 {total_skipped} 個collection")
+    if loaded:
+        print(
+            f"共嵌入 {total_docs} 筆資料（約 {total_tokens} tokens），耗時 {elapsed:.2f}s，"
+            f"{total_docs / elapsed:.1f} 筆/秒，{total_tokens / elapsed:.0f} tokens/秒"
+        )
+
+async def load_collection(
+    config: dict[str, Any],
+    force_reload: bool,
+    slots: asyncio.Semaphore,
+    write_lock: asyncio.Lock,
+    batch_size: int,
+):
+    """
+    同步單一需要載入的collection
+
+    Returns:
+        Optional[dict]: 同步結果，發生錯誤時返回 None
+    """
+    name = config['collection_name']
+    file_path = config['file_path']
+
+    # 寫入vector store
+    try:
+        # 同步開始前的檔案雜湊值（aload_data_to_vector_store 已計算時沿用），同步期間檔案被修改時下次仍會重新比對
+        current_hash = config.get('file_hash')
+        if current_hash is None:
+            current_hash = calculate_file_hash(file_path)
+        source = get_file_signature(file_path)
+        # 雜湊值只在同步成功後寫回，中斷時資料清單保留進度，下次執行會繼續同步
+        clear_data_hash(file_path)
+
+        # 如果是強制重新載入，先清空collection與資料清單
+        if force_reload:
+            try:
+                # 直接重置collection
+                config['vector_store'].reset_collection()
+                save_manifest(file_path, {})
+                print(f"  已重置 {name}")
+            except Exception as e:
+                print(f"  重置collection時發生錯誤: {e}")
+
+        # 只寫入新增或更改的資料，並刪除檔案中已移除的資料
+        result = await sync_collection(config['vector_store'], file_path, slots, write_lock, batch_size, source)
+        seconds = max(result['seconds'], 1e-9)
+        print(
+            f"成功同步 {name}: 新增或更新 {result['upserted']} 筆，"
+            f"刪除 {result['deleted']} 筆，未更改 {result['unchanged']} 筆"
+            + (f"（其中 {result['adopted']} 筆沿用既有向量）" if result['adopted'] else "")
+            + f"，耗時 {result['seconds']:.2f}s，{result['upserted'] / seconds:.1f} 筆/秒，"
+            f"{result['tokens'] / seconds:.0f} tokens/秒"
+        )
+
+        # 同步成功後才儲存檔案雜湊值作為完成標記
+        save_data_hash(file_path, current_hash)
+        return result
+
+    except Exception as e:
+        print(f"寫入 {name} 時發生錯誤: {e}（已寫入的批次已記錄在資料清單中，重新執行會從中斷處繼續）")
+        return None
 
 def clear_all_hash_files():
     """
     清理所有雜湊檔案
     """
     hash_files = [
-        './vectorDB/data/criminal.json.hash',
-        './vectorDB/data/money_debt.json.hash',
-        './vectorDB/data/marriage.json.hash'
+        f"{topic.data_file}{suffix}" for topic in TOPICS for suffix in (".hash", ".manifest.json")
     ]
     
     cleared_count = 0
@@ -284,34 +680,187 @@ def clear_all_hash_files():
     
     print(f"共清理了 {cleared_count} 個雜湊檔案")
 
+# read_store_catalog 直接查詢的 ChromaDB 內部資料表與欄位；任一不存在時改用客戶端 API
+_CATALOG_SCHEMA = {
+    "collections": {"id", "name"},
+    "segments": {"id", "collection", "scope"},
+    "embeddings": {"id", "segment_id"},
+    "embedding_metadata": {"id", "key", "string_value"},
+}
+
+def read_store_catalog(persist_directory: str = "./vectorDB") -> dict[str, dict[str, Any]]:
+    """
+    取得每個collection的文件數、各分類文件數與向量索引大小
+
+    優先以唯讀方式查詢 chroma.sqlite3（不需要啟動 chromadb 客戶端、不呼叫嵌入API，也不載入文件內容）；
+    這些資料表不是 ChromaDB 的公開介面，結構與預期不符時改用客戶端的 count() 與 get(include=["metadatas"])。
+
+    Args:
+        persist_directory: ChromaDB 資料目錄
+
+    Returns:
+        dict[str, dict]: collection名稱對應 {"count", "categories", "size_bytes"}，資料庫不存在時返回空字典
+    """
+    db_path = os.path.join(persist_directory, "chroma.sqlite3")
+    if not os.path.exists(db_path):
+        return {}
+    catalog = read_catalog_from_sqlite(persist_directory)
+    if catalog is None:
+        print("  chroma.sqlite3 的結構與預期不符，改用 ChromaDB 客戶端讀取統計")
+        catalog = read_catalog_from_client(persist_directory)
+    return catalog
+
+def read_catalog_from_sqlite(persist_directory: str) -> Optional[dict[str, dict[str, Any]]]:
+    """
+    直接查詢 chroma.sqlite3 的內部資料表
+
+    Returns:
+        Optional[dict[str, dict]]: 同 read_store_catalog，資料表結構與 _CATALOG_SCHEMA 不符時返回 None
+    """
+    db_path = os.path.join(persist_directory, "chroma.sqlite3")
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        for table, columns in _CATALOG_SCHEMA.items():
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if not columns <= existing:
+                return None
+        segments = conn.execute(
+            "SELECT c.name, s.id, s.scope FROM collections c JOIN segments s ON s.collection = c.id"
+        ).fetchall()
+        counts = dict(conn.execute(
+            """
+            SELECT c.name, COUNT(e.id) FROM collections c
+            JOIN segments s ON s.collection = c.id AND s.scope = 'METADATA'
+            LEFT JOIN embeddings e ON e.segment_id = s.id
+            GROUP BY c.name
+            """
+        ).fetchall())
+        category_rows = conn.execute(
+            """
+            SELECT c.name, m.string_value, COUNT(*) FROM collections c
+            JOIN segments s ON s.collection = c.id AND s.scope = 'METADATA'
+            JOIN embeddings e ON e.segment_id = s.id
+            JOIN embedding_metadata m ON m.id = e.id AND m.key = 'category'
+            GROUP BY c.name, m.string_value
+            """
+        ).fetchall()
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+
+    catalog = {name: {"count": counts.get(name, 0), "categories": {}, "size_bytes": 0} for name, _, _ in segments}
+    for name, category, count in category_rows:
+        catalog[name]["categories"][category] = count
+    for name, segment_id, scope in segments:
+        # 向量索引（HNSW）保存在以 segment id 命名的目錄
+        segment_dir = os.path.join(persist_directory, segment_id)
+        if scope == "VECTOR" and os.path.isdir(segment_dir):
+            catalog[name]["size_bytes"] = sum(
+                os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(segment_dir) for f in files
+            )
+    return catalog
+
+def read_catalog_from_client(persist_directory: str, page_size: int = 5000) -> dict[str, dict[str, Any]]:
+    """
+    以 ChromaDB 客戶端的公開API取得文件數與各分類文件數（公開API不提供向量索引大小，size_bytes 為 0）
+
+    Args:
+        persist_directory: ChromaDB 資料目錄
+        page_size: 每次讀取 metadata 的筆數
+
+    Returns:
+        dict[str, dict]: 同 read_store_catalog
+    """
+    from .tools import PERSIST_DIRECTORY, get_chroma_client
+
+    if os.path.abspath(persist_directory) == os.path.abspath(PERSIST_DIRECTORY):
+        client = get_chroma_client()
+    else:
+        import chromadb
+
+        client = chromadb.PersistentClient(path=persist_directory)
+
+    catalog = {}
+    for collection in client.list_collections():
+        count = collection.count()
+        categories: dict[str, int] = {}
+        for offset in range(0, count, page_size):
+            page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            for metadata in page["metadatas"]:
+                category = (metadata or {}).get("category")
+                if category is not None:
+                    categories[category] = categories.get(category, 0) + 1
+        catalog[collection.name] = {"count": count, "categories": categories, "size_bytes": 0}
+    return catalog
+
+def get_collection_stats(persist_directory: str = "./vectorDB") -> list[dict[str, Any]]:
+    """
+    獲取所有collection的統計：文件數、分類、資料清單雜湊值與磁碟大小
+
+    不呼叫嵌入API、不載入文件，也不讀取資料檔內容（只比對檔案大小與修改時間），
+    資料量再大也能在毫秒內完成且不需要網路。
+
+    Args:
+        persist_directory: ChromaDB 資料目錄
+
+    Returns:
+        list[dict]: 每個collection的統計
+    """
+    collections = [(topic.collection, topic.data_file) for topic in TOPICS]
+
+    catalog = read_store_catalog(persist_directory)
+    stats = []
+    for name, file_path in collections:
+        entry = catalog.get(name, {"count": 0, "categories": {}, "size_bytes": 0})
+        manifest, manifest_hash = read_manifest(file_path)
+        source = manifest.get("source")
+        if source:
+            file_changed = source != get_file_signature(file_path)
+        else:
+            # 尚無資料清單（舊版載入）時才比對整個檔案的雜湊值
+            stored_hash = load_data_hash(file_path)
+            file_changed = not stored_hash or calculate_file_hash(file_path) != stored_hash
+        stats.append({
+            "collection": name,
+            "file_path": file_path,
+            "count": entry["count"],
+            "categories": entry["categories"],
+            "manifest_records": len(manifest.get("records", {})),
+            "manifest_hash": manifest_hash,
+            "file_changed": file_changed,
+            "size_bytes": entry["size_bytes"],
+        })
+    return stats
+
 def get_collection_status():
     """
     獲取所有collection的狀態資訊
     """
-    criminal_vector_store, money_debt_vector_store, marriage_vector_store = get_vector_stores()
-    
-    collections = [
-        (criminal_vector_store, "criminal_collection", "./vectorDB/data/criminal.json"),
-        (money_debt_vector_store, "money_debt_collection", "./vectorDB/data/money_debt.json"),
-        (marriage_vector_store, "marriage_collection", "./vectorDB/data/marriage.json")
-    ]
-    
+    stats = get_collection_stats()
+
     print("\nCollection狀態:")
     print("-" * 60)
-    
-    for vector_store, name, file_path in collections:
-        count = get_collection_count(vector_store)
-        current_hash = calculate_file_hash(file_path)
-        stored_hash = load_data_hash(file_path)
-        hash_match = current_hash == stored_hash if stored_hash else False
-        
-        status = "✅ 已載入且檔案未更改" if count > 0 and hash_match else \
-                "⚠️  已載入但檔案已更改" if count > 0 and not hash_match else \
-                "❌ 未載入"
-        
-        print(f"{name:20} | 文件數: {count:3} | 狀態: {status}")
-    
+
+    for stat in stats:
+        count = stat['count']
+        status = "❌ 未載入" if count == 0 else \
+                "⚠️  已載入但檔案已更改" if stat['file_changed'] else \
+                "⚠️  文件數與資料清單不符" if stat['manifest_hash'] and count != stat['manifest_records'] else \
+                "✅ 已載入且檔案未更改"
+
+        print(f"{stat['collection']:20} | 文件數: {count:3} | 狀態: {status}")
+        categories = ", ".join(f"{category}({n})" for category, n in sorted(stat['categories'].items()))
+        print(f"{'':20} | 分類: {categories or '無'}")
+        print(
+            f"{'':20} | 資料清單: {stat['manifest_hash'][:12] or '無'} | "
+            f"向量索引: {stat['size_bytes'] / 1024:.1f} KB"
+        )
+
     print("-" * 60)
+    sqlite_path = os.path.join("./vectorDB", "chroma.sqlite3")
+    if os.path.exists(sqlite_path):
+        print(f"chroma.sqlite3（所有collection共用）: {os.path.getsize(sqlite_path) / 1024:.1f} KB")
 
 def test_vector_stores():
     """
@@ -320,7 +869,7 @@ def test_vector_stores():
     print("\n測試vector store檢索功能...")
     
     # 獲取vector stores
-    criminal_vector_store, money_debt_vector_store, marriage_vector_store = get_vector_stores()
+    vector_stores = get_vector_stores()
     
     test_queries = [
         "竊盜罪的刑責是什麼？",
@@ -328,15 +877,10 @@ def test_vector_stores():
         "債務不履行如何處理？"
     ]
     
-    vector_stores = [
-        (criminal_vector_store, "刑法"),
-        (marriage_vector_store, "婚姻法"),
-        (money_debt_vector_store, "債務法")
-    ]
-    
     for query in test_queries:
         print(f"\n查詢: {query}")
-        for vector_store, name in vector_stores:
+        for topic in TOPICS:
+            vector_store, name = vector_stores[topic.name], topic.label
             try:
                 results = vector_store.similarity_search(query, k=2)
                 if results:
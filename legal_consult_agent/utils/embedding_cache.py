@@ -0,0 +1,164 @@
+"""
+嵌入向量快取 - 以內容雜湊值為鍵，將查詢與文件的嵌入向量持久化到本地 SQLite
+
+向量以 float32 blob 儲存，超過項目上限時淘汰最久未使用的項目。
+命中時的存取時間先記在記憶體，累積一批或超過一段時間才寫回；非同步介面的 SQLite 操作在執行緒中執行。
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    包裝任一 Embeddings，已嵌入過的文字不再呼叫嵌入 API
+
+    Args:
+        underlying: 實際計算嵌入向量的模型
+        db_path: SQLite 檔案路徑
+        namespace: 快取鍵的命名空間（通常為模型名稱），更換模型時不會誤用舊向量
+        max_entries: 快取項目上限
+    """
+
+    # 存取時間累積的筆數或秒數達到其一時寫回
+    TOUCH_BATCH = 256
+    TOUCH_FLUSH_SECONDS = 30.0
+
+    def __init__(self, underlying: Embeddings, db_path: str, namespace: str, max_entries: int = 100000):
+        self.underlying = underlying
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embedding_cache (key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embedding_cache_access ON embedding_cache(last_access)")
+        self._conn.commit()
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+        # key -> 尚未寫回的最後存取時間
+        self._touched: dict[str, float] = {}
+        self._last_flush = time.time()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\x00{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, texts: list[str]) -> tuple[list[Optional[list[float]]], list[int]]:
+        """返回 (已快取的向量或 None, 未命中的索引)"""
+        keys = [self._key(text) for text in texts]
+        found: dict[str, bytes] = {}
+        with self._lock:
+            # SQLite 變數數量有上限，分段查詢
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embedding_cache WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._touched.update((key, now) for key in found)
+                if len(self._touched) >= self.TOUCH_BATCH or now - self._last_flush >= self.TOUCH_FLUSH_SECONDS:
+                    self._flush_touches(now)
+                    self._conn.commit()
+
+        vectors: list[Optional[list[float]]] = []
+        missing: list[int] = []
+        for i, key in enumerate(keys):
+            if key in found:
+                vectors.append(np.frombuffer(found[key], dtype=np.float32).tolist())
+            else:
+                vectors.append(None)
+                missing.append(i)
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        return vectors, missing
+
+    def _flush_touches(self, now: float):
+        """將累積的存取時間寫回（呼叫端持有鎖並負責提交）"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embedding_cache SET last_access = ? WHERE key = ?",
+                [(access, key) for key, access in self._touched.items()],
+            )
+            self._touched.clear()
+        self._last_flush = now
+
+    def _store(self, texts: list[str], vectors: list[list[float]]):
+        now = time.time()
+        with self._lock:
+            # 相同的鍵代表相同的文字與模型，已存在時保留原本的向量
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO embedding_cache (key, vector, last_access) VALUES (?, ?, ?)",
+                [
+                    (self._key(text), np.asarray(vector, dtype=np.float32).tobytes(), now)
+                    for text, vector in zip(texts, vectors)
+                ],
+            )
+            self._entries += cursor.rowcount
+            if self._entries > self.max_entries:
+                # 淘汰前寫回存取時間，以免淘汰到最近才命中的項目
+                self._flush_touches(now)
+                cursor = self._conn.execute(
+                    "DELETE FROM embedding_cache WHERE key IN ("
+                    "SELECT key FROM embedding_cache ORDER BY last_access ASC LIMIT ?)",
+                    (self._entries - self.max_entries,),
+                )
+                self._entries -= cursor.rowcount
+            self._conn.commit()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors, missing = self._lookup(texts)
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            new_vectors = self.underlying.embed_documents(missing_texts)
+            self._store(missing_texts, new_vectors)
+            for i, vector in zip(missing, new_vectors):
+                vectors[i] = vector
+        return vectors
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors, missing = await asyncio.to_thread(self._lookup, texts)
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            new_vectors = await self.underlying.aembed_documents(missing_texts)
+            await asyncio.to_thread(self._store, missing_texts, new_vectors)
+            for i, vector in zip(missing, new_vectors):
+                vectors[i] = vector
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        vectors, missing = self._lookup([text])
+        if missing:
+            vectors[0] = self.underlying.embed_query(text)
+            self._store([text], vectors)
+        return vectors[0]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        vectors, missing = await asyncio.to_thread(self._lookup, [text])
+        if missing:
+            vectors[0] = await self.underlying.aembed_query(text)
+            await asyncio.to_thread(self._store, [text], vectors)
+        return vectors[0]
+
+    def stats(self) -> dict:
+        """
+        獲取快取命中統計
+
+        Returns:
+            dict: 命中數、未命中數與項目數
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+        return {"enabled": True, "hits": self.hits, "misses": self.misses, "entries": entries}
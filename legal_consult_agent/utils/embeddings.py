@@ -1,7 +1,34 @@
 from dotenv import load_dotenv
 import os
-from langchain_openai import OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
+from .config import env_bool, env_int
+from .lazy import lazy_singleton
 
 load_dotenv()
 embedding_model = os.getenv("OPENAI_EMBEDDING_MODEL")
-embeddings = OpenAIEmbeddings(model=embedding_model)
\ No newline at end of file
+
+def create_embeddings() -> Embeddings:
+    '''
+    OpenAI embeddings, behind the persistent embedding cache when EMBEDDING_CACHE_ENABLED
+    '''
+    from langchain_openai import OpenAIEmbeddings
+    from .embedding_cache import CachedEmbeddings
+
+    embeddings = OpenAIEmbeddings(model=embedding_model)
+    # Query and ingestion paths both go through this object, so caching here covers tools.py and data_loader.py.
+    if env_bool("EMBEDDING_CACHE_ENABLED", True):
+        embeddings = CachedEmbeddings(
+            embeddings,
+            db_path=os.getenv("EMBEDDING_CACHE_PATH", "./vectorDB/embedding_cache.sqlite3"),
+            namespace=embedding_model or "",
+            max_entries=env_int("EMBEDDING_CACHE_MAX_ENTRIES", 100000),
+        )
+    return embeddings
+
+# Built on first use; the server builds it during start-up (see tools.warm_up).
+get_embeddings = lazy_singleton(create_embeddings)
+
+def __getattr__(name: str):
+    if name == "embeddings":
+        return get_embeddings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
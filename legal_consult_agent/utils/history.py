@@ -0,0 +1,130 @@
+"""
+對話歷史壓縮 - 最近 K 輪對話原文 + 更早對話的滾動摘要，限制在 token 預算內
+
+每輪對話只渲染一次歷史字串，供 semantic_router、retriever、generator 共用，
+而不是在每個 prompt 內插入整個 messages 列表的 repr。
+"""
+
+from typing import Sequence
+from langchain_core.messages import BaseMessage, HumanMessage
+from .config import env_bool, env_int
+
+HISTORY_WINDOW_TURNS = env_int("HISTORY_WINDOW_TURNS", 3)
+HISTORY_TOKEN_BUDGET = env_int("HISTORY_TOKEN_BUDGET", 1500)
+HISTORY_SUMMARY_TOKENS = env_int("HISTORY_SUMMARY_TOKENS", 400)
+HISTORY_SUMMARY_ENABLED = env_bool("HISTORY_SUMMARY_ENABLED", True)
+
+_ROLES = {"human": "User", "ai": "Assistant", "system": "System"}
+
+# render_history 在沒有任何歷史時的輸出
+NO_HISTORY = "(none)"
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文字的 token 數（不呼叫 tokenizer）
+
+    中日韓文字約一字一個 token，其餘字元約四個一個 token；
+    只用來決定保留多少歷史，不需要精確。
+
+    Args:
+        text: 文字
+
+    Returns:
+        int: 估算的 token 數
+    """
+    wide = sum(1 for ch in text if ord(ch) > 0x2E7F)
+    return wide + (len(text) - wide + 3) // 4
+
+
+def clip_tokens(text: str, max_tokens: int, keep_tail: bool = False) -> str:
+    """
+    將文字截斷到 token 預算內
+
+    Args:
+        text: 文字
+        max_tokens: token 上限
+        keep_tail: True 時保留結尾（最新的內容），否則保留開頭
+
+    Returns:
+        str: 截斷後的文字，有截斷時以 "..." 標示
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    budget = max(0, max_tokens - 1) * 4
+    chars = reversed(text) if keep_tail else text
+    kept = []
+    for ch in chars:
+        budget -= 4 if ord(ch) > 0x2E7F else 1
+        if budget < 0:
+            break
+        kept.append(ch)
+    if keep_tail:
+        return "..." + "".join(reversed(kept))
+    return "".join(kept) + "..."
+
+
+def render_messages(messages: Sequence[BaseMessage]) -> str:
+    """
+    將訊息渲染為 "User: ..." / "Assistant: ..." 的逐行文字
+
+    Args:
+        messages: 訊息列表
+
+    Returns:
+        str: 渲染後的文字
+    """
+    return "\n".join(f"{_ROLES.get(m.type, m.type)}: {m.content}" for m in messages)
+
+
+def window_start(messages: Sequence[BaseMessage], summarized: int, max_turns: int, max_tokens: int) -> int:
+    """
+    找出保留原文的第一則訊息位置：由新到舊最多保留 max_turns 輪，且不超過 token 預算
+
+    一輪從使用者訊息開始；最新一輪即使超過預算也會保留（渲染時再截斷）。
+
+    Args:
+        messages: 本輪問題之前的所有訊息
+        summarized: 已併入摘要的訊息數，之前的訊息不再保留原文
+        max_turns: 保留的對話輪數
+        max_tokens: 原文可使用的 token 預算
+
+    Returns:
+        int: 第一則保留原文的訊息索引，之前的訊息應併入摘要
+    """
+    start = end = len(messages)
+    turns = used = 0
+    for i in range(len(messages) - 1, summarized - 1, -1):
+        # 剩下未併入摘要的開頭訊息即使不是使用者訊息，也視為一輪
+        if i > summarized and not isinstance(messages[i], HumanMessage):
+            continue
+        if turns >= max_turns:
+            break
+        cost = estimate_tokens(render_messages(messages[i:end]))
+        if turns and used + cost > max_tokens:
+            break
+        turns += 1
+        used += cost
+        start = end = i
+    return start
+
+
+def render_history(summary: str, messages: Sequence[BaseMessage], max_tokens: int) -> str:
+    """
+    組合摘要與最近對話原文，作為節點 prompt 中的 Chat History
+
+    Args:
+        summary: 更早對話的滾動摘要
+        messages: 保留原文的最近對話
+        max_tokens: 整體 token 預算
+
+    Returns:
+        str: 歷史字串，沒有任何歷史時返回 NO_HISTORY
+    """
+    parts = []
+    if summary:
+        parts.append(f"Summary of earlier conversation: {summary}")
+    if messages:
+        recent = render_messages(messages)
+        remaining = max(1, (max_tokens - estimate_tokens(parts[0])) if parts else max_tokens)
+        parts.append(clip_tokens(recent, remaining, keep_tail=True))
+    return "\n".join(parts) or NO_HISTORY
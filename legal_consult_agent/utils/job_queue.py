@@ -0,0 +1,262 @@
+"""
+非同步批次任務佇列 - 以本地 SQLite 保存任務與每個問題的處理結果
+
+每個問題是一筆 job_items 紀錄，由服務器的 worker 以租約方式領取：
+領取後超過租約時間仍未完成（例如行程中止）的問題會重新被領取，已完成的結果在重啟後仍可查詢。
+完成的問題依完成順序取得遞增的 finished_seq，供輪詢與串流以游標取得增量結果。
+全部問題完成超過保留時間（JOB_RETENTION_SECONDS）的任務會被刪除，避免資料表無限成長。
+所有方法都是阻塞的 SQLite 操作（多個 worker 行程競爭寫入鎖時最多等待 30 秒），服務器需在執行緒中呼叫。
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Optional
+from .config import env_int
+
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "./vectorDB/jobs.sqlite3")
+
+
+class JobStore:
+    """
+    以 SQLite 保存的批次任務佇列，多個 worker 行程可共用同一檔案
+
+    Args:
+        db_path: SQLite 檔案路徑
+        lease_seconds: 問題領取後的租約秒數，逾時視為處理中斷並可重新領取
+        retention_seconds: 任務全部完成後保留結果的秒數，0 表示永久保留
+    """
+
+    # 兩次清理之間的最短間隔秒數
+    PRUNE_INTERVAL = 60
+
+    def __init__(self, db_path: str, lease_seconds: int = 600, retention_seconds: int = 0):
+        self.lease_seconds = lease_seconds
+        self.retention_seconds = retention_seconds
+        self._last_prune = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                total INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS job_items (
+                job_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                request TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                response TEXT,
+                claimed_at REAL,
+                finished_seq INTEGER,
+                finished_at REAL,
+                PRIMARY KEY (job_id, idx)
+            );
+            -- SQLite 索引隱含 rowid，等同 (status, rowid)：領取時可直接找到最早的待處理問題
+            CREATE INDEX IF NOT EXISTS idx_job_items_status ON job_items(status);
+            CREATE INDEX IF NOT EXISTS idx_job_items_finished ON job_items(job_id, finished_seq);
+            """
+        )
+        self._conn.commit()
+
+    def create(self, requests: list[dict[str, Any]]) -> str:
+        """
+        建立任務
+
+        Args:
+            requests: 每個問題的請求內容（ChatRequest 的 dict）
+
+        Returns:
+            str: 任務ID
+        """
+        job_id = str(uuid.uuid4())
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, total, created_at) VALUES (?, ?, ?)", (job_id, len(requests), time.time())
+            )
+            self._conn.executemany(
+                "INSERT INTO job_items (job_id, idx, request) VALUES (?, ?, ?)",
+                [(job_id, i, json.dumps(request, ensure_ascii=False)) for i, request in enumerate(requests)],
+            )
+            self._conn.commit()
+        return job_id
+
+    def claim(self) -> Optional[tuple[str, int, dict[str, Any]]]:
+        """
+        依建立順序領取下一個待處理（或租約逾時）的問題
+
+        Returns:
+            Optional[tuple[str, int, dict]]: (任務ID, 問題索引, 請求內容)，沒有待處理問題時返回 None
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                """
+                UPDATE job_items SET status = 'running', claimed_at = ?
+                WHERE rowid = (
+                    SELECT MIN(rowid) FROM (
+                        SELECT MIN(rowid) AS rowid FROM job_items WHERE status = 'pending'
+                        UNION ALL
+                        SELECT MIN(rowid) FROM job_items WHERE status = 'running' AND claimed_at < ?
+                    )
+                )
+                RETURNING job_id, idx, request
+                """,
+                (now, now - self.lease_seconds),
+            ).fetchone()
+            self._conn.commit()
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def complete(self, job_id: str, index: int, status: str, response: dict[str, Any]):
+        """
+        記錄問題的處理結果
+
+        Args:
+            job_id: 任務ID
+            index: 問題索引
+            status: "done" 或 "error"
+            response: 回應內容
+        """
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE job_items SET status = ?, response = ?, finished_at = ?,
+                    finished_seq = (SELECT COALESCE(MAX(finished_seq), 0) + 1 FROM job_items WHERE job_id = ?)
+                WHERE job_id = ? AND idx = ?
+                """,
+                (status, json.dumps(response, ensure_ascii=False), time.time(), job_id, job_id, index),
+            )
+            self._conn.commit()
+
+    def release(self, job_id: str, index: int):
+        """將處理中斷的問題放回佇列"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE job_items SET status = 'pending', claimed_at = NULL WHERE job_id = ? AND idx = ? AND status = 'running'",
+                (job_id, index),
+            )
+            self._conn.commit()
+
+    def status(self, job_id: str) -> Optional[dict[str, Any]]:
+        """
+        獲取任務進度
+
+        Returns:
+            Optional[dict]: 任務狀態與各狀態的問題數，任務不存在時返回 None
+        """
+        with self._lock:
+            job = self._conn.execute("SELECT total, created_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            counts = dict(
+                self._conn.execute(
+                    "SELECT status, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY status", (job_id,)
+                ).fetchall()
+            )
+        total, created_at = job
+        finished = counts.get("done", 0) + counts.get("error", 0)
+        if finished == total:
+            status = "completed"
+        elif finished or counts.get("running"):
+            status = "running"
+        else:
+            status = "queued"
+        return {
+            "job_id": job_id,
+            "status": status,
+            "total": total,
+            "pending": counts.get("pending", 0),
+            "running": counts.get("running", 0),
+            "done": counts.get("done", 0),
+            "error": counts.get("error", 0),
+            "created_at": created_at,
+        }
+
+    def results(self, job_id: str, after: int = 0, limit: int = 100) -> list[dict[str, Any]]:
+        """
+        依完成順序取得游標之後的結果
+
+        Args:
+            job_id: 任務ID
+            after: 上次取得的最後一個 finished_seq
+            limit: 最多返回筆數
+
+        Returns:
+            list[dict]: 包含 seq、index、status、response 的結果列表
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT finished_seq, idx, status, response FROM job_items "
+                "WHERE job_id = ? AND finished_seq > ? ORDER BY finished_seq LIMIT ?",
+                (job_id, after, limit),
+            ).fetchall()
+        return [
+            {"seq": seq, "index": index, "status": status, "response": json.loads(response)}
+            for seq, index, status, response in rows
+        ]
+
+    def prune(self) -> int:
+        """
+        刪除全部問題已完成且最後完成時間超過保留時間的任務（距上次清理未滿 PRUNE_INTERVAL 秒時略過）
+
+        Returns:
+            int: 刪除的任務數
+        """
+        now = time.time()
+        if not self.retention_seconds or now - self._last_prune < self.PRUNE_INTERVAL:
+            return 0
+        self._last_prune = now
+        with self._lock:
+            job_ids = [
+                row[0] for row in self._conn.execute(
+                    """
+                    SELECT job_id FROM job_items GROUP BY job_id
+                    HAVING SUM(status IN ('pending', 'running')) = 0 AND MAX(COALESCE(finished_at, 0)) < ?
+                    """,
+                    (now - self.retention_seconds,),
+                ).fetchall()
+            ]
+            self._conn.executemany("DELETE FROM job_items WHERE job_id = ?", [(job_id,) for job_id in job_ids])
+            self._conn.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in job_ids])
+            self._conn.commit()
+        return len(job_ids)
+
+    def stats(self) -> dict:
+        """
+        獲取佇列統計
+
+        Returns:
+            dict: 任務數與各狀態的問題數
+        """
+        with self._lock:
+            jobs = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM job_items GROUP BY status").fetchall())
+        return {"jobs": jobs, **counts}
+
+    def close(self):
+        """關閉資料庫連線（服務器關閉時呼叫）"""
+        with self._lock:
+            self._conn.close()
+
+
+def create_job_store() -> JobStore:
+    '''
+    依環境變數建立任務佇列
+    '''
+    return JobStore(
+        JOB_QUEUE_PATH,
+        lease_seconds=env_int("JOB_LEASE_SECONDS", 600),
+        retention_seconds=env_int("JOB_RETENTION_SECONDS", 7 * 24 * 3600),
+    )
+
+
+job_store = create_job_store()
@@ -0,0 +1,81 @@
+"""
+延遲建立 - 模型客戶端與向量資料庫在第一次使用時才建立，匯入模組不會連線或讀取磁碟
+
+服務器在 lifespan 啟動階段呼叫 warm_up 預先建立，短生命週期的腳本只建立用到的部分。
+"""
+
+import threading
+from typing import Any, Callable, Generic, Optional, TypeVar
+from langchain_core.runnables import Runnable, RunnableConfig
+
+T = TypeVar("T")
+_UNSET = object()
+
+
+class LazySingleton(Generic[T]):
+    """
+    執行緒安全的延遲單例：第一次呼叫時以 factory 建立，之後返回同一個物件
+
+    Args:
+        factory: 建立物件的函式
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self.factory = factory
+        self._value: Any = _UNSET
+        self._lock = threading.Lock()
+        self.__doc__ = factory.__doc__
+
+    def __call__(self) -> T:
+        value = self._value
+        if value is _UNSET:
+            with self._lock:
+                if self._value is _UNSET:
+                    self._value = self.factory()
+                value = self._value
+        return value
+
+    @property
+    def built(self) -> bool:
+        """是否已建立"""
+        return self._value is not _UNSET
+
+    def override(self, value: T):
+        """以指定的物件取代（壓測與離線測試替換模型時使用）"""
+        with self._lock:
+            self._value = value
+
+
+def lazy_singleton(factory: Callable[[], T]) -> LazySingleton[T]:
+    '''
+    Decorator form of LazySingleton
+    '''
+    return LazySingleton(factory)
+
+
+class LazyRunnable(Runnable):
+    """
+    第一次呼叫時才以 factory 建立被包裝的 runnable
+
+    Args:
+        factory: 返回 runnable 的函式
+    """
+
+    def __init__(self, factory: Callable[[], Runnable]):
+        self.factory = factory
+        self._runnable: Optional[Runnable] = None
+        self._lock = threading.Lock()
+
+    @property
+    def runnable(self) -> Runnable:
+        if self._runnable is None:
+            with self._lock:
+                if self._runnable is None:
+                    self._runnable = self.factory()
+        return self._runnable
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return self.runnable.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        return await self.runnable.ainvoke(input, config, **kwargs)
@@ -0,0 +1,194 @@
+"""
+BM25 詞彙檢索 - 以字元 n-gram 處理中文，於資料載入時預先建立倒排索引
+
+每個 collection 的倒排索引存放於對應 JSON 檔案旁（例如 criminal.json.bm25.json），
+查詢時合併所有領域的索引，不需要呼叫嵌入 API。
+"""
+
+import json
+import math
+import re
+from collections import Counter
+from typing import Any, Iterable, Optional
+from langchain_core.documents import Document
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+# 標題與標籤是法律關鍵詞最集中的欄位，建立索引時重複計入以提高權重
+FIELD_BOOST = 2
+
+_CJK_RUN = re.compile(r"[㐀-鿿豈-﫿]+")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    中文連續字元切為字元二元組（單字時保留單字），英數字以單字為單位
+
+    Args:
+        text: 輸入文字
+
+    Returns:
+        list[str]: 詞彙列表
+    """
+    text = text.lower()
+    tokens: list[str] = []
+    for run in _CJK_RUN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    tokens.extend(_WORD.findall(text))
+    return tokens
+
+
+def index_path(data_file_path: str) -> str:
+    """返回資料檔案對應的倒排索引路徑"""
+    return data_file_path + ".bm25.json"
+
+
+def build_index(documents: Iterable[Document], topic: str, source_hash: str) -> dict[str, Any]:
+    """
+    為單一 collection 建立倒排索引（只走訪 documents 一次，可傳入逐筆產生的 generator）
+
+    Args:
+        documents: create_document 產生的 Document
+        topic: 法律領域名稱
+        source_hash: 來源資料檔案的雜湊值
+
+    Returns:
+        dict: 可序列化為 JSON 的索引
+    """
+    postings: dict[str, list[list[int]]] = {}
+    doc_lengths: list[int] = []
+    stored: list[dict[str, Any]] = []
+    for doc_idx, doc in enumerate(documents):
+        stored.append({"page_content": doc.page_content, "metadata": doc.metadata})
+        boosted = f"{doc.metadata.get('title', '')} {doc.metadata.get('tags', '')}"
+        tokens = tokenize(doc.page_content) + tokenize(boosted) * (FIELD_BOOST - 1)
+        doc_lengths.append(len(tokens))
+        for term, tf in Counter(tokens).items():
+            postings.setdefault(term, []).append([doc_idx, tf])
+    return {
+        "topic": topic,
+        "source_hash": source_hash,
+        "documents": stored,
+        "doc_lengths": doc_lengths,
+        "postings": postings,
+    }
+
+
+def save_index(data_file_path: str, index: dict[str, Any]):
+    """將倒排索引寫入資料檔案旁"""
+    with open(index_path(data_file_path), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+
+
+def load_index(data_file_path: str) -> Optional[dict[str, Any]]:
+    """讀取倒排索引，不存在時返回 None"""
+    try:
+        with open(index_path(data_file_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class LexicalIndex:
+    """
+    合併所有領域倒排索引的 BM25 檢索器
+
+    Args:
+        indexes: build_index 產生的索引列表
+    """
+
+    def __init__(self, indexes: list[dict[str, Any]]):
+        self.documents: list[Document] = []
+        self.topics: list[str] = []
+        self.doc_lengths: list[int] = []
+        self.postings: dict[str, list[tuple[int, int]]] = {}
+        for index in indexes:
+            offset = len(self.documents)
+            for item in index["documents"]:
+                self.documents.append(
+                    Document(page_content=item["page_content"], metadata={**item["metadata"], "topic": index["topic"]})
+                )
+                self.topics.append(index["topic"])
+            self.doc_lengths.extend(index["doc_lengths"])
+            for term, entries in index["postings"].items():
+                self.postings.setdefault(term, []).extend((offset + doc_idx, tf) for doc_idx, tf in entries)
+
+        n = len(self.documents)
+        self.avg_doc_length = sum(self.doc_lengths) / n if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(entries) + 0.5) / (len(entries) + 0.5))
+            for term, entries in self.postings.items()
+        }
+
+    def search(self, query: str, k: int = 4, topics: Optional[list[str]] = None) -> list[tuple[Document, float]]:
+        """
+        BM25 查詢 top-k
+
+        Args:
+            query: 查詢文字
+            k: 返回數量
+            topics: 可選的領域過濾
+
+        Returns:
+            list[tuple[Document, float]]: (文件, BM25分數) 列表，依分數降序
+        """
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_idx, tf in self.postings[term]:
+                if topics and self.topics[doc_idx] not in topics:
+                    continue
+                length_norm = 1 - BM25_B + BM25_B * self.doc_lengths[doc_idx] / self.avg_doc_length
+                scores[doc_idx] = scores.get(doc_idx, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [
+            (self.documents[i].model_copy(update={"metadata": dict(self.documents[i].metadata)}), score)
+            for i, score in ranked
+        ]
+
+    def is_confident(self, query: str, hits: list[tuple[Document, float]], margin: float) -> bool:
+        """
+        判斷詞彙檢索結果是否足以跳過向量檢索：
+        最佳結果的某個標籤完整出現在查詢中，且分數領先第二名至少 margin 倍
+
+        Args:
+            query: 查詢文字
+            hits: search 的結果
+            margin: 第一名與第二名分數的最小比值
+
+        Returns:
+            bool: 是否為高信心命中
+        """
+        if not hits:
+            return False
+        top_doc, top_score = hits[0]
+        tags = [tag.strip() for tag in top_doc.metadata.get("tags", "").split(",") if len(tag.strip()) >= 2]
+        if not any(tag in query for tag in tags):
+            return False
+        return len(hits) == 1 or top_score >= hits[1][1] * margin
+
+
+def load_lexical_index(data_files: dict[str, str]) -> Optional[LexicalIndex]:
+    """
+    讀取所有領域的倒排索引並合併
+
+    Args:
+        data_files: 領域名稱 -> 資料檔案路徑
+
+    Returns:
+        Optional[LexicalIndex]: 沒有任何索引檔案時返回 None
+    """
+    indexes = []
+    for topic, file_path in data_files.items():
+        index = load_index(file_path)
+        if index is None:
+            print(f"找不到 {topic} 的詞彙索引: {index_path(file_path)}，請執行 load_data.py")
+            continue
+        indexes.append(index)
+    return LexicalIndex(indexes) if indexes else None
@@ -0,0 +1,135 @@
+"""
+LLM 呼叫快取 - 以 prompt 雜湊值為鍵，快取解析後的結構化輸出
+
+兩層快取：記憶體 LRU（必要）與本地 SQLite（可選），SQLite 命中時會回填記憶體層。
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from pydantic import BaseModel
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+
+
+class LLMCallCache:
+    """
+    prompt 雜湊值 -> 序列化回應 的兩層快取
+
+    Args:
+        max_entries: 記憶體層的項目上限（LRU 淘汰）
+        sqlite_path: SQLite 檔案路徑，為 None 時只使用記憶體層
+    """
+
+    def __init__(self, max_entries: int = 2048, sqlite_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if sqlite_path:
+            os.makedirs(os.path.dirname(sqlite_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+            if self._conn is not None:
+                row = self._conn.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._remember(key, row[0])
+                    self.hits += 1
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._remember(key, value)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, value, time.time()),
+                )
+                self._conn.commit()
+
+    def _remember(self, key: str, value: str):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": True,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "memory_entries": len(self._memory),
+            "sqlite": self._conn is not None,
+        }
+
+
+class CachedRunnable(Runnable):
+    """
+    包裝 LLM runnable，相同 prompt 直接返回快取的解析結果
+
+    Args:
+        runnable: 被包裝的 runnable（結構化輸出或聊天模型）
+        cache: 共用的 LLMCallCache
+        namespace: 快取鍵的命名空間（模型名稱、溫度、節點、輸出結構）
+        schema: 結構化輸出的 pydantic 模型，為 None 時快取 AIMessage 文字內容
+    """
+
+    def __init__(self, runnable: Runnable, cache: LLMCallCache, namespace: str, schema: Optional[type[BaseModel]] = None):
+        self.runnable = runnable
+        self.cache = cache
+        self.namespace = namespace
+        self.schema = schema
+
+    def _key(self, input: Any) -> str:
+        prompt = input if isinstance(input, str) else repr(input)
+        # 正規化空白，避免縮排或多餘空格造成不同的鍵
+        prompt = " ".join(prompt.split())
+        return hashlib.sha256(f"{self.namespace}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def _dump(self, output: Any) -> str:
+        if self.schema is not None:
+            return output.model_dump_json()
+        return output.content
+
+    def _load(self, value: str) -> Any:
+        if self.schema is not None:
+            return self.schema.model_validate_json(value)
+        return AIMessage(content=value)
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        key = self._key(input)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self._load(cached)
+        output = self.runnable.invoke(input, config, **kwargs)
+        self.cache.set(key, self._dump(output))
+        return output
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        key = self._key(input)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self._load(cached)
+        output = await self.runnable.ainvoke(input, config, **kwargs)
+        self.cache.set(key, self._dump(output))
+        return output
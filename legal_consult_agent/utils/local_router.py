@@ -0,0 +1,259 @@
+"""
+本地路由器 - 以嵌入向量的相似度判斷是否需要檢索與所屬法律領域，不呼叫LLM
+
+訓練資料為帶標籤的範例問題（ROUTING_EXAMPLES_PATH）加上各領域資料檔案中的 tags 詞彙，
+啟動時嵌入一次（經過嵌入快取）並正規化為 float32 矩陣；每次路由只需一次矩陣向量乘積。
+
+分類方式（LOCAL_ROUTER_METHOD）:
+- "knn": 每個標籤取最相近的 k 個範例的平均相似度
+- "centroid": 每個標籤的範例平均向量（質心）的相似度
+
+最高分與次高分的差距低於 LOCAL_ROUTER_MARGIN 時視為信心不足，由呼叫端改用LLM判斷。
+分類器只看問題本身，因此只判斷沒有對話歷史的第一輪；之後的追問（例如「那如果是已婚呢？」）
+需要依歷史改寫檢索查詢、判斷歷史是否已足以回答，一律交給LLM。
+"""
+
+import asyncio
+import json
+import os
+from typing import Optional
+import numpy as np
+from pydantic import BaseModel
+from langchain_core.embeddings import Embeddings
+from .config import env_float, env_int, get_configurable
+from .data_loader import iter_json_records
+from .history import NO_HISTORY
+from .lazy import lazy_singleton
+from .topics import TOPICS
+
+ROUTER_BACKEND = os.getenv("ROUTER_BACKEND", "llm")
+ROUTING_EXAMPLES_PATH = os.getenv("ROUTING_EXAMPLES_PATH", "./vectorDB/data/routing_examples.json")
+LOCAL_ROUTER_METHOD = os.getenv("LOCAL_ROUTER_METHOD", "knn")
+LOCAL_ROUTER_K = env_int("LOCAL_ROUTER_K", 3)
+LOCAL_ROUTER_MARGIN = env_float("LOCAL_ROUTER_MARGIN", 0.05)
+
+
+class ExampleClassifier:
+    """
+    以範例向量的餘弦相似度分類
+
+    Args:
+        vectors: (N, D) 範例向量
+        labels: 與向量對應的標籤
+        method: "knn" 或 "centroid"
+        k: knn 時每個標籤取的鄰居數
+    """
+
+    def __init__(self, vectors: np.ndarray, labels: list[str], method: str = "knn", k: int = 3):
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = matrix / norms
+        self.labels = sorted(set(labels))
+        self.method = method
+        self.k = max(1, k)
+        label_array = np.asarray(labels)
+        self.blocks = [np.ascontiguousarray(matrix[label_array == label]) for label in self.labels]
+        centroids = np.stack([block.mean(axis=0) for block in self.blocks])
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.centroids = centroids / norms
+
+    def scores(self, vector: np.ndarray) -> np.ndarray:
+        """每個標籤的分數（順序同 self.labels），vector 需已正規化"""
+        if self.method == "centroid":
+            return self.centroids @ vector
+        scores = np.empty(len(self.labels), dtype=np.float32)
+        for i, block in enumerate(self.blocks):
+            similarities = block @ vector
+            k = min(self.k, len(similarities))
+            scores[i] = np.partition(similarities, -k)[-k:].mean()
+        return scores
+
+    def classify(self, vector: np.ndarray) -> tuple[str, float]:
+        """
+        Args:
+            vector: 已正規化的查詢向量
+
+        Returns:
+            tuple[str, float]: (最高分的標籤, 與次高分的差距)
+        """
+        scores = self.scores(vector)
+        if len(scores) == 1:
+            return self.labels[0], float("inf")
+        second, best = np.argpartition(scores, -2)[-2:]
+        if scores[second] > scores[best]:
+            best, second = second, best
+        return self.labels[best], float(scores[best] - scores[second])
+
+
+class LocalDecision(BaseModel):
+    """本地路由結果；信心不足的欄位為 None"""
+
+    Retrieve: Optional[str] = None
+    LegalTopic: Optional[str] = None
+    retrieve_margin: float = 0.0
+    topic_margin: float = 0.0
+
+
+class LocalRouter:
+    """
+    是否檢索（Yes/No）與法律領域兩個分類器，並統計本地判斷與改用LLM的次數
+
+    Args:
+        embeddings: 嵌入模型
+        retrieve_classifier: Retrieve 分類器
+        topic_classifier: LegalTopic 分類器
+        margin: 信心門檻
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        retrieve_classifier: ExampleClassifier,
+        topic_classifier: ExampleClassifier,
+        margin: float = LOCAL_ROUTER_MARGIN,
+    ):
+        self.embeddings = embeddings
+        self.retrieve_classifier = retrieve_classifier
+        self.topic_classifier = topic_classifier
+        self.margin = margin
+        self.counts = {"retrieve_local": 0, "retrieve_fallback": 0, "topic_local": 0, "topic_fallback": 0}
+
+    def decide(self, vector: list[float], margin: Optional[float] = None) -> LocalDecision:
+        """
+        Args:
+            vector: 問題的嵌入向量
+            margin: 覆寫信心門檻
+
+        Returns:
+            LocalDecision: 信心足夠的判斷結果
+        """
+        margin = self.margin if margin is None else margin
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        query = query / norm if norm else query
+        retrieve, retrieve_margin = self.retrieve_classifier.classify(query)
+        topic, topic_margin = self.topic_classifier.classify(query)
+        return LocalDecision(
+            Retrieve=retrieve if retrieve_margin >= margin else None,
+            LegalTopic=topic if topic_margin >= margin else None,
+            retrieve_margin=retrieve_margin,
+            topic_margin=topic_margin,
+        )
+
+    async def aroute(self, question: str, margin: Optional[float] = None) -> LocalDecision:
+        """嵌入問題後判斷（問題的向量會進入嵌入快取，檢索時不需重新呼叫API）"""
+        return self.decide(await self.embeddings.aembed_query(question), margin)
+
+    def record(self, kind: str, local: bool):
+        """記錄 kind（"retrieve" 或 "topic"）由本地判斷或改用LLM"""
+        self.counts[f"{kind}_{'local' if local else 'fallback'}"] += 1
+
+    def stats(self) -> dict:
+        """
+        獲取本地判斷與改用LLM的統計
+        """
+        stats: dict = {"method": self.retrieve_classifier.method, "margin": self.margin, **self.counts}
+        for kind in ("retrieve", "topic"):
+            total = self.counts[f"{kind}_local"] + self.counts[f"{kind}_fallback"]
+            stats[f"{kind}_fallback_rate"] = self.counts[f"{kind}_fallback"] / total if total else 0.0
+        return stats
+
+
+def load_routing_examples(path: str = ROUTING_EXAMPLES_PATH) -> list[dict]:
+    """
+    讀取帶標籤的範例問題，只保留註冊表中的領域
+
+    Args:
+        path: JSON 檔案路徑，每筆包含 question、Retrieve 與（Retrieve 為 Yes 時）LegalTopic
+
+    Returns:
+        list[dict]: 範例列表
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        examples = json.load(f)
+    topic_names = {topic.name for topic in TOPICS}
+    return [
+        example for example in examples
+        if example["Retrieve"] == "No" or example.get("LegalTopic") in topic_names
+    ]
+
+
+def load_topic_tags() -> list[tuple[str, str]]:
+    """
+    各領域資料檔案中的 tags 詞彙
+
+    Returns:
+        list[tuple[str, str]]: (tag, 領域名稱)，同一領域內不重複
+    """
+    pairs = []
+    for topic in TOPICS:
+        if not os.path.exists(topic.data_file):
+            continue
+        tags = {tag for item in iter_json_records(topic.data_file) for tag in item.get("tags", [])}
+        pairs.extend((tag, topic.name) for tag in sorted(tags))
+    return pairs
+
+
+def build_classifiers(
+    examples: list[dict],
+    example_vectors: np.ndarray,
+    tags: list[tuple[str, str]],
+    tag_vectors: np.ndarray,
+    method: str = LOCAL_ROUTER_METHOD,
+    k: int = LOCAL_ROUTER_K,
+) -> tuple[ExampleClassifier, ExampleClassifier]:
+    """
+    以已嵌入的範例與 tags 建立 Retrieve 與 LegalTopic 分類器（tags 視為需要檢索的該領域範例）
+
+    Returns:
+        tuple[ExampleClassifier, ExampleClassifier]: (retrieve_classifier, topic_classifier)
+    """
+    retrieve_labels = [example["Retrieve"] for example in examples] + ["Yes"] * len(tags)
+    retrieve_vectors = np.vstack([example_vectors, tag_vectors]) if tags else example_vectors
+    retrieve_classifier = ExampleClassifier(retrieve_vectors, retrieve_labels, method, k)
+
+    legal = [i for i, example in enumerate(examples) if example["Retrieve"] == "Yes"]
+    topic_labels = [examples[i]["LegalTopic"] for i in legal] + [topic for _, topic in tags]
+    topic_vectors = np.vstack([example_vectors[legal], tag_vectors]) if tags else example_vectors[legal]
+    topic_classifier = ExampleClassifier(topic_vectors, topic_labels, method, k)
+    return retrieve_classifier, topic_classifier
+
+
+def create_local_router() -> LocalRouter:
+    '''
+    Embed the routing examples and tags once (through the embedding cache) and build both classifiers
+    '''
+    from .embeddings import get_embeddings
+
+    embeddings = get_embeddings()
+    examples = load_routing_examples()
+    tags = load_topic_tags()
+    example_vectors = np.asarray(embeddings.embed_documents([e["question"] for e in examples]), dtype=np.float32)
+    tag_vectors = np.asarray(embeddings.embed_documents([tag for tag, _ in tags]), dtype=np.float32) if tags else None
+    return LocalRouter(embeddings, *build_classifiers(examples, example_vectors, tags, tag_vectors))
+
+
+get_local_router = lazy_singleton(create_local_router)
+
+
+async def local_route(question: str, chat_history: str, config=None) -> Optional[LocalDecision]:
+    """
+    ROUTER_BACKEND（或 configurable "router_backend"）為 "local" 時以本地路由器判斷
+
+    Args:
+        question: 使用者問題
+        chat_history: chat_history 節點渲染的對話歷史
+        config: 節點收到的 RunnableConfig，可用 "local_router_margin" 覆寫信心門檻
+
+    Returns:
+        Optional[LocalDecision]: 使用LLM路由時返回 None；已有對話歷史時返回全部欄位為 None 的結果（改用LLM）
+    """
+    if get_configurable(config, "router_backend", ROUTER_BACKEND) != "local":
+        return None
+    # 第一次使用時要嵌入所有範例與 tags 並讀取資料檔案，在執行緒中建立以免阻塞事件迴圈
+    router = get_local_router() if get_local_router.built else await asyncio.to_thread(get_local_router)
+    if chat_history and chat_history != NO_HISTORY:
+        return LocalDecision()
+    return await router.aroute(question, get_configurable(config, "local_router_margin"))
@@ -1,22 +1,99 @@
 from dotenv import load_dotenv
 import os
-from langchain_openai import ChatOpenAI
+from typing import TYPE_CHECKING, Optional
+from pydantic import BaseModel
+from langchain_core.runnables import Runnable
+from .config import env_bool, env_int
+from .llm_cache import LLMCallCache, CachedRunnable
+from .admission import admission, AdmittedRunnable
+from .lazy import LazyRunnable, lazy_singleton
+
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
 
 load_dotenv()
 
-def create_model() -> ChatOpenAI:
+MODEL_TEMPERATURE = 0.1
+REASONING_MODEL_TEMPERATURE = 1.0
+
+def create_model() -> "ChatOpenAI":
     '''
     Normal model
     '''
+    from langchain_openai import ChatOpenAI
+
     model = os.getenv("OPENAI_MODEL")
-    return  ChatOpenAI(model=model, temperature=0.1)
+    # Rate-limit retries are handled by the shared backoff in admission, not per client call.
+    return  ChatOpenAI(model=model, temperature=MODEL_TEMPERATURE, max_retries=0)
 
-def create_reasoning_model() -> ChatOpenAI:
+def create_reasoning_model() -> "ChatOpenAI":
     '''
     Reasoning model
     '''
+    from langchain_openai import ChatOpenAI
+
     model = os.getenv("OPENAI_REASONING_MODEL")
-    return ChatOpenAI(model=model, temperature=1.0)
+    return ChatOpenAI(model=model, temperature=REASONING_MODEL_TEMPERATURE, max_retries=0)
+
+def create_llm_cache() -> Optional[LLMCallCache]:
+    '''
+    LLM call cache, enabled by LLM_CACHE_ENABLED
+    '''
+    if not env_bool("LLM_CACHE_ENABLED", False):
+        return None
+    return LLMCallCache(
+        max_entries=env_int("LLM_CACHE_MAX_ENTRIES", 2048),
+        sqlite_path=os.getenv("LLM_CACHE_SQLITE_PATH") or None,
+    )
+
+# The OpenAI clients are built on first use (or by warm_up), not when the nodes are imported.
+get_llm = lazy_singleton(create_model)
+get_reasoning_chat_model = lazy_singleton(create_reasoning_model)
+llm_cache = create_llm_cache()
+
+# Every LLM call waits for a global slot (interactive requests first) and shares one rate-limit backoff.
+reasoning_model = AdmittedRunnable(LazyRunnable(get_reasoning_chat_model), admission)
+
+# Nodes whose structured-output calls on llm may be served from llm_cache.
+LLM_CACHE_NODES = {
+    node.strip()
+    for node in os.getenv("LLM_CACHE_NODES", "semantic_router,query_router,retriever,generator,critic").split(",")
+    if node.strip()
+}
+
+def _cache_namespace(model_name: Optional[str], temperature: float, node: str, schema: Optional[type[BaseModel]]) -> str:
+    schema_name = schema.__name__ if schema is not None else "text"
+    return f"{model_name}|{temperature}|{node}|{schema_name}"
+
+def structured_llm(schema: type[BaseModel], node: str) -> Runnable:
+    '''
+    llm.with_structured_output(schema) under admission control, served from llm_cache when enabled for node
+    '''
+    runnable = AdmittedRunnable(LazyRunnable(lambda: get_llm().with_structured_output(schema)), admission)
+    if llm_cache is None or node not in LLM_CACHE_NODES:
+        return runnable
+    namespace = _cache_namespace(os.getenv("OPENAI_MODEL"), MODEL_TEMPERATURE, node, schema)
+    return CachedRunnable(runnable, llm_cache, namespace, schema)
+
+# The temperature-1.0 reasoning model is sampled on purpose; cache it only when explicitly asked.
+if llm_cache is not None and env_bool("LLM_CACHE_REASONING_MODEL", False):
+    reasoning_model = CachedRunnable(
+        reasoning_model,
+        llm_cache,
+        _cache_namespace(os.getenv("OPENAI_REASONING_MODEL"), REASONING_MODEL_TEMPERATURE, "reasoning_model", None),
+    )
+
+def warm_up():
+    '''
+    Build both OpenAI clients ahead of the first request
+    '''
+    get_llm()
+    get_reasoning_chat_model()
 
-llm = create_model()
-reasoning_model = create_reasoning_model()
\ No newline at end of file
+def __getattr__(name: str):
+    # Backwards-compatible module attributes; each access builds the client if needed.
+    if name == "llm":
+        return get_llm()
+    if name == "reasoning_chat_model":
+        return get_reasoning_chat_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,226 @@
+"""
+語義回應快取 - 以問題嵌入向量比對相似問題，命中時直接返回先前的答案
+
+快取資料存放於本地 SQLite，嵌入向量以 float32 blob 儲存；
+每個法律領域在記憶體中維護一份正規化後的向量矩陣以加速比對。
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+import numpy as np
+from .config import env_bool, env_float, env_int
+
+SEMANTIC_CACHE_ENABLED = env_bool("SEMANTIC_CACHE_ENABLED", False)
+SEMANTIC_CACHE_PATH = os.getenv("SEMANTIC_CACHE_PATH", "./vectorDB/semantic_cache.sqlite3")
+
+
+class SemanticCache:
+    """
+    以相似度閾值命中的問答快取，支援 TTL 與 LRU 淘汰
+
+    Args:
+        db_path: SQLite 檔案路徑
+        threshold: 餘弦相似度閾值，高於此值視為命中
+        ttl_seconds: 快取項目存活秒數
+        max_entries: 快取項目上限，超過時淘汰最久未使用的項目
+    """
+
+    def __init__(self, db_path: str, threshold: float = 0.95, ttl_seconds: int = 86400, max_entries: int = 5000):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # topic -> (ids, 正規化向量矩陣)，寫入時附加新的一列，有項目被淘汰時失效並於下次查詢時重建
+        self._index: dict[str, tuple[list[int], np.ndarray]] = {}
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS semantic_cache (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                topic TEXT NOT NULL,
+                question TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_semantic_cache_topic ON semantic_cache(topic)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_semantic_cache_created ON semantic_cache(created_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_semantic_cache_access ON semantic_cache(last_access)")
+        self._conn.commit()
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM semantic_cache").fetchone()[0]
+
+    def _load_index(self, topic: str) -> tuple[list[int], np.ndarray]:
+        if topic not in self._index:
+            rows = self._conn.execute(
+                "SELECT id, embedding FROM semantic_cache WHERE topic = ? AND created_at >= ?",
+                (topic, time.time() - self.ttl_seconds),
+            ).fetchall()
+            ids = [row[0] for row in rows]
+            if rows:
+                matrix = np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+            else:
+                matrix = np.empty((0, 0), dtype=np.float32)
+            self._index[topic] = (ids, matrix)
+        return self._index[topic]
+
+    def lookup(self, embedding: list[float], topic: str) -> Optional[str]:
+        """
+        查詢同一法律領域中最相似的快取答案
+
+        Args:
+            embedding: 問題的嵌入向量
+            topic: 法律領域
+
+        Returns:
+            Optional[str]: 命中時返回快取答案，否則返回 None
+        """
+        query = _normalize(embedding)
+        with self._lock:
+            ids, matrix = self._load_index(topic)
+            if not ids or matrix.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+
+            similarities = matrix @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            now = time.time()
+            row = self._conn.execute(
+                "SELECT answer, created_at FROM semantic_cache WHERE id = ?", (ids[best],)
+            ).fetchone()
+            if row is None or row[1] < now - self.ttl_seconds:
+                # 項目已過期，清除後重建索引
+                if self._purge_expired(now) or row is None:
+                    self._index.clear()
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE semantic_cache SET last_access = ? WHERE id = ?", (now, ids[best]))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def store(self, embedding: list[float], topic: str, question: str, answer: str):
+        """
+        寫入快取項目，並執行 TTL 與 LRU 淘汰
+
+        Args:
+            embedding: 問題的嵌入向量
+            topic: 法律領域
+            question: 原始問題
+            answer: 最終答案
+        """
+        vector = _normalize(embedding)
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO semantic_cache (topic, question, embedding, answer, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (topic, question, vector.tobytes(), answer, now, now),
+            )
+            row_id = cursor.lastrowid
+            self._entries += 1
+            deleted = self._purge_expired(now)
+            if self._entries > self.max_entries:
+                cursor = self._conn.execute(
+                    "DELETE FROM semantic_cache WHERE id IN ("
+                    "SELECT id FROM semantic_cache ORDER BY last_access ASC LIMIT ?)",
+                    (self._entries - self.max_entries,),
+                )
+                self._entries -= cursor.rowcount
+                deleted += cursor.rowcount
+            self._conn.commit()
+
+            if deleted:
+                self._index.clear()
+            elif topic in self._index:
+                # 只附加新的一列，不重新讀取整個領域的向量
+                ids, matrix = self._index[topic]
+                if not ids:
+                    self._index[topic] = ([row_id], vector[None, :])
+                elif matrix.shape[1] == vector.shape[0]:
+                    self._index[topic] = (ids + [row_id], np.vstack([matrix, vector[None, :]]))
+                else:
+                    del self._index[topic]
+
+    def _purge_expired(self, now: float) -> int:
+        # 返回刪除的項目數，由呼叫端決定是否使索引失效並提交
+        cursor = self._conn.execute("DELETE FROM semantic_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._entries -= cursor.rowcount
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        """
+        獲取快取命中統計
+
+        Returns:
+            dict: 命中數、未命中數、命中率與項目數
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM semantic_cache").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "enabled": True,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": entries,
+            "threshold": self.threshold,
+        }
+
+
+def _normalize(embedding: list[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def detect_topic(embedding: list[float]) -> str:
+    """
+    以向量資料庫中最接近的文件判斷問題所屬的法律領域（不呼叫LLM）
+
+    Args:
+        embedding: 問題的嵌入向量
+
+    Returns:
+        str: 領域註冊表中的領域名稱（例如 "Criminal"）
+    """
+    from .tools import get_topic_vector_stores
+
+    topic_vector_stores = get_topic_vector_stores()
+    best_topic, best_distance = next(iter(topic_vector_stores)), float("inf")
+    for topic, vector_store in topic_vector_stores.items():
+        results = vector_store.similarity_search_by_vector_with_relevance_scores(embedding, k=1)
+        if results and results[0][1] < best_distance:
+            best_topic, best_distance = topic, results[0][1]
+    return best_topic
+
+
+def create_semantic_cache() -> Optional[SemanticCache]:
+    '''
+    依環境變數建立語義快取，未啟用時返回 None
+    '''
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    return SemanticCache(
+        db_path=SEMANTIC_CACHE_PATH,
+        threshold=env_float("SEMANTIC_CACHE_THRESHOLD", 0.95),
+        ttl_seconds=env_int("SEMANTIC_CACHE_TTL_SECONDS", 86400),
+        max_entries=env_int("SEMANTIC_CACHE_MAX_ENTRIES", 5000),
+    )
+
+
+semantic_cache = create_semantic_cache()
@@ -1,11 +1,17 @@
 from langgraph.graph import MessagesState
 from typing import Literal, Optional
 from langchain_core.documents import Document
+from .topics import LegalTopicName
 
 
 class LegalConsultState(MessagesState):
     question: str
+    chat_history: str
+    history_summary: str
+    summarized_count: int
     documents: list[Document]
+    LegalTopic: LegalTopicName
+    Query: str
     Retrieve: Literal["Yes", "No"]
     IsRelevant: list[Literal["Yes", "No"]]
     IsSupport: Optional[list[Literal["Fully", "Partial", "No"]]]
@@ -1,29 +1,210 @@
 '''
 ChromaDB Retrieval Tool
 '''
-from langchain_chroma import Chroma
-from .embeddings import embeddings
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from .config import env_int
+from .embeddings import get_embeddings
+from .lazy import lazy_singleton
+from .vector_index import NumpyVectorIndex, NumpyTopicRetriever
+from .lexical_index import LexicalIndex, load_lexical_index
+from .topics import TOPICS, get_topic
 
+if TYPE_CHECKING:
+    import chromadb
+    from langchain_chroma import Chroma
 
-criminal_vector_store = Chroma(
-    collection_name="criminal_collection",
-    embedding_function=embeddings,
-    persist_directory="./vectorDB",
-)
-criminal_retriever = criminal_vector_store.as_retriever()
 
+PERSIST_DIRECTORY = "./vectorDB"
 
-money_debt_vector_store = Chroma(
-    collection_name="money_debt_collection",
-    embedding_function=embeddings,
-    persist_directory="./vectorDB",
-)
-money_debt_retriever = money_debt_vector_store.as_retriever()
 
+@lazy_singleton
+def get_chroma_client() -> "chromadb.ClientAPI":
+    '''
+    One process-wide Chroma client; every topic collection shares its SQLite handle and segment cache
+    '''
+    import chromadb
 
-marriage_vector_store = Chroma(
-    collection_name="marriage_collection",
-    embedding_function=embeddings,
-    persist_directory="./vectorDB",
-)
-marriage_retriever = marriage_vector_store.as_retriever()
+    return chromadb.PersistentClient(path=PERSIST_DIRECTORY)
+
+
+def create_vector_store(collection_name: str) -> "Chroma":
+    # langchain_chroma pulls in chromadb, so it is only imported once a store is needed.
+    from langchain_chroma import Chroma
+
+    return Chroma(
+        collection_name=collection_name,
+        embedding_function=get_embeddings(),
+        client=get_chroma_client(),
+    )
+
+
+@lazy_singleton
+def get_topic_vector_stores() -> dict[str, "Chroma"]:
+    return {topic.name: create_vector_store(topic.collection) for topic in TOPICS}
+
+
+topic_data_files = {topic.name: topic.data_file for topic in TOPICS}
+
+# BM25 inverted indexes are built by data_loader next to the data files; no embedding call needed.
+@lazy_singleton
+def get_lexical_index() -> Optional[LexicalIndex]:
+    return load_lexical_index(topic_data_files)
+
+
+# VECTOR_BACKEND=numpy loads every collection into one in-memory NumPy index on first use and
+# serves the same retriever interface from it; Chroma remains the store of record.
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+
+@lazy_singleton
+def get_vector_index() -> Optional[NumpyVectorIndex]:
+    if VECTOR_BACKEND != "numpy":
+        return None
+    return NumpyVectorIndex.from_vector_stores(get_topic_vector_stores())
+
+
+def create_retriever(topic_name: str, k: Optional[int] = None) -> BaseRetriever:
+    '''
+    Retriever for one topic with the search parameters from its registry entry; k defaults to its retriever_k
+    '''
+    topic = get_topic(topic_name)
+    k = k or topic.retriever_k
+    vector_index = get_vector_index()
+    if vector_index is not None:
+        # The NumPy index only does plain top-k similarity; refuse settings it would silently drop.
+        if topic.search_type != "similarity" or topic.search_kwargs:
+            raise ValueError(
+                f"VECTOR_BACKEND=numpy 只支援 search_type=\"similarity\" 且不支援 search_kwargs，"
+                f"請修改領域 {topic.name} 的設定（目前為 {topic.search_type!r}, {topic.search_kwargs!r}）"
+            )
+        return NumpyTopicRetriever(index=vector_index, embeddings=get_embeddings(), topic=topic.name, k=k)
+    return get_topic_vector_stores()[topic.name].as_retriever(
+        search_type=topic.search_type,
+        search_kwargs={**topic.search_kwargs, "k": k},
+    )
+
+
+@lazy_singleton
+def get_topic_retrievers() -> dict[str, BaseRetriever]:
+    return {topic.name: create_retriever(topic.name) for topic in TOPICS}
+
+
+def get_retriever(topic: str, k: Optional[int] = None) -> BaseRetriever:
+    '''
+    The shared retriever of a topic, or a new one when a different k is requested (building one is cheap)
+    '''
+    if k is None or k == get_topic(topic).retriever_k:
+        return get_topic_retrievers()[topic]
+    return create_retriever(topic, k)
+
+
+def warm_up():
+    '''
+    Build the embeddings client, open the vector stores and load the indexes ahead of the first request
+    '''
+    get_topic_retrievers()
+    get_lexical_index()
+
+
+# Backwards-compatible module attributes, resolved (and built) on first access.
+# Per-topic names (criminal_vector_store, criminal_retriever, ...) follow the registry.
+_LAZY_ATTRIBUTES = {
+    "embeddings": get_embeddings,
+    "topic_vector_stores": get_topic_vector_stores,
+    "lexical_index": get_lexical_index,
+    "vector_index": get_vector_index,
+}
+for _topic in TOPICS:
+    _LAZY_ATTRIBUTES[f"{_topic.alias}_vector_store"] = lambda name=_topic.name: get_topic_vector_stores()[name]
+    _LAZY_ATTRIBUTES[f"{_topic.alias}_retriever"] = lambda name=_topic.name: get_retriever(name)
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Chroma queries and the embedding HTTP call are blocking; run them on a dedicated, bounded pool
+# so they never stall the event loop and cannot exhaust the default executor.
+RETRIEVER_THREAD_POOL_SIZE = env_int("RETRIEVER_THREAD_POOL_SIZE", 8)
+retrieval_executor = ThreadPoolExecutor(max_workers=RETRIEVER_THREAD_POOL_SIZE, thread_name_prefix="retriever")
+
+
+async def aretrieve(vector_retriever: BaseRetriever, query: str) -> list[Document]:
+    '''
+    Non-blocking retriever.invoke on the retrieval thread pool
+    '''
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(retrieval_executor, vector_retriever.invoke, query)
+
+
+RRF_K = 60
+
+
+def rrf_fuse(ranked_lists: list[list[Document]], k: int = 4) -> list[Document]:
+    '''
+    Reciprocal-rank fusion of several ranked document lists, deduplicated by metadata["id"]
+    '''
+    scores: dict[str, float] = {}
+    documents: dict[str, Document] = {}
+    for ranked in ranked_lists:
+        for rank, doc in enumerate(ranked):
+            key = doc.metadata.get("id") or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (RRF_K + rank + 1)
+            documents.setdefault(key, doc)
+    ranked_keys = sorted(scores, key=lambda key: scores[key], reverse=True)[:k]
+    return [documents[key] for key in ranked_keys]
+
+
+async def _search_topic(topic: str, vector: list[float], k: int) -> list[tuple[Document, float]]:
+    # (document, score) with higher score meaning more similar, whichever backend answers.
+    vector_index = get_vector_index()
+    if vector_index is not None:
+        return vector_index.search(vector, k, vector_index.mask([topic]))
+    loop = asyncio.get_running_loop()
+    hits = await loop.run_in_executor(
+        retrieval_executor,
+        get_topic_vector_stores()[topic].similarity_search_by_vector_with_relevance_scores,
+        vector,
+        k,
+    )
+    return [(doc, -distance) for doc, distance in hits]
+
+
+async def afusion_search(
+    query: str,
+    k: int = 4,
+    topics: list[str] = None,
+    method: str = "score",
+) -> list[tuple[Document, float]]:
+    '''
+    Query several topic collections concurrently and fuse them into one global top-k.
+
+    The query is embedded once and every collection is searched by vector on the retrieval pool.
+    method="score" ranks by raw similarity (all collections share one embedding space);
+    method="rrf" ranks by reciprocal-rank fusion. Returned documents carry metadata["topic"].
+    '''
+    topics = topics or list(topic_data_files)
+    vector = await get_embeddings().aembed_query(query)
+
+    vector_index = get_vector_index()
+    if vector_index is not None and method == "score":
+        # One masked matrix-vector product already yields the global top-k.
+        return vector_index.search(vector, k, vector_index.mask(topics))
+
+    results = await asyncio.gather(*[_search_topic(topic, vector, k) for topic in topics])
+
+    fused: list[tuple[Document, float, float]] = []
+    for topic, hits in zip(topics, results):
+        for rank, (doc, similarity) in enumerate(hits):
+            doc.metadata["topic"] = topic
+            score = 1.0 / (RRF_K + rank + 1) if method == "rrf" else similarity
+            fused.append((doc, score, similarity))
+    # Equal RRF ranks across collections are broken by similarity.
+    fused.sort(key=lambda item: (item[1], item[2]), reverse=True)
+    return [(doc, score) for doc, score, _ in fused[:k]]
@@ -0,0 +1,110 @@
+"""
+法律領域註冊表 - 每個領域的名稱、collection、資料檔案與檢索參數
+
+檢索節點、路由的 LegalTopic 選項、資料載入與語義快取都由此產生；
+新增領域只需在 TOPIC_REGISTRY_PATH 指定的 JSON 檔案（或 DEFAULT_TOPICS）加入一筆並準備資料檔案。
+
+JSON 格式為領域設定的陣列，欄位同 TopicConfig，例如:
+[{"name": "Labor", "collection": "labor_collection", "data_file": "./vectorDB/data/labor.json",
+  "label": "勞動法", "description": "labor law", "retriever_k": 4}]
+"""
+
+import json
+import os
+from typing import Any, Literal, Optional
+from pydantic import BaseModel, Field
+
+
+class TopicConfig(BaseModel):
+    """
+    單一法律領域的設定
+
+    Args:
+        name: LegalTopic 的值（LLM 從中選擇）
+        collection: 向量資料庫的 collection 名稱
+        data_file: JSON 資料檔案路徑
+        label: 顯示用的中文名稱
+        description: 提供給 LLM 的英文說明
+        retriever_k: 單一領域檢索返回的文件數
+        search_type: Chroma 檢索方式（"similarity"、"mmr" 或 "similarity_score_threshold"）
+        search_kwargs: 其他檢索參數，例如 {"fetch_k": 20} 或 {"score_threshold": 0.3}
+    """
+
+    name: str
+    collection: str
+    data_file: str
+    label: str
+    description: str
+    retriever_k: int = 4
+    search_type: str = "similarity"
+    search_kwargs: dict[str, Any] = Field(default_factory=dict)
+
+    @property
+    def alias(self) -> str:
+        """collection 名稱去掉 _collection，用於 tools 模組的相容屬性（例如 criminal_retriever）"""
+        return self.collection.removesuffix("_collection")
+
+
+DEFAULT_TOPICS: list[dict[str, Any]] = [
+    {
+        "name": "Criminal",
+        "collection": "criminal_collection",
+        "data_file": "./vectorDB/data/criminal.json",
+        "label": "刑法",
+        "description": "criminal law",
+    },
+    {
+        "name": "Marriage",
+        "collection": "marriage_collection",
+        "data_file": "./vectorDB/data/marriage.json",
+        "label": "婚姻法",
+        "description": "marriage and family law",
+    },
+    {
+        "name": "MoneyDebt",
+        "collection": "money_debt_collection",
+        "data_file": "./vectorDB/data/money_debt.json",
+        "label": "債務法",
+        "description": "money debt law",
+    },
+]
+
+
+def load_topic_registry(path: Optional[str] = None) -> list[TopicConfig]:
+    """
+    載入領域註冊表
+
+    Args:
+        path: JSON 檔案路徑，未指定時使用 DEFAULT_TOPICS
+
+    Returns:
+        list[TopicConfig]: 依設定順序的領域列表
+    """
+    entries = DEFAULT_TOPICS
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    topics = [TopicConfig(**entry) for entry in entries]
+    names = [topic.name for topic in topics]
+    if not topics or len(set(names)) != len(names):
+        raise ValueError(f"領域註冊表必須至少有一個領域且名稱不可重複: {names}")
+    return topics
+
+
+TOPICS = load_topic_registry(os.getenv("TOPIC_REGISTRY_PATH") or None)
+TOPICS_BY_NAME = {topic.name: topic for topic in TOPICS}
+TOPIC_NAMES = tuple(TOPICS_BY_NAME)
+
+# Literal["Criminal", "Marriage", ...] generated from the registry, for state and structured output.
+LegalTopicName = Literal[TOPIC_NAMES]
+
+
+def get_topic(name: str) -> TopicConfig:
+    return TOPICS_BY_NAME[name]
+
+
+def describe_topics() -> str:
+    '''
+    "Criminal (criminal law), Marriage (...)" for prompts and schema descriptions
+    '''
+    return ", ".join(f"{topic.name} ({topic.description})" for topic in TOPICS)
@@ -0,0 +1,134 @@
+"""
+記憶體內 NumPy 向量索引 - 取代每次查詢都經過 Chroma/SQLite 的檢索路徑
+
+啟動時一次性從各 Chroma collection 讀出所有向量，合併為一個連續的 float32 矩陣並預先正規化；
+查詢時以一次矩陣向量乘積加上 argpartition 取得 top-k，領域與分類過濾使用預先計算的布林遮罩。
+"""
+
+from typing import Optional
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun, AsyncCallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+
+
+class NumpyVectorIndex:
+    """
+    所有法律領域共用的記憶體內向量索引
+
+    Args:
+        vectors: (N, D) 向量矩陣
+        documents: 與向量對應的 Document 列表，metadata 需包含 "topic"
+    """
+
+    def __init__(self, vectors: np.ndarray, documents: list[Document]):
+        matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.matrix = matrix / norms
+        self.documents = documents
+        self.topic_masks: dict[str, np.ndarray] = {}
+        self.category_masks: dict[str, np.ndarray] = {}
+        for i, doc in enumerate(documents):
+            for masks, value in (
+                (self.topic_masks, doc.metadata.get("topic")),
+                (self.category_masks, doc.metadata.get("category")),
+            ):
+                if value is None:
+                    continue
+                if value not in masks:
+                    masks[value] = np.zeros(len(documents), dtype=bool)
+                masks[value][i] = True
+
+    @classmethod
+    def from_vector_stores(cls, topic_vector_stores: dict) -> "NumpyVectorIndex":
+        """
+        從各領域的 Chroma vector store 載入所有向量
+
+        Args:
+            topic_vector_stores: 領域名稱 -> Chroma vector store
+
+        Returns:
+            NumpyVectorIndex: 建立完成的索引
+        """
+        blocks: list[np.ndarray] = []
+        documents: list[Document] = []
+        for topic, vector_store in topic_vector_stores.items():
+            data = vector_store.get(include=["embeddings", "documents", "metadatas"])
+            if len(data["ids"]) == 0:
+                continue
+            blocks.append(np.asarray(data["embeddings"], dtype=np.float32))
+            for doc_id, content, metadata in zip(data["ids"], data["documents"], data["metadatas"]):
+                documents.append(Document(id=doc_id, page_content=content, metadata={**(metadata or {}), "topic": topic}))
+        vectors = np.vstack(blocks) if blocks else np.empty((0, 0), dtype=np.float32)
+        return cls(vectors, documents)
+
+    def mask(self, topics: Optional[list[str]] = None, category: Optional[str] = None) -> Optional[np.ndarray]:
+        """組合領域與分類的布林遮罩，無條件時返回 None"""
+        if topics and len(topics) == 1 and category is None:
+            return self.topic_masks.get(topics[0], np.zeros(len(self.documents), dtype=bool))
+        result = None
+        if topics:
+            result = np.zeros(len(self.documents), dtype=bool)
+            for topic in topics:
+                if topic in self.topic_masks:
+                    result |= self.topic_masks[topic]
+        if category is not None:
+            category_mask = self.category_masks.get(category, np.zeros(len(self.documents), dtype=bool))
+            result = category_mask if result is None else result & category_mask
+        return result
+
+    def search(self, vector: list[float], k: int = 4, mask: Optional[np.ndarray] = None) -> list[tuple[Document, float]]:
+        """
+        以餘弦相似度查詢 top-k
+
+        Args:
+            vector: 查詢向量
+            k: 返回數量
+            mask: 可選的布林遮罩，只在 True 的位置中查詢
+
+        Returns:
+            list[tuple[Document, float]]: (文件, 相似度) 列表，依相似度降序
+        """
+        if not self.documents:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        scores = self.matrix @ query
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+            k = min(k, int(mask.sum()))
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        # 淺複製並複製 metadata，呼叫端修改結果不會影響索引
+        return [
+            (self.documents[i].model_copy(update={"metadata": dict(self.documents[i].metadata)}), float(scores[i]))
+            for i in top
+        ]
+
+
+class NumpyTopicRetriever(BaseRetriever):
+    """以 NumpyVectorIndex 查詢單一領域的檢索器，介面與 Chroma 的 as_retriever() 相同"""
+
+    index: NumpyVectorIndex
+    embeddings: Embeddings
+    topic: str
+    k: int = 4
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        vector = self.embeddings.embed_query(query)
+        return [doc for doc, _ in self.index.search(vector, self.k, self.index.mask([self.topic]))]
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        vector = await self.embeddings.aembed_query(query)
+        return [doc for doc, _ in self.index.search(vector, self.k, self.index.mask([self.topic]))]
@@ -6,13 +6,19 @@
 uv run python load_data.py [選項]
 
 選項:
---force: 強制重新載入所有資料，即使檔案未更改
---status: 顯示所有collection的狀態資訊
---clear-hash: 清理所有雜湊檔案（下次執行會重新載入所有資料）
+--force: 強制清空collection並重新載入所有資料，即使檔案未更改
+（預設只嵌入並寫入新增或更改的資料，並刪除已移除的資料）
+--status: 顯示所有collection的狀態資訊（文件數、分類、資料清單雜湊值與磁碟大小；不需網路與API金鑰）
+--clear-hash: 清理所有雜湊檔案與資料清單（下次執行會重新嵌入所有資料）
+--batch-size N: 每次嵌入API呼叫的資料筆數（預設 INGEST_BATCH_SIZE=64）
+--concurrency N: 同時進行的嵌入批次數（預設 INGEST_MAX_CONCURRENCY=4）
+
+三個collection同時處理；每個批次寫入後即記錄在資料清單中，中斷後重新執行會從未完成的批次繼續。
 
 範例:
-uv run python load_data.py          # 正常載入（跳過未更改的檔案）
+uv run python load_data.py          # 正常載入（跳過未更改的檔案與資料）
 uv run python load_data.py --force  # 強制重新載入所有資料
+uv run python load_data.py --batch-size 128 --concurrency 8 # 大量資料載入
 uv run python load_data.py --status # 檢查collection狀態
 uv run python load_data.py --clear-hash # 清理雜湊檔案
 """
@@ -33,6 +39,12 @@ def main():
     force_reload = "--force" in sys.argv
     show_status = "--status" in sys.argv
     clear_hash = "--clear-hash" in sys.argv
+    batch_size = None
+    concurrency = None
+    if "--batch-size" in sys.argv:
+        batch_size = int(sys.argv[sys.argv.index("--batch-size") + 1])
+    if "--concurrency" in sys.argv:
+        concurrency = int(sys.argv[sys.argv.index("--concurrency") + 1])
     
     if clear_hash:
         print("清理雜湊檔案...")
@@ -52,7 +64,7 @@ def main():
     
     try:
         # 載入資料
-        load_data_to_vector_store(force_reload=force_reload)
+        load_data_to_vector_store(force_reload=force_reload, batch_size=batch_size, max_concurrency=concurrency)
         
         # 測試檢索
         test_vector_stores()
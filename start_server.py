@@ -3,23 +3,74 @@
 整合FastAPI應用和啟動功能
 """
 
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, AsyncIterator, Literal
 import asyncio
+import json
 import uuid
 import uvicorn
 import sys
 import os
 import time
+from langchain_core.messages import AIMessage, HumanMessage
 from legal_consult_agent.agent import graph
+from legal_consult_agent.nodes.reranker import calculate_score
+from legal_consult_agent.utils.embeddings import get_embeddings
+from legal_consult_agent.utils.embedding_cache import CachedEmbeddings
+from legal_consult_agent.utils.models import llm_cache, warm_up as warm_up_models
+from legal_consult_agent.utils.semantic_cache import semantic_cache, detect_topic
+from legal_consult_agent.utils.tools import retrieval_executor, warm_up as warm_up_retrieval
+from legal_consult_agent.utils.config import env_bool, env_int
+from legal_consult_agent.utils.admission import admission, INTERACTIVE, BATCH
+from legal_consult_agent.utils.job_queue import job_store
+from legal_consult_agent.utils.local_router import ROUTER_BACKEND, get_local_router
+
+# 每個行程處理非同步任務的 worker 數量與輪詢間隔
+JOB_WORKERS = env_int("JOB_WORKERS", 2)
+JOB_POLL_INTERVAL = 1.0
+job_wakeup = asyncio.Event()
+
+# 模型客戶端與向量資料庫在第一次使用時才建立；啟用時於服務器啟動階段預先建立，避免第一個請求承擔建立成本
+WARM_UP_ON_STARTUP = env_bool("WARM_UP_ON_STARTUP", True)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """服務器生命週期：預先建立模型與向量資料庫並啟動任務 worker；關閉時停止 worker、等待進行中的檢索完成並關閉資料庫"""
+    if WARM_UP_ON_STARTUP:
+        start = time.perf_counter()
+        await asyncio.to_thread(warm_up_models)
+        await asyncio.to_thread(warm_up_retrieval)
+        if ROUTER_BACKEND == "local":
+            await asyncio.to_thread(get_local_router)
+        print(f"模型與向量資料庫已就緒（{time.perf_counter() - start:.2f}s）")
+    workers = [asyncio.create_task(_job_worker()) for _ in range(JOB_WORKERS)]
+    yield
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    await asyncio.to_thread(retrieval_executor.shutdown, wait=True)
+    job_store.close()
+    close = getattr(graph.checkpointer, "close", None)
+    if close is not None:
+        close()
+
+def _embedding_cache_stats() -> dict:
+    """嵌入向量快取統計；嵌入模型尚未建立時不為了統計而建立"""
+    if not get_embeddings.built:
+        return {"built": False}
+    embeddings = get_embeddings()
+    return embeddings.stats() if isinstance(embeddings, CachedEmbeddings) else {"enabled": False}
 
 # 創建FastAPI應用
 app = FastAPI(
     title="法律諮詢聊天機器人API",
     description="基於LangGraph的法律諮詢服務",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # 添加CORS中間件
@@ -36,6 +87,13 @@ class ChatRequest(BaseModel):
     question: str
     thread_id: Optional[str] = None
     user_id: Optional[str] = None
+    generator_max_concurrency: Optional[int] = None  # 單一請求內生成節點的最大並行LLM呼叫數
+    critic_max_concurrency: Optional[int] = None  # 單一請求內評估節點的最大並行LLM呼叫數
+    relevance_gating: Optional[bool] = None  # 僅對相關文檔生成與評估答案
+    generation_mode: Optional[Literal["per_document", "fused"]] = None  # 每份文檔各生成一個候選答案，或以所有相關文檔生成單一答案
+    retrieval_mode: Optional[Literal["single", "fusion"]] = None  # 單一領域檢索或多領域融合檢索
+    routing_mode: Optional[Literal["two_step", "combined"]] = None  # 分兩次或以單次LLM呼叫決定檢索、領域與查詢
+    router_backend: Optional[Literal["llm", "local"]] = None  # 路由由LLM判斷，或先以本地嵌入分類器判斷
 
 # 響應模型
 class ChatResponse(BaseModel):
@@ -44,6 +102,7 @@ class ChatResponse(BaseModel):
     user_id: Optional[str] = None
     processing_time: float
     status: str = "success"
+    cached: bool = False
 
 class ErrorResponse(BaseModel):
     error: str
@@ -69,6 +128,7 @@ async def chat(request: ChatRequest):
         ChatResponse: 包含回答和相關資訊
     """
 
+    _admit(INTERACTIVE)
     try:
         return await _run_chat(request)
     except Exception as e:
@@ -76,12 +136,63 @@ async def chat(request: ChatRequest):
             status_code=500,
             detail=f"處理請求時發生錯誤: {str(e)}"
         )
+    finally:
+        admission.release(INTERACTIVE)
+
+# 串流聊天端點
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    法律諮詢串流聊天端點 (Server-Sent Events)
+
+    依序推送 start、route、retrieved、generated、critiqued 等節點進度事件，
+    接著以多個 answer 事件分段推送最終答案，最後推送 done 事件。
+    服務器忙碌時只推送一個 error 事件（包含 retry_after 秒數）。
+
+    Args:
+        request: 包含問題和可選的thread_id、user_id
+
+    Returns:
+        StreamingResponse: text/event-stream 串流回應
+    """
+    return StreamingResponse(
+        _admitted_stream(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _admitted_stream(request: ChatRequest) -> AsyncIterator[str]:
+    """開始串流時才准入，串流結束或客戶端斷線時釋放准入名額。
+    在串流開始前斷線時產生器不會執行，因此不能在端點中先取得名額。"""
+    if not admission.try_admit(INTERACTIVE):
+        yield _sse("error", {"error": "服務器忙碌中，請稍後再試", "retry_after": admission.retry_after_seconds()})
+        return
+    try:
+        async for event in _stream_chat(request):
+            yield event
+    finally:
+        admission.release(INTERACTIVE)
+
+# 單一批次內同時處理的問題數
+BATCH_MAX_CONCURRENCY = env_int("BATCH_MAX_CONCURRENCY", 4)
+
+def _admit(priority: str, count: int = 1):
+    """准入請求，已滿時以429拒絕並附上Retry-After。"""
+    if not admission.try_admit(priority, count):
+        raise HTTPException(
+            status_code=429,
+            detail="服務器忙碌中，請稍後再試",
+            headers={"Retry-After": str(admission.retry_after_seconds())},
+        )
 
 # 批量聊天端點
 @app.post("/chat/batch", response_model=List[ChatResponse])
 async def chat_batch(requests: List[ChatRequest]):
     """
     批量法律諮詢聊天端點
+
+    每個批次最多同時處理 BATCH_MAX_CONCURRENCY 個問題，LLM 呼叫槽位優先分配給 /chat；
+    排隊中的批次問題超過 BATCH_MAX_PENDING 時返回 429。
     
     Args:
         requests: 包含多個問題的請求列表
@@ -90,14 +201,26 @@ async def chat_batch(requests: List[ChatRequest]):
         List[ChatResponse]: 包含所有回答的列表
     """
     start_time = time.time()
+
+    if len(requests) > admission.limits[BATCH]:
+        raise HTTPException(
+            status_code=413,
+            detail=f"批次問題數超過上限 {admission.limits[BATCH]}",
+        )
+    _admit(BATCH, len(requests))
     
     try:
         results = []
+        batch_semaphore = asyncio.Semaphore(BATCH_MAX_CONCURRENCY)
+
+        async def bounded(request: ChatRequest) -> ChatResponse:
+            async with batch_semaphore:
+                return await process_single_chat(request, priority=BATCH)
         
-        # 並行處理所有請求
+        # 並行處理所有請求（受批次並行上限限制）
         tasks = []
         for request in requests:
-            task = process_single_chat(request)
+            task = bounded(request)
             tasks.append(task)
         
         # 等待所有任務完成
@@ -124,13 +247,169 @@ async def chat_batch(requests: List[ChatRequest]):
             status_code=500,
             detail=f"批量處理請求時發生錯誤: {str(e)}"
         )
+    finally:
+        admission.release(BATCH, len(requests))
+
+# 單一任務的問題數上限
+JOB_MAX_ITEMS = env_int("JOB_MAX_ITEMS", 10000)
+
+async def _job_worker():
+    """從任務佇列領取問題並以批次優先權處理；被取消時將處理中的問題放回佇列。
+    佇列操作是阻塞的 SQLite 呼叫，一律在執行緒中執行以免阻塞事件迴圈。"""
+    while True:
+        item = await asyncio.to_thread(job_store.claim)
+        if item is None:
+            # 閒置時清理超過保留時間的已完成任務
+            await asyncio.to_thread(job_store.prune)
+            job_wakeup.clear()
+            try:
+                await asyncio.wait_for(job_wakeup.wait(), timeout=JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        job_id, index, payload = item
+        try:
+            response = await process_single_chat(ChatRequest(**payload), priority=BATCH)
+            await asyncio.to_thread(job_store.complete, job_id, index, "done", response.model_dump())
+        except asyncio.CancelledError:
+            # 服務器關閉時同步放回，避免再次 await 時被取消而遺失
+            job_store.release(job_id, index)
+            raise
+        except Exception as e:
+            await asyncio.to_thread(
+                job_store.complete, job_id, index, "error", {"error": f"處理問題時發生錯誤: {str(e)}"}
+            )
+
+# 非同步任務端點
+@app.post("/jobs", status_code=202)
+async def create_job(requests: List[ChatRequest]):
+    """
+    建立非同步批次任務，問題寫入本地佇列後立即返回任務ID
+
+    Args:
+        requests: 包含多個問題的請求列表
+
+    Returns:
+        dict: 任務ID與初始狀態
+    """
+    if not requests:
+        raise HTTPException(status_code=400, detail="任務至少需要一個問題")
+    if len(requests) > JOB_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"任務問題數超過上限 {JOB_MAX_ITEMS}")
+    job_id = await asyncio.to_thread(job_store.create, [request.model_dump(exclude_none=True) for request in requests])
+    job_wakeup.set()
+    return await asyncio.to_thread(job_store.status, job_id)
 
-async def _run_chat(request: ChatRequest) -> ChatResponse:
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, after: int = 0, limit: int = 100):
+    """
+    獲取任務進度與增量結果
+
+    Args:
+        job_id: 任務ID
+        after: 上次取得的 cursor，只返回之後完成的結果
+        limit: 最多返回的結果筆數
+
+    Returns:
+        dict: 任務狀態、結果列表與下一次查詢使用的 cursor
+    """
+    status = await asyncio.to_thread(job_store.status, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="找不到任務")
+    results = await asyncio.to_thread(job_store.results, job_id, after, limit)
+    return {**status, "results": results, "cursor": results[-1]["seq"] if results else after}
+
+async def _stream_job(job_id: str, after: int) -> AsyncIterator[str]:
+    """輪詢任務佇列，依完成順序推送 result 事件，全部完成後推送 done 事件。"""
+    cursor = after
+    while True:
+        status = await asyncio.to_thread(job_store.status, job_id)
+        results = await asyncio.to_thread(job_store.results, job_id, cursor)
+        for result in results:
+            yield _sse("result", result)
+        if results:
+            cursor = results[-1]["seq"]
+            continue
+        yield _sse("progress", status)
+        if status["status"] == "completed":
+            yield _sse("done", {**status, "cursor": cursor})
+            return
+        await asyncio.sleep(JOB_POLL_INTERVAL)
+
+@app.get("/jobs/{job_id}/stream")
+async def stream_job(job_id: str, after: int = 0):
+    """
+    以 Server-Sent Events 串流任務結果
+
+    Args:
+        job_id: 任務ID
+        after: 從此 cursor 之後開始推送（斷線重連時使用）
+
+    Returns:
+        StreamingResponse: text/event-stream 串流回應
+    """
+    if await asyncio.to_thread(job_store.status, job_id) is None:
+        raise HTTPException(status_code=404, detail="找不到任務")
+    return StreamingResponse(
+        _stream_job(job_id, after),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _build_config(request: ChatRequest, thread_id: str, priority: str = INTERACTIVE) -> dict:
+    """將請求中的可選設定轉為LangGraph的configurable參數。"""
+    configurable = {"thread_id": thread_id, "priority": priority}
+    if request.generator_max_concurrency is not None:
+        configurable["generator_max_concurrency"] = request.generator_max_concurrency
+    if request.critic_max_concurrency is not None:
+        configurable["critic_max_concurrency"] = request.critic_max_concurrency
+    if request.relevance_gating is not None:
+        configurable["relevance_gating"] = request.relevance_gating
+    if request.generation_mode is not None:
+        configurable["generation_mode"] = request.generation_mode
+    if request.retrieval_mode is not None:
+        configurable["retrieval_mode"] = request.retrieval_mode
+    if request.routing_mode is not None:
+        configurable["routing_mode"] = request.routing_mode
+    if request.router_backend is not None:
+        configurable["router_backend"] = request.router_backend
+    return {"configurable": configurable}
+
+async def _run_chat(request: ChatRequest, priority: str = INTERACTIVE) -> ChatResponse:
     """執行聊天流程並返回回應。"""
     start_time = time.time()
 
     thread_id = request.thread_id or str(uuid.uuid4())
-    config = {"configurable": {"thread_id": thread_id}}
+    config = _build_config(request, thread_id, priority)
+
+    # 語義快取只用於對話的第一輪，後續輪次的答案取決於對話歷史
+    cache_embedding = None
+    cache_topic = None
+    if semantic_cache is not None:
+        snapshot = await graph.aget_state(config)
+        if not snapshot.values.get("messages"):
+            cache_embedding = await get_embeddings().aembed_query(request.question)
+            cache_topic = await asyncio.to_thread(detect_topic, cache_embedding)
+            cached_answer = await asyncio.to_thread(semantic_cache.lookup, cache_embedding, cache_topic)
+            if cached_answer is not None:
+                # 將命中的問答寫入對話狀態，讓後續追問能延續上下文
+                await graph.aupdate_state(
+                    config,
+                    {
+                        "question": request.question,
+                        "messages": [HumanMessage(content=request.question), AIMessage(content=cached_answer)],
+                    },
+                    as_node="compactor",
+                )
+                return ChatResponse(
+                    answer=cached_answer,
+                    thread_id=thread_id,
+                    user_id=request.user_id,
+                    processing_time=round(time.time() - start_time, 2),
+                    status="success",
+                    cached=True,
+                )
 
     result = await graph.ainvoke(
         input={"question": request.question},
@@ -142,6 +421,10 @@ async def _run_chat(request: ChatRequest) -> ChatResponse:
     else:
         answer = "抱歉，我無法處理您的問題。"
 
+    # 只快取經過檢索且領域一致的答案
+    if cache_embedding is not None and result.get("Retrieve") == "Yes" and result.get("LegalTopic") == cache_topic:
+        await asyncio.to_thread(semantic_cache.store, cache_embedding, cache_topic, request.question, answer)
+
     processing_time = time.time() - start_time
 
     return ChatResponse(
@@ -153,37 +436,162 @@ async def _run_chat(request: ChatRequest) -> ChatResponse:
     )
 
 
-async def process_single_chat(request: ChatRequest) -> ChatResponse:
+# 最終答案分段推送的字元數
+STREAM_ANSWER_CHUNK_SIZE = 16
+
+def _sse(event: str, data: dict) -> str:
+    """將事件編碼為SSE格式。"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _node_event(node: str, update: dict, state: dict) -> Optional[str]:
+    """將節點的狀態更新轉換為進度事件。"""
+    if node == "semantic_router":
+        return _sse("route", {"retrieve": update.get("Retrieve")})
+    if node == "query_router":
+        return _sse("route", {
+            "retrieve": update.get("Retrieve"),
+            "legal_topic": update.get("LegalTopic"),
+            "query": update.get("Query"),
+        })
+    if node == "retriever":
+        titles = [d.metadata.get("title", "") for d in update.get("documents", [])]
+        return _sse("retrieved", {"titles": titles})
+    if node == "generator":
+        return _sse("generated", {
+            "candidates": len(update.get("ConsultationAnswers", [])),
+            "is_relevant": update.get("IsRelevant", []),
+        })
+    if node == "critic":
+        is_useful = update.get("IsUseful", [])
+        is_support = update.get("IsSupport") or [None] * len(is_useful)
+        is_relevant = state.get("IsRelevant") or [None] * len(is_useful)
+        scores = []
+        for relevant, support, useful in zip(is_relevant, is_support, is_useful):
+            score = calculate_score(relevant, support, useful) if relevant is not None else None
+            scores.append({"is_relevant": relevant, "is_support": support, "is_useful": useful, "score": score})
+        return _sse("critiqued", {"scores": scores})
+    return None
+
+async def _stream_chat(request: ChatRequest) -> AsyncIterator[str]:
+    """執行聊天流程並逐步產生SSE事件。"""
+    start_time = time.time()
+
+    thread_id = request.thread_id or str(uuid.uuid4())
+    config = _build_config(request, thread_id)
+    yield _sse("start", {"thread_id": thread_id, "user_id": request.user_id})
+
+    state: dict = {}
+    try:
+        async for chunk in graph.astream(
+            input={"question": request.question},
+            config=config,
+            stream_mode="updates",
+        ):
+            for node, update in chunk.items():
+                if not update:
+                    continue
+                state.update(update)
+                event = _node_event(node, update, state)
+                if event:
+                    yield event
+    except Exception as e:
+        yield _sse("error", {"error": f"處理請求時發生錯誤: {str(e)}"})
+        return
+
+    messages = state.get("messages")
+    answer = messages[-1].content if messages else "抱歉，我無法處理您的問題。"
+    for i in range(0, len(answer), STREAM_ANSWER_CHUNK_SIZE):
+        yield _sse("answer", {"delta": answer[i:i + STREAM_ANSWER_CHUNK_SIZE]})
+
+    yield _sse("done", {
+        "thread_id": thread_id,
+        "user_id": request.user_id,
+        "processing_time": round(time.time() - start_time, 2),
+        "status": "success",
+    })
+
+async def process_single_chat(request: ChatRequest, priority: str = INTERACTIVE) -> ChatResponse:
     """處理單個聊天請求的輔助函數"""
-    return await _run_chat(request)
+    return await _run_chat(request, priority)
 
 # 獲取對話歷史端點
 @app.get("/chat/history/{thread_id}")
-async def get_chat_history(thread_id: str, limit: int = 10):
+async def get_chat_history(thread_id: str, limit: int = Query(10, ge=1, le=200), before: Optional[int] = None):
     """
-    獲取對話歷史
+    獲取對話歷史（只讀取檢查點的 messages 通道，由新到舊分頁）
     
     Args:
         thread_id: 對話線程ID
         limit: 返回的歷史記錄數量限制
+        before: 分頁游標，只返回索引小於此值的訊息（使用上一頁的 next_before）
         
     Returns:
         dict: 包含對話歷史的字典
     """
     try:
-        # 這裡可以實現從記憶中獲取對話歷史的邏輯
-        # 目前返回一個示例響應
+        messages = await _read_messages(thread_id)
+        if messages is None:
+            raise HTTPException(status_code=404, detail="找不到對話")
+        end = len(messages) if before is None else max(0, min(before, len(messages)))
+        start = max(0, end - limit)
         return {
             "thread_id": thread_id,
-            "history": [],
-            "message": "對話歷史功能待實現"
+            "total": len(messages),
+            "history": [_serialize_message(i, messages[i]) for i in range(start, end)],
+            "next_before": start if start > 0 else None,
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"獲取對話歷史時發生錯誤: {str(e)}"
         )
 
+_MESSAGE_ROLES = {"human": "user", "ai": "assistant"}
+
+def _serialize_message(index: int, message) -> dict:
+    """將訊息轉為歷史記錄格式。"""
+    return {
+        "index": index,
+        "id": message.id,
+        "role": _MESSAGE_ROLES.get(message.type, message.type),
+        "content": message.content,
+    }
+
+async def _read_messages(thread_id: str) -> Optional[list]:
+    """讀取對話的訊息列表；檢查點支援時只反序列化 messages 通道，不載入檢索文件與候選答案。"""
+    config = {"configurable": {"thread_id": thread_id}}
+    if hasattr(graph.checkpointer, "aget_channel"):
+        return await graph.checkpointer.aget_channel(config, "messages")
+    snapshot = await graph.aget_state(config)
+    return snapshot.values.get("messages")
+
+async def _export_threads(thread_ids: Optional[List[str]]) -> AsyncIterator[str]:
+    """逐一讀取對話並輸出 NDJSON，每行一個對話。"""
+    if thread_ids is None:
+        thread_ids = await asyncio.to_thread(graph.checkpointer.thread_ids)
+    for thread_id in thread_ids:
+        messages = await _read_messages(thread_id)
+        if messages is None:
+            continue
+        line = {"thread_id": thread_id, "messages": [_serialize_message(i, m) for i, m in enumerate(messages)]}
+        yield json.dumps(line, ensure_ascii=False) + "\n"
+
+# 對話匯出端點
+@app.get("/chat/export")
+async def export_chat_history(thread_id: Optional[List[str]] = Query(None)):
+    """
+    以 NDJSON 串流匯出多個對話的歷史
+
+    Args:
+        thread_id: 要匯出的對話ID（可重複），未指定時匯出所有保存中的對話
+
+    Returns:
+        StreamingResponse: application/x-ndjson 串流回應
+    """
+    return StreamingResponse(_export_threads(thread_id), media_type="application/x-ndjson")
+
 # 服務器資訊端點
 @app.get("/info")
 async def server_info():
@@ -193,24 +601,60 @@ async def server_info():
         "version": "1.0.0",
         "framework": "FastAPI",
         "agent": "LangGraph",
+        "pid": os.getpid(),
         "endpoints": {
             "chat": "/chat",
+            "chat_stream": "/chat/stream",
             "batch_chat": "/chat/batch",
+            "jobs": "/jobs",
+            "job_status": "/jobs/{job_id}",
+            "job_stream": "/jobs/{job_id}/stream",
             "history": "/chat/history/{thread_id}",
+            "export": "/chat/export",
             "health": "/health",
             "info": "/info"
-        }
+        },
+        "semantic_cache": semantic_cache.stats() if semantic_cache is not None else {"enabled": False},
+        "llm_cache": llm_cache.stats() if llm_cache is not None else {"enabled": False},
+        "embedding_cache": _embedding_cache_stats(),
+        "checkpointer": graph.checkpointer.stats(),
+        "admission": admission.stats(),
+        "jobs": job_store.stats(),
+        "local_router": get_local_router().stats() if get_local_router.built else {"built": False},
     }
 
-def start_server(host: str = "0.0.0.0", port: int = 8000, reload: bool = True):
-    """啟動FastAPI服務器"""
-    
+def start_server(
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    reload: bool = True,
+    workers: int = 1,
+    graceful_timeout: Optional[int] = None,
+):
+    """
+    啟動FastAPI服務器
+
+    Args:
+        host: 服務器主機地址
+        port: 服務器端口
+        reload: 是否啟用自動重載（多個 worker 時自動停用）
+        workers: worker 行程數量
+        graceful_timeout: 關閉時等待進行中請求完成的秒數
+    """
+    if workers > 1:
+        reload = False
+        # 每個 worker 都是獨立行程，對話狀態必須存放在行程間共用的檢查點
+        if os.getenv("CHECKPOINTER", "memory") == "memory":
+            os.environ["CHECKPOINTER"] = "sqlite"
+    if graceful_timeout is None:
+        graceful_timeout = env_int("SERVER_GRACEFUL_TIMEOUT", 30)
+
     print("🚀 啟動法律諮詢聊天機器人API服務器...")
     print("=" * 60)
     print(f"🌐 服務器地址: http://{host}:{port}")
     print(f"📚 API文檔: http://{host}:{port}/docs")
     print(f"🔍 健康檢查: http://{host}:{port}/health")
     print(f"ℹ️  服務器資訊: http://{host}:{port}/info")
+    print(f"⚙️  Worker 數量: {workers}，檢查點後端: {os.getenv('CHECKPOINTER', 'memory')}")
     print("=" * 60)
     print("💡 提示:")
     print("  - 使用 Ctrl+C 停止服務器")
@@ -224,6 +668,8 @@ def start_server(host: str = "0.0.0.0", port: int = 8000, reload: bool = True):
             host=host,
             port=port,
             reload=reload,
+            workers=workers,
+            timeout_graceful_shutdown=graceful_timeout,
             log_level="info"
         )
     except KeyboardInterrupt:
@@ -236,6 +682,8 @@ if __name__ == "__main__":
     host = "0.0.0.0"
     port = 8000
     reload = True
+    workers = env_int("SERVER_WORKERS", 1)
+    graceful_timeout = None
     
     if len(sys.argv) > 1:
         if "--help" in sys.argv or "-h" in sys.argv:
@@ -244,6 +692,9 @@ if __name__ == "__main__":
             print("  --host HOST    服務器主機地址 (預設: 0.0.0.0)")
             print("  --port PORT    服務器端口 (預設: 8000)")
             print("  --no-reload    禁用自動重載")
+            print("  --workers N    worker 行程數量，大於 1 時停用自動重載並使用 SQLite 檢查點 (預設: 1)")
+            print("  --production   生產模式：停用自動重載，worker 數量預設為 CPU 核心數")
+            print("  --graceful-timeout SECONDS  關閉時等待進行中請求的秒數 (預設: 30)")
             print("  --help, -h     顯示此幫助資訊")
             sys.exit(0)
         
@@ -258,7 +709,19 @@ if __name__ == "__main__":
             elif sys.argv[i] == "--no-reload":
                 reload = False
                 i += 1
+            elif sys.argv[i] == "--workers" and i + 1 < len(sys.argv):
+                workers = int(sys.argv[i + 1])
+                i += 2
+            elif sys.argv[i] == "--production":
+                reload = False
+                # SERVER_WORKERS 留空視為未設定（.env.template 預設為空）
+                if "--workers" not in sys.argv and not os.getenv("SERVER_WORKERS", "").strip():
+                    workers = os.cpu_count() or 1
+                i += 1
+            elif sys.argv[i] == "--graceful-timeout" and i + 1 < len(sys.argv):
+                graceful_timeout = int(sys.argv[i + 1])
+                i += 2
             else:
                 i += 1
     
-    start_server(host, port, reload)
\ No newline at end of file
+    start_server(host, port, reload, workers, graceful_timeout)
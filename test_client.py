@@ -6,7 +6,7 @@ import asyncio
 import aiohttp
 import json
 import time
-from typing import Optional, List
+from typing import Optional, List, AsyncIterator
 
 class LegalConsultationClient:
     """法律諮詢客戶端"""
@@ -72,6 +72,48 @@ class LegalConsultationClient:
                 "status": "error"
             }
     
+    async def chat_stream(self, question: str, user_id: Optional[str] = None) -> AsyncIterator[tuple[str, dict]]:
+        """
+        發送串流聊天請求，逐一產生SSE事件
+
+        Args:
+            question: 用戶問題
+            user_id: 可選的用戶ID
+
+        Yields:
+            tuple[str, dict]: (事件名稱, 事件資料)
+        """
+        if not self.session:
+            raise RuntimeError("Client not initialized. Use 'async with' context manager.")
+
+        payload = {
+            "question": question,
+            "thread_id": self.thread_id,
+            "user_id": user_id
+        }
+
+        async with self.session.post(
+            f"{self.base_url}/chat/stream",
+            json=payload,
+            headers={"Content-Type": "application/json", "Accept": "text/event-stream"}
+        ) as response:
+            if response.status != 200:
+                yield "error", {"error": f"HTTP {response.status}", "detail": await response.text()}
+                return
+
+            event = "message"
+            async for raw_line in response.content:
+                line = raw_line.decode("utf-8").rstrip("\r\n")
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    data = json.loads(line[len("data: "):])
+                    # 保存thread_id用於後續對話
+                    if event == "start" and not self.thread_id:
+                        self.thread_id = data.get("thread_id")
+                    yield event, data
+                    event = "message"
+    
     async def batch_chat(self, questions: List[str], user_id: Optional[str] = None) -> List[dict]:
         """
         發送批量聊天請求
@@ -121,6 +163,76 @@ class LegalConsultationClient:
                 "status": "error"
             }]
     
+    async def submit_job(self, questions: List[str], user_id: Optional[str] = None) -> dict:
+        """
+        建立非同步批次任務，不需等待所有問題處理完成
+
+        Args:
+            questions: 問題列表（每個問題各自開啟新對話）
+            user_id: 可選的用戶ID
+
+        Returns:
+            dict: 任務ID與初始狀態
+        """
+        if not self.session:
+            raise RuntimeError("Client not initialized. Use 'async with' context manager.")
+
+        payload = [{"question": question, "user_id": user_id} for question in questions]
+        async with self.session.post(f"{self.base_url}/jobs", json=payload) as response:
+            if response.status == 202:
+                return await response.json()
+            return {"error": f"HTTP {response.status}", "detail": await response.text(), "status": "error"}
+
+    async def get_job(self, job_id: str, after: int = 0) -> dict:
+        """
+        查詢任務進度與 cursor 之後完成的結果
+
+        Args:
+            job_id: 任務ID
+            after: 上次取得的 cursor
+
+        Returns:
+            dict: 任務狀態、結果列表與新的 cursor
+        """
+        if not self.session:
+            raise RuntimeError("Client not initialized. Use 'async with' context manager.")
+
+        async with self.session.get(f"{self.base_url}/jobs/{job_id}", params={"after": after}) as response:
+            if response.status == 200:
+                return await response.json()
+            return {"error": f"HTTP {response.status}", "detail": await response.text(), "status": "error"}
+
+    async def stream_job(self, job_id: str, after: int = 0) -> AsyncIterator[tuple[str, dict]]:
+        """
+        串流任務結果，逐一產生SSE事件（result / progress / done）
+
+        Args:
+            job_id: 任務ID
+            after: 從此 cursor 之後開始（斷線重連時使用）
+
+        Yields:
+            tuple[str, dict]: (事件名稱, 事件資料)
+        """
+        if not self.session:
+            raise RuntimeError("Client not initialized. Use 'async with' context manager.")
+
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=None)
+        async with self.session.get(
+            f"{self.base_url}/jobs/{job_id}/stream", params={"after": after}, timeout=timeout
+        ) as response:
+            if response.status != 200:
+                yield "error", {"error": f"HTTP {response.status}", "detail": await response.text()}
+                return
+
+            event = "message"
+            async for raw_line in response.content:
+                line = raw_line.decode("utf-8").rstrip("\r\n")
+                if line.startswith("event: "):
+                    event = line[len("event: "):]
+                elif line.startswith("data: "):
+                    yield event, json.loads(line[len("data: "):])
+                    event = "message"
+
     async def health_check(self) -> dict:
         """檢查服務器健康狀態"""
         if not self.session:
@@ -290,6 +402,71 @@ async def demo_batch_chat():
                 print(f"問題 {i+1} 處理失敗: {result.get('error', 'Unknown error')}")
                 print("-" * 40)
 
+async def demo_stream_chat():
+    """演示串流聊天功能"""
+    print("串流聊天演示")
+    print("=" * 30)
+
+    question = "竊盜罪的刑責是什麼？"
+    print(f"User: {question}")
+
+    async with LegalConsultationClient() as client:
+        start_time = time.time()
+        first_byte_time = None
+        async for event, data in client.chat_stream(question):
+            if first_byte_time is None:
+                first_byte_time = time.time() - start_time
+            if event == "route":
+                print(f"🧭 路由: Retrieve={data['retrieve']}")
+            elif event == "retrieved":
+                print(f"📚 檢索到: {', '.join(data['titles'])}")
+            elif event == "generated":
+                print(f"✍️  生成候選答案: {data['candidates']} 個")
+            elif event == "critiqued":
+                for i, score in enumerate(data["scores"], 1):
+                    print(f"  候選 {i}: {score}")
+            elif event == "answer":
+                print(data["delta"], end="", flush=True)
+            elif event == "done":
+                print()
+                print(f"⏱️  首個事件時間: {first_byte_time:.2f}秒，總處理時間: {data['processing_time']}秒")
+            elif event == "error":
+                print(f"❌ 錯誤: {data}")
+
+async def demo_job():
+    """演示非同步批次任務：送出後串流取得結果"""
+    print("非同步批次任務演示")
+    print("=" * 30)
+
+    questions = [
+        "竊盜罪的刑責是什麼？",
+        "離婚需要什麼條件？",
+        "債務不履行如何處理？"
+    ]
+
+    async with LegalConsultationClient() as client:
+        job = await client.submit_job(questions)
+        if job.get("status") == "error":
+            print(f"❌ 建立任務失敗: {job}")
+            return
+        print(f"📥 已建立任務 {job['job_id']}，共 {job['total']} 個問題")
+
+        async for event, data in client.stream_job(job["job_id"]):
+            if event == "result":
+                index = data["index"]
+                if data["status"] == "done":
+                    print(f"問題 {index + 1}: {questions[index]}")
+                    print(f"回答: {data['response']['answer']}")
+                else:
+                    print(f"問題 {index + 1} 處理失敗: {data['response'].get('error')}")
+                print("-" * 40)
+            elif event == "progress":
+                print(f"⏳ 進度: {data['done'] + data['error']}/{data['total']}")
+            elif event == "done":
+                print(f"✅ 任務完成: 成功 {data['done']}，失敗 {data['error']}")
+            elif event == "error":
+                print(f"❌ 錯誤: {data}")
+
 async def main():
     """主函數"""
     import sys
@@ -297,11 +474,17 @@ async def main():
     if len(sys.argv) > 1:
         if sys.argv[1] == "demo":
             await demo_batch_chat()
+        elif sys.argv[1] == "stream":
+            await demo_stream_chat()
+        elif sys.argv[1] == "job":
+            await demo_job()
         elif sys.argv[1] == "interactive":
             await interactive_chat()
         else:
-            print("用法: python test_client.py [demo|interactive]")
+            print("用法: python test_client.py [demo|stream|job|interactive]")
             print("  demo: 運行批量聊天演示")
+            print("  stream: 運行串流聊天演示")
+            print("  job: 運行非同步批次任務演示")
             print("  interactive: 運行互動式聊天 (預設)")
     else:
         await interactive_chat()
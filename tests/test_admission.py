@@ -0,0 +1,52 @@
+"""
+PrioritySemaphore 的取消測試
+"""
+
+import asyncio
+import unittest
+from legal_consult_agent.utils.admission import BATCH, INTERACTIVE, PrioritySemaphore
+
+
+class PrioritySemaphoreCancelTest(unittest.TestCase):
+    def test_cancel_then_release_before_waiter_resumes(self):
+        async def scenario():
+            semaphore = PrioritySemaphore(1)
+            await semaphore.acquire()
+            waiter = asyncio.create_task(semaphore.acquire(BATCH))
+            await asyncio.sleep(0)
+            self.assertEqual(semaphore.waiting(), 1)
+
+            # release() 在 waiter 恢復之前彈出已取消的 future
+            waiter.cancel()
+            semaphore.release()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+
+            # 槽位沒有遺失，也沒有殘留的等待者
+            self.assertEqual(semaphore.waiting(), 0)
+            self.assertEqual(semaphore.value, 1)
+            await asyncio.wait_for(semaphore.acquire(INTERACTIVE), timeout=1)
+
+        asyncio.run(scenario())
+
+    def test_cancel_after_slot_handed_over_passes_it_on(self):
+        async def scenario():
+            semaphore = PrioritySemaphore(1)
+            await semaphore.acquire()
+            first = asyncio.create_task(semaphore.acquire())
+            second = asyncio.create_task(semaphore.acquire())
+            await asyncio.sleep(0)
+
+            # 槽位已移交給 first，但 first 在恢復前被取消，槽位應交給 second
+            semaphore.release()
+            first.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await first
+            await asyncio.wait_for(second, timeout=1)
+            self.assertEqual(semaphore.value, 0)
+
+        asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    unittest.main()
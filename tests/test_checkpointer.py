@@ -0,0 +1,236 @@
+"""
+檢查點後端（BoundedMemorySaver、SqliteCheckpointSaver）的讀寫、壓縮、淘汰與大小統計測試，
+並與 langgraph 的 InMemorySaver 在同一個圖上比較結果
+"""
+
+import asyncio
+import operator
+import os
+import tempfile
+import unittest
+from typing import Annotated, TypedDict
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+from legal_consult_agent.utils.checkpointer import BoundedMemorySaver, SqliteCheckpointSaver
+
+
+def make_checkpoint(checkpoint_id: str, values: dict, versions: dict) -> dict:
+    checkpoint = empty_checkpoint()
+    checkpoint["id"] = checkpoint_id
+    checkpoint["channel_values"] = dict(values)
+    checkpoint["channel_versions"] = dict(versions)
+    return checkpoint
+
+
+def thread_config(thread_id: str, checkpoint_id: str = None) -> dict:
+    configurable = {"thread_id": thread_id, "checkpoint_ns": ""}
+    if checkpoint_id is not None:
+        configurable["checkpoint_id"] = checkpoint_id
+    return {"configurable": configurable}
+
+
+class ChatState(TypedDict):
+    messages: Annotated[list[AnyMessage], add_messages]
+    turns: Annotated[int, operator.add]
+
+
+def build_graph(checkpointer):
+    def echo(state: ChatState):
+        return {"messages": [AIMessage(content=f"echo: {state['messages'][-1].content}")], "turns": 1}
+
+    builder = StateGraph(ChatState)
+    builder.add_node("echo", echo)
+    builder.add_edge(START, "echo")
+    builder.add_edge("echo", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+class CheckpointSaverTests:
+    """兩種後端共用的測試，子類別實作 make_saver"""
+
+    def make_saver(self, **budget):
+        raise NotImplementedError
+
+    def put(self, saver, thread_id, checkpoint_id, parent_id, values, versions, new_versions):
+        return saver.put(
+            thread_config(thread_id, parent_id),
+            make_checkpoint(checkpoint_id, values, versions),
+            {"source": "loop", "step": int(checkpoint_id)},
+            new_versions,
+        )
+
+    def test_put_get_list_round_trip(self):
+        saver = self.make_saver()
+        self.put(saver, "t1", "1", None, {"a": "x"}, {"a": "1"}, {"a": "1"})
+        self.put(saver, "t1", "2", "1", {"a": "y"}, {"a": "2"}, {"a": "2"})
+
+        latest = saver.get_tuple(thread_config("t1"))
+        self.assertEqual(latest.config["configurable"]["checkpoint_id"], "2")
+        self.assertEqual(latest.parent_config["configurable"]["checkpoint_id"], "1")
+        self.assertEqual(latest.checkpoint["channel_values"], {"a": "y"})
+        self.assertEqual(latest.metadata["step"], 2)
+
+        self.assertEqual([item.checkpoint["id"] for item in saver.list(thread_config("t1"))], ["2", "1"])
+        self.assertEqual([item.checkpoint["id"] for item in saver.list(thread_config("t1"), limit=1)], ["2"])
+        self.assertEqual(
+            [item.checkpoint["id"] for item in saver.list(thread_config("t1"), before=thread_config("t1", "2"))], ["1"]
+        )
+        self.assertEqual([item.checkpoint["id"] for item in saver.list(thread_config("t1"), filter={"step": 1})], ["1"])
+        self.assertIsNone(saver.get_tuple(thread_config("missing")))
+
+    def test_unchanged_channels_are_read_from_earlier_versions(self):
+        saver = self.make_saver()
+        self.put(saver, "t1", "1", None, {"a": "a1", "b": "b1"}, {"a": "1", "b": "1"}, {"a": "1", "b": "1"})
+        # 第二步只有 a 有新版本，b 沿用第一步的值
+        self.put(saver, "t1", "2", "1", {"a": "a2", "b": "b1"}, {"a": "2", "b": "1"}, {"a": "2"})
+
+        self.assertEqual(saver.get_tuple(thread_config("t1")).checkpoint["channel_values"], {"a": "a2", "b": "b1"})
+        self.assertEqual(
+            saver.get_tuple(thread_config("t1", "1")).checkpoint["channel_values"], {"a": "a1", "b": "b1"}
+        )
+
+    def test_pending_writes_are_replayed(self):
+        saver = self.make_saver()
+        config = self.put(saver, "t1", "1", None, {"a": "x"}, {"a": "1"}, {"a": "1"})
+        saver.put_writes(config, [("a", "w1"), ("b", "w2")], task_id="task-1")
+        # 一般通道已存在時不重複寫入
+        saver.put_writes(config, [("a", "ignored")], task_id="task-1")
+
+        self.assertEqual(
+            saver.get_tuple(thread_config("t1")).pending_writes, [("task-1", "a", "w1"), ("task-1", "b", "w2")]
+        )
+
+    def test_keep_latest_only_prunes_old_checkpoints_blobs_and_writes(self):
+        saver = self.make_saver(keep_latest_only=True)
+        config = self.put(saver, "t1", "1", None, {"a": "a1", "b": "b1"}, {"a": "1", "b": "1"}, {"a": "1", "b": "1"})
+        saver.put_writes(config, [("a", "w1")], task_id="task-1")
+        self.put(saver, "t1", "2", "1", {"a": "a2", "b": "b1"}, {"a": "2", "b": "1"}, {"a": "2"})
+
+        self.assertEqual([item.checkpoint["id"] for item in saver.list(thread_config("t1"))], ["2"])
+        latest = saver.get_tuple(thread_config("t1"))
+        self.assertEqual(latest.checkpoint["channel_values"], {"a": "a2", "b": "b1"})
+        self.assertEqual(latest.pending_writes, [])
+        self.assertEqual(self.blob_versions(saver, "t1"), {("a", "2"), ("b", "1")})
+
+    def test_get_channel_and_thread_ids(self):
+        saver = self.make_saver()
+        self.put(saver, "t1", "1", None, {"messages": ["hi"]}, {"messages": "1"}, {"messages": "1"})
+        self.put(saver, "t2", "1", None, {"other": 1}, {"other": "1"}, {"other": "1"})
+
+        self.assertEqual(saver.get_channel(thread_config("t1"), "messages"), ["hi"])
+        self.assertIsNone(saver.get_channel(thread_config("t2"), "messages"))
+        self.assertIsNone(saver.get_channel(thread_config("missing"), "messages"))
+        self.assertEqual(asyncio.run(saver.aget_channel(thread_config("t1"), "messages")), ["hi"])
+
+        # 讀取 t1 後 t1 成為最近存取的對話
+        saver.get_tuple(thread_config("t1"))
+        self.assertEqual(list(saver.thread_ids()), ["t1", "t2"])
+        saver.delete_thread("t1")
+        self.assertEqual(list(saver.thread_ids()), ["t2"])
+
+    def test_max_threads_evicts_least_recently_used(self):
+        saver = self.make_saver(max_threads=2)
+        for thread_id in ("t1", "t2"):
+            self.put(saver, thread_id, "1", None, {"a": thread_id}, {"a": "1"}, {"a": "1"})
+        saver.get_tuple(thread_config("t1"))
+        self.put(saver, "t3", "1", None, {"a": "t3"}, {"a": "1"}, {"a": "1"})
+
+        self.assertEqual(sorted(saver.thread_ids()), ["t1", "t3"])
+        self.assertIsNone(saver.get_tuple(thread_config("t2")))
+        self.assertEqual(saver.stats()["evictions"], 1)
+        self.assertEqual(saver.stats()["threads"], 2)
+
+    def test_graph_matches_in_memory_saver(self):
+        def run(checkpointer):
+            graph = build_graph(checkpointer)
+            config = {"configurable": {"thread_id": "chat"}}
+            for question in ("q1", "q2", "q3"):
+                graph.invoke({"messages": [HumanMessage(content=question)]}, config)
+            history = [
+                ([m.content for m in snapshot.values.get("messages", [])], snapshot.values.get("turns"), snapshot.next)
+                for snapshot in graph.get_state_history(config)
+            ]
+            return history
+
+        async def arun(checkpointer):
+            graph = build_graph(checkpointer)
+            config = {"configurable": {"thread_id": "chat"}}
+            for question in ("q1", "q2"):
+                await graph.ainvoke({"messages": [HumanMessage(content=question)]}, config)
+            snapshot = await graph.aget_state(config)
+            return [m.content for m in snapshot.values["messages"]], snapshot.values["turns"]
+
+        expected = run(InMemorySaver())
+        self.assertEqual(expected[0][0], ["q1", "echo: q1", "q2", "echo: q2", "q3", "echo: q3"])
+        self.assertEqual(run(self.make_saver()), expected)
+        self.assertEqual(asyncio.run(arun(self.make_saver())), asyncio.run(arun(InMemorySaver())))
+
+
+class BoundedMemorySaverTest(CheckpointSaverTests, unittest.TestCase):
+    def make_saver(self, **budget):
+        return BoundedMemorySaver(**budget)
+
+    def blob_versions(self, saver, thread_id):
+        return {(key[2], key[3]) for key in saver.blobs if key[0] == thread_id}
+
+
+class SqliteCheckpointSaverTest(CheckpointSaverTests, unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.savers = []
+
+    def tearDown(self):
+        for saver in self.savers:
+            saver.close()
+        self.directory.cleanup()
+
+    def make_saver(self, **budget):
+        saver = SqliteCheckpointSaver(os.path.join(self.directory.name, f"checkpoints{len(self.savers)}.sqlite3"), **budget)
+        self.savers.append(saver)
+        return saver
+
+    def blob_versions(self, saver, thread_id):
+        return set(saver._conn.execute("SELECT channel, version FROM blobs WHERE thread_id = ?", (thread_id,)))
+
+    def stored_size(self, saver, thread_id):
+        return saver._conn.execute("SELECT size_bytes FROM threads WHERE thread_id = ?", (thread_id,)).fetchone()[0]
+
+    def summed_size(self, saver, thread_id):
+        return saver._conn.execute(
+            "SELECT (SELECT COALESCE(SUM(LENGTH(checkpoint) + LENGTH(metadata)), 0) FROM checkpoints WHERE thread_id = ?)"
+            " + (SELECT COALESCE(SUM(LENGTH(blob)), 0) FROM blobs WHERE thread_id = ?)"
+            " + (SELECT COALESCE(SUM(LENGTH(value)), 0) FROM writes WHERE thread_id = ?)",
+            (thread_id, thread_id, thread_id),
+        ).fetchone()[0]
+
+    def test_incremental_size_matches_stored_bytes(self):
+        for keep_latest_only in (False, True):
+            saver = self.make_saver(keep_latest_only=keep_latest_only)
+            config = self.put(saver, "t1", "1", None, {"a": "a1" * 50, "b": "b1"}, {"a": "1", "b": "1"}, {"a": "1", "b": "1"})
+            saver.put_writes(config, [("a", "w" * 30)], task_id="task-1")
+            saver.put_writes(config, [("a", "ignored")], task_id="task-1")
+            self.assertEqual(self.stored_size(saver, "t1"), self.summed_size(saver, "t1"))
+            self.put(saver, "t1", "2", "1", {"a": "a2", "b": "b1"}, {"a": "2", "b": "1"}, {"a": "2"})
+            # 重複寫入同一個檢查點
+            self.put(saver, "t1", "2", "1", {"a": "a2", "b": "b1"}, {"a": "2", "b": "1"}, {"a": "2"})
+            self.assertEqual(self.stored_size(saver, "t1"), self.summed_size(saver, "t1"))
+
+    def test_reads_do_not_commit_access_time(self):
+        saver = self.make_saver()
+        self.put(saver, "t1", "1", None, {"a": "x"}, {"a": "1"}, {"a": "1"})
+        saver._conn.execute("UPDATE threads SET last_access = 0")
+        saver._conn.commit()
+
+        saver.get_tuple(thread_config("t1"))
+        self.assertFalse(saver._conn.in_transaction)
+        self.assertEqual(saver._conn.execute("SELECT last_access FROM threads").fetchone()[0], 0)
+        # 列出對話時寫回累積的存取時間
+        saver.thread_ids()
+        self.assertGreater(saver._conn.execute("SELECT last_access FROM threads").fetchone()[0], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
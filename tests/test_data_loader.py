@@ -0,0 +1,124 @@
+"""
+資料載入器的續傳與統計測試：使用臨時的 Chroma 與假的嵌入模型，不需要網路或 API 金鑰
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+import uuid
+from unittest import mock
+import chromadb
+from langchain_chroma import Chroma
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from legal_consult_agent.utils import data_loader
+from legal_consult_agent.utils.data_loader import (
+    load_collection,
+    load_data_hash,
+    load_manifest,
+    read_catalog_from_client,
+    read_catalog_from_sqlite,
+    read_store_catalog,
+    should_reload_data,
+)
+
+
+class FailingEmbeddings(DeterministicFakeEmbedding):
+    """前 fail_after 次 aembed_documents 正常，之後拋出錯誤，模擬載入中途中斷"""
+
+    fail_after: int = -1
+    calls: int = 0
+
+    async def aembed_documents(self, texts):
+        self.calls += 1
+        if 0 <= self.fail_after < self.calls:
+            raise RuntimeError("embedding API unavailable")
+        return self.embed_documents(texts)
+
+
+class LoadCollectionResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp.name, "criminal.json")
+        records = [{"id": f"criminal_{i:03d}", "title": f"標題{i}", "content": f"內容{i}", "tags": ["刑責"]} for i in range(10)]
+        with open(self.file_path, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False)
+        self.embeddings = FailingEmbeddings(size=8)
+        self.vector_store = Chroma(
+            collection_name=f"test_{uuid.uuid4().hex}",
+            embedding_function=self.embeddings,
+            client=chromadb.EphemeralClient(),
+        )
+        self.config = {"collection_name": "criminal_collection", "file_path": self.file_path, "vector_store": self.vector_store}
+
+    def tearDown(self):
+        self.vector_store.delete_collection()
+        self.tmp.cleanup()
+
+    def load(self, force_reload: bool):
+        return asyncio.run(load_collection(self.config, force_reload, asyncio.Semaphore(1), asyncio.Lock(), 2))
+
+    def test_interrupted_force_reload_is_resumed(self):
+        self.assertIsNotNone(self.load(force_reload=True))
+        self.assertTrue(load_data_hash(self.file_path))
+
+        # --force 重置後寫入兩個批次即中斷
+        self.embeddings.calls, self.embeddings.fail_after = 0, 2
+        self.assertIsNone(self.load(force_reload=True))
+        self.assertEqual(self.vector_store._collection.count(), 4)
+        self.assertEqual(len(load_manifest(self.file_path)), 4)
+        self.assertEqual(load_data_hash(self.file_path), "")
+
+        # 不帶 --force 重新執行：不能視為已完成，且只嵌入尚未寫入的資料
+        self.embeddings.calls, self.embeddings.fail_after = 0, -1
+        self.assertTrue(should_reload_data(self.file_path, self.vector_store))
+        result = self.load(force_reload=False)
+        self.assertEqual(result["upserted"], 6)
+        self.assertEqual(self.vector_store._collection.count(), 10)
+        self.assertTrue(load_data_hash(self.file_path))
+        self.assertFalse(should_reload_data(self.file_path, self.vector_store))
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+class StoreCatalogTest(unittest.TestCase):
+    """直接查詢 chroma.sqlite3 的結果須與客戶端API一致，chromadb 升級改變內部結構時會在此失敗"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        client = chromadb.PersistentClient(path=self.tmp.name)
+        criminal = client.get_or_create_collection("criminal_collection")
+        criminal.add(
+            ids=[f"c{i}" for i in range(5)],
+            embeddings=[[1.0, float(i)] for i in range(5)],
+            metadatas=[{"category": "竊盜" if i < 3 else "詐欺"} for i in range(5)],
+        )
+        marriage = client.get_or_create_collection("marriage_collection")
+        marriage.add(ids=["m0", "m1"], embeddings=[[0.0, 1.0], [1.0, 1.0]], metadatas=[{"category": "離婚"}, {"title": "無分類"}])
+        client.get_or_create_collection("money_debt_collection")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sqlite_catalog_matches_client_api(self):
+        from_sqlite = read_catalog_from_sqlite(self.tmp.name)
+        self.assertIsNotNone(from_sqlite, "chroma.sqlite3 的內部結構已改變")
+        from_client = read_catalog_from_client(self.tmp.name)
+        self.assertEqual(
+            {name: (entry["count"], entry["categories"]) for name, entry in from_sqlite.items()},
+            {name: (entry["count"], entry["categories"]) for name, entry in from_client.items()},
+        )
+        self.assertEqual(from_client["criminal_collection"]["categories"], {"竊盜": 3, "詐欺": 2})
+        self.assertEqual(from_client["marriage_collection"]["count"], 2)
+        self.assertEqual(from_client["money_debt_collection"]["count"], 0)
+
+    def test_schema_drift_falls_back_to_client_api(self):
+        drifted = {**data_loader._CATALOG_SCHEMA, "embeddings": {"id", "segment_id", "missing_column"}}
+        with mock.patch.object(data_loader, "_CATALOG_SCHEMA", drifted):
+            self.assertIsNone(read_catalog_from_sqlite(self.tmp.name))
+            catalog = read_store_catalog(self.tmp.name)
+        self.assertEqual(catalog["criminal_collection"]["count"], 5)
+        self.assertEqual(catalog["marriage_collection"]["categories"], {"離婚": 1})
@@ -0,0 +1,58 @@
+"""
+CachedEmbeddings 的淘汰與存取時間寫回測試
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from legal_consult_agent.utils.embedding_cache import CachedEmbeddings
+
+
+class CachedEmbeddingsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = CachedEmbeddings(
+            DeterministicFakeEmbedding(size=8), os.path.join(self.directory.name, "e.sqlite3"), "fake", max_entries=3
+        )
+
+    def tearDown(self):
+        self.cache._conn.close()
+        self.directory.cleanup()
+
+    def keys(self) -> set[str]:
+        return {row[0] for row in self.cache._conn.execute("SELECT key FROM embedding_cache")}
+
+    def test_async_hits_return_cached_vectors(self):
+        async def scenario():
+            first = await self.cache.aembed_documents(["a", "b"])
+            cached = await self.cache.aembed_documents(["b", "a"])
+            # 快取以 float32 儲存
+            np.testing.assert_allclose(cached, first[::-1], rtol=1e-6)
+            self.assertEqual(await self.cache.aembed_query("a"), cached[1])
+
+        asyncio.run(scenario())
+        self.assertEqual((self.cache.hits, self.cache.misses), (3, 2))
+        self.assertEqual(self.cache.stats()["entries"], 2)
+
+    def test_eviction_uses_buffered_access_times(self):
+        self.cache.embed_documents(["a", "b", "c"])
+        self.cache._conn.execute("UPDATE embedding_cache SET last_access = 0")
+        # 命中 a 的存取時間只記在記憶體，尚未寫回
+        self.cache.embed_query("a")
+        self.assertEqual(self.cache._conn.execute("SELECT MAX(last_access) FROM embedding_cache").fetchone()[0], 0)
+
+        # 超過上限時先寫回存取時間，淘汰最久未使用的 b 而不是剛命中的 a
+        self.cache.embed_query("d")
+        self.assertEqual(self.keys(), {self.cache._key(text) for text in ("a", "c", "d")})
+        self.assertEqual(self.cache._entries, 3)
+
+        # 重複寫入相同的文字不會增加項目數
+        self.cache._store(["d"], [[0.0] * 8])
+        self.assertEqual(self.cache._entries, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
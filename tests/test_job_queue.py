@@ -0,0 +1,61 @@
+"""
+JobStore 的領取順序與已完成任務的清理測試
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from legal_consult_agent.utils.job_queue import JobStore
+
+
+class JobStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, "jobs.sqlite3")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_claim_uses_status_index_in_creation_order(self):
+        store = JobStore(self.db_path, lease_seconds=600)
+        first = store.create([{"question": "q0"}, {"question": "q1"}])
+        second = store.create([{"question": "q2"}])
+        store.complete(*store.claim()[:2], "done", {})
+
+        self.assertEqual(store.claim()[:2], (first, 1))
+        self.assertEqual(store.claim()[:2], (second, 0))
+        self.assertIsNone(store.claim())
+
+        plan = " ".join(
+            row[-1] for row in store._conn.execute(
+                "EXPLAIN QUERY PLAN SELECT MIN(rowid) FROM job_items WHERE status = 'pending'"
+            )
+        )
+        self.assertIn("idx_job_items_status", plan)
+        store.close()
+
+    def test_prune_removes_only_finished_jobs_past_retention(self):
+        store = JobStore(self.db_path, retention_seconds=3600)
+        finished = store.create([{"question": "q0"}])
+        store.complete(*store.claim()[:2], "done", {})
+        unfinished = store.create([{"question": "q1"}, {"question": "q2"}])
+        store.complete(*store.claim()[:2], "done", {})
+
+        self.assertEqual(store.prune(), 0)
+        # 讓完成時間超過保留時間
+        store._conn.execute("UPDATE job_items SET finished_at = ?", (time.time() - 7200,))
+        store._last_prune = 0.0
+        self.assertEqual(store.prune(), 1)
+        self.assertIsNone(store.status(finished))
+        self.assertEqual(store.status(unfinished)["pending"], 1)
+
+        # 距上次清理未滿 PRUNE_INTERVAL 秒時略過
+        store.complete(*store.claim()[:2], "done", {})
+        store._conn.execute("UPDATE job_items SET finished_at = ?", (time.time() - 7200,))
+        self.assertEqual(store.prune(), 0)
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
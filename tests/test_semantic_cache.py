@@ -0,0 +1,50 @@
+"""
+SemanticCache 的記憶體索引維護與淘汰測試
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+from legal_consult_agent.utils.semantic_cache import SemanticCache
+
+
+class SemanticCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = SemanticCache(os.path.join(self.directory.name, "cache", "semantic.sqlite3"), max_entries=3)
+
+    def tearDown(self):
+        self.cache._conn.close()
+        self.directory.cleanup()
+
+    def test_store_appends_to_loaded_index_without_reloading(self):
+        self.cache.store([1.0, 0.0], "Criminal", "q1", "a1")
+        self.assertEqual(self.cache.lookup([1.0, 0.0], "Criminal"), "a1")
+
+        with mock.patch.object(self.cache, "_load_index", wraps=self.cache._load_index) as load_index:
+            self.cache.store([0.0, 1.0], "Criminal", "q2", "a2")
+            self.cache.store([1.0, 1.0], "Marriage", "q3", "a3")
+            self.assertEqual(self.cache.lookup([0.0, 1.0], "Criminal"), "a2")
+        # 已載入的領域直接附加新的一列，未載入的領域維持未載入
+        self.assertEqual(len(self.cache._index["Criminal"][0]), 2)
+        self.assertNotIn("Marriage", self.cache._index)
+        self.assertEqual(self.cache._conn.execute("SELECT COUNT(*) FROM semantic_cache").fetchone()[0], 3)
+        load_index.assert_called_once()
+
+    def test_lru_eviction_invalidates_index(self):
+        for i in range(3):
+            self.cache.store([1.0, float(i)], "Criminal", f"q{i}", f"a{i}")
+        self.assertEqual(self.cache.lookup([1.0, 0.0], "Criminal"), "a0")
+
+        # 超過上限時淘汰最久未使用的 q1，並重建索引
+        self.cache.store([0.0, 1.0], "Criminal", "q3", "a3")
+        self.assertEqual(self.cache._index, {})
+        questions = {row[0] for row in self.cache._conn.execute("SELECT question FROM semantic_cache")}
+        self.assertEqual(questions, {"q0", "q2", "q3"})
+        self.assertEqual(self.cache.stats()["entries"], 3)
+        self.assertEqual(self.cache.lookup([0.0, 1.0], "Criminal"), "a3")
+
+
+if __name__ == "__main__":
+    unittest.main()